@@ -0,0 +1,146 @@
+"""
+Compares random small statechart pairs with the exhaustive reference and with the comparison engines. Prints the
+mismatches and the distribution of the speedup over the reference per engine, and writes the first mismatching
+pairs of every engine, minimized, as .ysc fixtures named <engine>-<seed>-<pair>-<1|2>.ysc into --fixtures or a new
+temporary directory. An engine that raises mismatches with the error field, and the place it raised is printed.
+Pairs that the preprocessor or the reference cannot compare are counted as errors and written as
+error-<seed>-<pair>-<1|2>.ysc.
+A fixture pair is reproduced by comparing its two files, or by running again with the same seed.
+
+    python benchmarks/differential.py [--pairs 1000] [--seed 0] [--engines auto hierarchical greedy]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import traceback
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+from tqdm import tqdm
+
+from nyc import writer
+from tests import differential
+
+
+def get_distribution(values):
+    if len(values) < 2:
+        return ' '.join(f'{value:.2f}x' for value in values)
+    deciles = statistics.quantiles(values, n=10)
+    return f'min {min(values):.2f}x  p10 {deciles[0]:.2f}x  median {statistics.median(values):.2f}x  ' \
+           f'p90 {deciles[-1]:.2f}x  max {max(values):.2f}x'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the comparison engines against the exhaustive reference')
+    parser.add_argument('--pairs', type=int, default=1000, help='Number of random pairs')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random pairs')
+    parser.add_argument('--max-states', type=int, default=4, help='Maximum number of states of a statechart')
+    parser.add_argument('--engines', nargs='+', choices=list(differential.ENGINES),
+                        default=['auto', 'hierarchical', 'greedy'],
+                        help='Engines to check; parallel starts a process pool per pair and is slow')
+    parser.add_argument('--fixtures', help='Directory of the minimized mismatching pairs, a new temporary directory '
+                                           'by default')
+    parser.add_argument('--max-fixtures', type=int, default=5, help='Mismatching pairs to minimize per engine')
+    arguments = parser.parse_args()
+    is_temporary = arguments.fixtures is None
+    if is_temporary:
+        arguments.fixtures = tempfile.mkdtemp(prefix='nyc-mismatches-')
+
+    mismatches = {engine: {} for engine in arguments.engines}
+    speedups = {engine: [] for engine in arguments.engines}
+    errors = {}
+    reference_error_count = 0
+    fixtures = []
+    for index in tqdm(range(arguments.pairs), desc='Comparing', unit='pairs'):
+        rng = random.Random(f'{arguments.seed}:{index}')
+        statechart1, statechart2 = (differential.round_trip(statechart)
+                                    for statechart in differential.generate_pair(rng, arguments.max_states))
+        try:
+            run = differential.run_pair(statechart1, statechart2, arguments.engines)
+        except Exception as err:
+            error = get_error(err)
+            errors[('reference',) + error] = errors.get(('reference',) + error, 0) + 1
+            reference_error_count += 1
+            if reference_error_count <= arguments.max_fixtures:
+                fixtures.append(write_fixture(arguments.fixtures, 'error', arguments.seed, index, statechart1,
+                                              statechart2, partial(raises, error)))
+            continue
+        for engine, err in run.errors.items():
+            errors[(engine,) + get_error(err)] = errors.get((engine,) + get_error(err), 0) + 1
+        for engine in arguments.engines:
+            speedups[engine].append(run.reference_time / run.times[engine])
+            if not run.mismatches[engine]:
+                continue
+            for field in run.mismatches[engine]:
+                mismatches[engine][field] = mismatches[engine].get(field, 0) + 1
+            mismatches[engine][None] = mismatches[engine].get(None, 0) + 1
+            if mismatches[engine][None] <= arguments.max_fixtures:
+                # A pair an engine raises on is shrunk to one it raises on at the same place
+                is_failing = partial(engine_raises, engine, get_error(run.errors[engine])) \
+                    if engine in run.errors else partial(mismatches_reference, engine)
+                fixtures.append(write_fixture(arguments.fixtures, engine, arguments.seed, index, statechart1,
+                                              statechart2, is_failing))
+
+    for engine in arguments.engines:
+        fields = ', '.join(f'{field} {count}' for field, count in mismatches[engine].items() if field is not None)
+        print(f'{engine}: {mismatches[engine].get(None, 0)} of {arguments.pairs} pairs mismatch'
+              f'{f" ({fields})" if fields else ""}')
+        print(f'  speedup over the reference: {get_distribution(speedups[engine])}')
+    for (name, error_type, filename, line), count in errors.items():
+        print(f'{name} errors: {count} pairs raise {error_type.__name__} in {filename}:{line}')
+    for path1, path2 in fixtures:
+        print(f'Fixture: {path1} {path2}')
+    if is_temporary and not fixtures:
+        os.rmdir(arguments.fixtures)
+
+
+def mismatches_reference(engine, statechart1, statechart2):
+    try:
+        run = differential.run_pair(differential.round_trip(statechart1), differential.round_trip(statechart2),
+                                    [engine])
+    except Exception:
+        # A reduction the reference cannot compare does not reproduce the mismatch
+        return False
+    return bool(run.mismatches[engine])
+
+
+def engine_raises(engine, error, statechart1, statechart2):
+    try:
+        run = differential.run_pair(differential.round_trip(statechart1), differential.round_trip(statechart2),
+                                    [engine])
+    except Exception:
+        return False
+    return engine in run.errors and get_error(run.errors[engine]) == error
+
+
+def get_error(err):
+    """Returns the type of the error and the place it was raised, which a minimized pair has to reproduce."""
+    frame = traceback.extract_tb(err.__traceback__)[-1]
+    return type(err), frame.filename, frame.lineno
+
+
+def raises(error, statechart1, statechart2):
+    try:
+        differential.run_pair(differential.round_trip(statechart1), differential.round_trip(statechart2), [])
+    except Exception as err:
+        return get_error(err) == error
+    return False
+
+
+def write_fixture(directory, name, seed, index, statechart1, statechart2, is_failing):
+    statechart1, statechart2 = differential.minimize(statechart1, statechart2, is_failing)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for number, statechart in [(1, statechart1), (2, statechart2)]:
+        paths.append(os.path.join(directory, f'{name}-{seed}-{index}-{number}.ysc'))
+        writer.write(statechart, paths[-1], name=f'{name}-{seed}-{index}-{number}')
+    return paths
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures the startup time of every subcommand in fresh interpreters and lists the third-party packages each one
+imports. Commands that read a result file run on the given one, the others only parse --help, which happens after
+their imports.
+
+    python benchmarks/startup.py comparison.result [--runs 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PACKAGES = ['numpy', 'scipy', 'networkx', 'yak_parser', 'tqdm', 'tabulate', 'colorama']
+
+
+def get_commands(result_file):
+    return {
+        'list': ['list', result_file],
+        'matches': ['matches', result_file, '1'],
+        'maxima': ['maxima', result_file],
+        'merge': ['merge', '--help'],
+        'compare': ['compare', '--help'],
+        'serve': ['serve', '--help']
+    }
+
+
+def run(arguments, environment, import_time=False):
+    command = [sys.executable] + (['-X', 'importtime'] if import_time else []) + arguments
+    start = time.perf_counter()
+    process = subprocess.run(command, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                             text=True, check=True)
+    return time.perf_counter() - start, process.stderr
+
+
+def get_imported_packages(import_time_output):
+    packages = set()
+    for line in import_time_output.splitlines():
+        if line.startswith('import time:'):
+            module = line.rsplit('|', 1)[1].strip()
+            packages.add(module.split('.')[0])
+    return [package for package in PACKAGES if package in packages]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the startup time of the subcommands')
+    parser.add_argument('result_file', help='Path of a comparison result file')
+    parser.add_argument('--runs', type=int, default=10, help='Runs per subcommand')
+    arguments = parser.parse_args()
+    environment = dict(os.environ)
+    repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment['PYTHONPATH'] = os.pathsep.join(filter(None, [repository, environment.get('PYTHONPATH')]))
+
+    commands = {'python': ['-c', 'pass']}
+    commands.update((name, ['-m', 'nyc'] + command) for name, command in get_commands(arguments.result_file).items())
+    for name, command in commands.items():
+        _, import_time_output = run(command, environment, import_time=True)
+        times = [run(command, environment)[0] for _ in range(arguments.runs)]
+        print(f'{name:<10}{statistics.median(times) * 1000:>8.1f} ms (min {min(times) * 1000:.1f} ms)  '
+              f'imports: {", ".join(get_imported_packages(import_time_output)) or "-"}')
+
+
+if __name__ == '__main__':
+    main()
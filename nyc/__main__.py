@@ -1,22 +1,19 @@
+"""
+Command line interface. Every subcommand imports the modules it needs itself, so that commands that only read a
+result file, like list, start without loading yak_parser, NetworkX, NumPy or the comparison code.
+"""
+
 import argparse
-import copy
+import csv
 import itertools
 import os
 import pickle
 import sys
 from collections import defaultdict
-from multiprocessing import cpu_count
+from functools import partial
 from typing import Set, Tuple, List, Any, Dict
 
-from colorama import Fore, init
-from tabulate import tabulate
-from tqdm import tqdm
-from tqdm.contrib.concurrent import process_map
-from yak_parser import Statechart
-from yak_parser.StatechartParser import StatechartParser
-
-from nyc import preprocessor
-from nyc.compare_pair import compare_pair
+from nyc.result import StatechartSummary, summarize
 
 
 class Main:
@@ -30,57 +27,307 @@ class Main:
                compare     Compare statecharts
                list        List found cases of plagiarism
                matches     Show matches
+               merge       Merge shard results
+               maxima      Export the highest similarities of every statechart
+               serve       Serve comparisons against a corpus
+               snapshot    Save a preprocessed snapshot of an archive
             '''
         )
-        parser.add_argument('command', help='Subcommand to run', choices=['compare', 'list', 'matches'])
+        parser.add_argument('command', help='Subcommand to run',
+                            choices=['compare', 'list', 'matches', 'merge', 'maxima', 'serve', 'snapshot'])
         args = parser.parse_args(sys.argv[1:2])
         if not hasattr(self, args.command):
             print('Unrecognized command')
             parser.print_help()
             exit(1)
+        from colorama import init
         init(autoreset=True)
         getattr(self, args.command)()
 
     @staticmethod
     def compare():
+        from tqdm import tqdm
+        from nyc import sharding, execution, snapshot, tiling, pipeline, template, edge_memo, domains
+        from nyc.comparator import ENGINES
+        from nyc.compare_pair import compare_pair
+        from nyc.graph import ComparisonGraph
         parser = argparse.ArgumentParser(description='Compare statecharts')
         parser.add_argument('directory', nargs='?', default=os.getcwd(),
                             help='The directory containing the statecharts')
-        named_statecharts = Main.load_statecharts(parser.parse_args(sys.argv[2:]).directory)
+        parser.add_argument('--against', metavar='ARCHIVE',
+                            help='Also compare the statecharts with those of an archive, a snapshot file or a '
+                                 'directory, but not the archive statecharts with each other')
+        parser.add_argument('--shard', type=Main.parse_shard, metavar='i/n',
+                            help='Only compare the i-th of n cost-balanced slices of all pairs (1 <= i <= n)')
+        parser.add_argument('--time-budget', type=float, metavar='SECONDS',
+                            help='Stop comparing a pair after this time and keep the best mapping found so far')
+        parser.add_argument('--step-budget', type=int, metavar='STEPS',
+                            help='Stop comparing a pair after scoring this many mappings or mapping candidates')
+        parser.add_argument('--streaming-loader', action='store_true',
+                            help='Load the statecharts with the streaming loader, which skips the definition section')
+        parser.add_argument('--engine', choices=ENGINES, default='auto',
+                            help='auto: exact search for small statecharts, greedy otherwise; '
+                                 'hierarchical: match region by region, exact for small regions; '
+                                 'ilp: integer program instead of greedy for large statecharts, at most the time '
+                                 'budget or 60 seconds per pair, needs scipy; '
+                                 'beam: beam search instead of greedy for large statecharts, see --beam-width')
+        parser.add_argument('--beam-width', type=int, metavar='W',
+                            help='Partial mappings the beam engine keeps per round; more find better mappings of '
+                                 'large statecharts but take longer (default: chosen from the size of every pair, '
+                                 'at most 16)')
+        parser.add_argument('--strictness', type=int, choices=range(domains.MAX_STRICTNESS + 1), default=0,
+                            help='Which state pairs the exact search leaves out of larger statecharts: 0 only those '
+                                 'no best mapping contains, 1 also final states and choices paired with other kinds, '
+                                 '2 also initial and composite states paired with other kinds and states without a '
+                                 'shared trigger; the higher, the more pairs are searched exactly instead of greedily '
+                                 'but the exact search may miss the best mapping, which marks its results like greedy '
+                                 'ones')
+        parser.add_argument('--pair-workers', type=int, metavar='N',
+                            help='Compare the pairs one after another and split every comparison across N processes, '
+                                 'for few very large statecharts (auto and hierarchical engines without budgets '
+                                 'only)')
+        parser.add_argument('--template', metavar='TEMPLATE',
+                            help='Statechart the compared statecharts were built from, e.g. the starter statechart '
+                                 'of an assignment. Every statechart is matched with it once and only what the '
+                                 'template does not match is compared and scored')
+        parser.add_argument('--tile-size', type=int, metavar='N',
+                            help='Hand out the pairs to the workers in tiles of up to N x N statecharts, whose '
+                                 'comparison graphs are built once per tile (default: at most '
+                                 f'{tiling.MAX_TILE_SIZE}, smaller if there would be too few tiles for the workers)')
+        parser.add_argument('--edge-memo', metavar='PATH',
+                            help='Load the memoized edge group mappings from this file if it exists and save them '
+                                 'there after the run, so later runs reuse them')
+        parser.add_argument('--edge-memo-size', type=int, default=edge_memo.DEFAULT_MAX_ENTRIES, metavar='N',
+                            help='Memoize at most N edge group mappings per worker and in the saved file')
+        parser.add_argument('--verbose', action='store_true',
+                            help='Print how many edge group lookups the memo answered')
+        Main.add_execution_arguments(parser)
+        arguments = parser.parse_args(sys.argv[2:])
+        template_graph = None if arguments.template is None \
+            else template.load(arguments.template, arguments.streaming_loader)
+        memo = edge_memo.load(arguments.edge_memo, arguments.edge_memo_size) \
+            if arguments.edge_memo is not None and os.path.exists(arguments.edge_memo) \
+            else edge_memo.EdgeGroupMemo(arguments.edge_memo_size)
+        compare_tile = partial(edge_memo.compare_tile,
+                               compare_function=partial(tiling.compare_tile, time_budget=arguments.time_budget,
+                                                        step_budget=arguments.step_budget, engine=arguments.engine,
+                                                        beam_width=arguments.beam_width,
+                                                        strictness=arguments.strictness),
+                               max_entries=arguments.edge_memo_size, path=arguments.edge_memo)
+        if arguments.shard is None and arguments.pair_workers is None:
+            # The pipeline loads and compares at the same time; sharding needs the costs of all pairs and pair
+            # workers compare one pair at a time, so they load everything first
+            paths = [path for path in Main.find_statechart_paths(arguments.directory)
+                     if arguments.template is None or not os.path.samefile(path, arguments.template)]
+            archive_statecharts = []
+            statechart_summaries = {}
+            if arguments.against is not None:
+                archive = Main.load_archive(arguments.against, arguments.streaming_loader)
+                path_set = set(paths)
+                archive_statecharts = [(path, statechart) for path, statechart in archive.statecharts
+                                       if path not in path_set]
+                statechart_summaries.update((path, archive.summaries[path]) for path, _ in archive_statecharts)
+                if template_graph is not None:
+                    archive_statecharts = [(path, template.subtract(template_graph, statechart))
+                                           for path, statechart in archive_statecharts]
+            workers, backend = Main.get_execution(arguments)
+            tile_size = arguments.tile_size or tiling.get_tile_size(len(paths) + len(archive_statecharts), workers)
+            with execution.create_executor(backend, workers) as executor:
+                comparison_pipeline = pipeline.Pipeline(
+                    paths, archive_statecharts, tile_size, executor, workers,
+                    partial(pipeline.load_statechart, streaming=arguments.streaming_loader,
+                            template_graph=template_graph),
+                    compare_tile, memo)
+                comparison_result = comparison_pipeline.run(desc='Processing', unit='pairs')
+            statechart_summaries.update(comparison_pipeline.summaries)
+            Main.sort_comparison_result(comparison_result)
+            Main.save_comparison_result((statechart_summaries, comparison_result), 'comparison.result')
+            Main.report_edge_memo(memo, arguments.edge_memo, arguments.verbose)
+            return
+        named_statecharts = [(path, statechart) for path, statechart in
+                             Main.load_statecharts(arguments.directory, arguments.streaming_loader)
+                             if arguments.template is None or not os.path.samefile(path, arguments.template)]
 
-        unprocessed_statechart_and_preprocessing_result_pairs = {}
-        for path, statechart in tqdm(named_statecharts, desc='Preprocessing', unit='statecharts'):
-            unprocessed_statechart_and_preprocessing_result_pairs[path] = \
-                (copy.deepcopy(statechart), preprocessor.process(statechart))
+        statechart_summaries = {path: snapshot.preprocess(statechart) for path, statechart in
+                                tqdm(named_statecharts, desc='Preprocessing', unit='statecharts')}
 
-        pairs = list(itertools.combinations(named_statecharts, 2))
-        comparison_result = process_map(compare_pair, pairs, desc='Processing', unit='pairs',
-                                        max_workers=cpu_count() - 1)
-        comparison_result.sort(
-            key=lambda result: result[2].similarity * result[2].max_similarity * result[2].state_similarity,
-            reverse=True)
-        Main.save_comparison_result((unprocessed_statechart_and_preprocessing_result_pairs, comparison_result))
+        # Pairs of indexes into all statecharts, the statecharts of the directory come first
+        all_statecharts = list(named_statecharts)
+        pairs = list(itertools.combinations(range(len(named_statecharts)), 2))
+        if arguments.against is not None:
+            archive = Main.load_archive(arguments.against, arguments.streaming_loader)
+            archive_statecharts = [(path, statechart) for path, statechart in archive.statecharts
+                                   if path not in statechart_summaries]
+            statechart_summaries.update((path, archive.summaries[path]) for path, _ in archive_statecharts)
+            all_statecharts.extend(archive_statecharts)
+            pairs.extend(itertools.product(range(len(named_statecharts)),
+                                           range(len(named_statecharts), len(all_statecharts))))
+        result_filename = 'comparison.result'
+        if template_graph is not None:
+            all_statecharts = [(path, template.subtract(template_graph, statechart))
+                               for path, statechart in tqdm(all_statecharts, desc='Subtracting the template',
+                                                            unit='statecharts')]
+        if arguments.shard is not None:
+            index, count = arguments.shard
+            graphs = [statechart if isinstance(statechart, ComparisonGraph) else ComparisonGraph(statechart)
+                      for _, statechart in all_statecharts]
+            costs = [sharding.estimate_cost(graphs[index1], graphs[index2], arguments.strictness)
+                     for index1, index2 in tqdm(pairs, desc='Estimating costs', unit='pairs')]
+            pairs = sharding.get_shard(pairs, costs, index, count)
+            result_filename = f'comparison.shard-{index}-of-{count}.result'
+        if arguments.pair_workers is not None:
+            comparison_result = [
+                compare_pair((all_statecharts[index1], all_statecharts[index2]), arguments.time_budget,
+                             arguments.step_budget, arguments.engine, arguments.pair_workers, arguments.beam_width,
+                             arguments.strictness)
+                for index1, index2 in tqdm(pairs, desc='Processing', unit='pairs')
+            ]
+        else:
+            workers, backend = Main.get_execution(arguments)
+            tile_size = arguments.tile_size or tiling.get_tile_size(len(all_statecharts), workers)
+            tiles = tiling.create_tiles(all_statecharts, pairs, tile_size)
+            tile_results = execution.map_items(compare_tile, tiles, backend, workers, desc='Processing', unit='tiles')
+            pair_results = {}
+            for tile, (results, update) in zip(tiles, tile_results):
+                memo.merge(update)
+                pair_results.update(zip(tile.pairs, results))
+            comparison_result = [pair_results[pair] for pair in pairs]
+        Main.sort_comparison_result(comparison_result)
+        Main.save_comparison_result((statechart_summaries, comparison_result), result_filename)
+        if arguments.pair_workers is None:
+            Main.report_edge_memo(memo, arguments.edge_memo, arguments.verbose)
+
+    @staticmethod
+    def report_edge_memo(memo, path, verbose):
+        from nyc import edge_memo
+        if verbose:
+            print(f'Edge group memo: {memo.hits} of {memo.lookups} lookups hit ({memo.hit_rate:.1%}), '
+                  f'{len(memo)} entries')
+        if path is not None:
+            edge_memo.save(memo, path)
+            print(f'Edge group memo saved as {path}')
+
+    @staticmethod
+    def snapshot():
+        from tqdm import tqdm
+        from nyc import snapshot
+        parser = argparse.ArgumentParser(description='Save a preprocessed snapshot of an archive')
+        parser.add_argument('directory', nargs='?', default=os.getcwd(),
+                            help='The directory containing the statecharts of the archive')
+        parser.add_argument('-o', '--output', default='archive.snapshot', help='Path of the snapshot file')
+        parser.add_argument('--streaming-loader', action='store_true',
+                            help='Load the statecharts with the streaming loader, which skips the definition section')
+        arguments = parser.parse_args(sys.argv[2:])
+        named_statecharts = Main.load_statecharts(arguments.directory, arguments.streaming_loader)
+        summaries = {path: snapshot.preprocess(statechart) for path, statechart in
+                     tqdm(named_statecharts, desc='Preprocessing', unit='statecharts')}
+        snapshot.save(snapshot.Snapshot(named_statecharts, summaries), arguments.output)
+        print(f'Snapshot of {len(named_statecharts)} statecharts saved as {arguments.output}')
+
+    @staticmethod
+    def load_archive(archive, streaming=False):
+        """Loads an archive snapshot, or preprocesses the statecharts of an archive directory."""
+        from nyc import snapshot
+        if not os.path.isdir(archive):
+            return snapshot.load(archive)
+        named_statecharts = Main.load_statecharts(archive, streaming)
+        return snapshot.Snapshot(named_statecharts, {path: snapshot.preprocess(statechart)
+                                                     for path, statechart in named_statecharts})
+
+    @staticmethod
+    def merge():
+        parser = argparse.ArgumentParser(description='Merge shard results')
+        parser.add_argument('result_files', nargs='+', help='Paths of the shard result files')
+        parser.add_argument('-o', '--output', default='comparison.result', help='Path of the merged result file')
+        arguments = parser.parse_args(sys.argv[2:])
+        statechart_summaries = {}
+        comparison_result = []
+        compared_pairs = set()
+        for result_file in arguments.result_files:
+            shard_statecharts, shard_comparison_result = Main.load_comparison_result(result_file)
+            statechart_summaries.update(shard_statecharts)
+            for path1, path2, result in shard_comparison_result:
+                if (path1, path2) in compared_pairs:
+                    print(f'Skipped duplicate pair {os.path.basename(path1)}, {os.path.basename(path2)} '
+                          f'in {result_file}')
+                    continue
+                compared_pairs.add((path1, path2))
+                comparison_result.append((path1, path2, result))
+        comparison_result.sort(key=lambda result: (result[0], result[1]))
+        Main.sort_comparison_result(comparison_result)
+        Main.save_comparison_result((statechart_summaries, comparison_result), arguments.output)
+
+    @staticmethod
+    def serve():
+        from tqdm import tqdm
+        from nyc import execution
+        from nyc.service import ComparisonService, create_server
+        parser = argparse.ArgumentParser(description='Serve comparisons against a corpus')
+        parser.add_argument('directory', nargs='?', default=os.getcwd(),
+                            help='The directory containing the statecharts of the corpus')
+        parser.add_argument('--host', default='127.0.0.1', help='Host to listen on')
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+        parser.add_argument('--socket', help='Listen on this Unix socket instead of a port')
+        parser.add_argument('--workers', type=int,
+                            help='Number of worker processes, by default the usable CPUs as limited by CPU affinity, '
+                                 'the cgroup CPU quota and the available memory')
+        parser.add_argument('--worker-memory', type=int, default=execution.DEFAULT_WORKER_MEMORY // 2 ** 20,
+                            metavar='MB', help='Memory to reserve per worker when sizing the pool automatically')
+        parser.add_argument('--time-budget', type=float, metavar='SECONDS',
+                            help='Stop comparing a pair after this time and keep the best mapping found so far')
+        parser.add_argument('--step-budget', type=int, metavar='STEPS',
+                            help='Stop comparing a pair after scoring this many mappings or mapping candidates')
+        parser.add_argument('--streaming-loader', action='store_true',
+                            help='Load the statecharts with the streaming loader, which skips the definition section')
+        arguments = parser.parse_args(sys.argv[2:])
+        workers = arguments.workers or execution.get_default_worker_count(arguments.worker_memory * 2 ** 20)
+        service = ComparisonService(workers, arguments.time_budget, arguments.step_budget)
+        for path, statechart in tqdm(Main.load_statecharts(arguments.directory, arguments.streaming_loader),
+                                     desc='Preprocessing', unit='statecharts'):
+            service.add_statechart(path, statechart)
+        server = create_server(service, arguments.host, arguments.port, arguments.socket)
+        print(f'Serving {len(service.get_paths())} statecharts on '
+              f'{arguments.socket or f"http://{arguments.host}:{arguments.port}"}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.shutdown()
 
     @staticmethod
     def list():
+        from colorama import Fore
+        from tabulate import tabulate
+        from nyc import score_files
         parser = argparse.ArgumentParser(description='List found cases of plagiarism')
         parser.add_argument('result_file', help='Path of the comparison result file')
         parser.add_argument('-threshold', type=float, default=0.8, help='Threshold for average similarity')
         parser.add_argument('-max-threshold', type=float, default=0.8, help='Threshold for maximum similarity')
         parser.add_argument('-state-threshold', type=float, default=0.9, help='Threshold for state similarity')
         arguments = parser.parse_args(sys.argv[2:])
-        _, comparison_result = Main.load_comparison_result(arguments.result_file)
+        columns = score_files.load(arguments.result_file)
+        if columns is None:
+            _, comparison_result = Main.load_comparison_result(arguments.result_file)
+            columns = score_files.create_columns(comparison_result)
+        rows = score_files.filter_rows(columns, arguments.threshold, arguments.max_threshold,
+                                       arguments.state_threshold)
+        paths = columns['paths']
+        # Beam searches are reported with their width and runtime
+        has_beam_search = any(columns['beam_width'][row] > 0 for row in rows)
         table = [
             [
-                (Fore.GREEN + str(i) + Fore.RESET),
-                os.path.basename(path1),
-                os.path.basename(path2),
-                f'{result.similarity:.2%}{"*" if result.is_greedy else ""}',
-                f'{result.max_similarity:.2%}{"*" if result.is_greedy else ""}',
-                f'{result.state_similarity:.2%}{"*" if result.is_greedy else ""}'
-            ]
-            for i, (path1, path2, result) in enumerate(comparison_result, start=1)
-            if result.similarity >= arguments.threshold or result.max_similarity >= arguments.max_threshold or result.state_similarity >= arguments.state_threshold
+                (Fore.GREEN + str(row + 1) + Fore.RESET),
+                os.path.basename(paths[columns['chart1'][row]]),
+                os.path.basename(paths[columns['chart2'][row]]),
+                f'{columns["similarity"][row]:.2%}{marker}',
+                f'{max(columns["single_similarity0"][row], columns["single_similarity1"][row]):.2%}{marker}',
+                f'{columns["state_similarity"][row]:.2%}{marker}'
+            ] + ([columns['beam_width'][row] or '', f'{columns["seconds"][row]:.2f} s'] if has_beam_search else [])
+            for row, marker in zip(rows, [Main.get_markers(columns['flags'][row] & score_files.GREEDY,
+                                                           columns['flags'][row] & score_files.PARTIAL)
+                                          for row in rows])
         ]
         print(
             tabulate(table, headers=[
@@ -90,32 +337,66 @@ class Main:
                 f'Similarity (>={"{:.2%}".format(arguments.threshold)})',
                 f'Maximum single similarity (>={"{:.2%}".format(arguments.max_threshold)})',
                 f'State similarity (>={"{:.2%}".format(arguments.state_threshold)})'
-            ])
+            ] + (['Beam width', 'Time'] if has_beam_search else []))
         )
-        print('*: Greedy algorithm used')
+        print('*: Greedy algorithm used or best mapping possibly missed')
+        print('~: Budget ran out, best mapping found so far')
+
+    @staticmethod
+    def get_markers(is_greedy, is_partial):
+        return f'{"*" if is_greedy else ""}{"~" if is_partial else ""}'
+
+    @staticmethod
+    def maxima():
+        import numpy
+        parser = argparse.ArgumentParser(description='Export the highest similarities of every statechart')
+        parser.add_argument('result_file', help='Path of the comparison result file')
+        parser.add_argument('-o', '--output', help='Path of the CSV file, printed if omitted')
+        arguments = parser.parse_args(sys.argv[2:])
+        score_columns = Main.load_score_columns(arguments.result_file)
+        similarity_maxima, best_rows = score_columns.get_chart_maxima(score_columns.similarity)
+        max_similarity_maxima, _ = score_columns.get_chart_maxima(score_columns.max_similarity)
+        state_similarity_maxima, _ = score_columns.get_chart_maxima(score_columns.state_similarity)
+        chart1 = score_columns.chart1[best_rows]
+        most_similar = numpy.where(chart1 == numpy.arange(len(score_columns.paths)),
+                                   score_columns.chart2[best_rows], chart1)
+        output_file = sys.stdout if arguments.output is None else open(arguments.output, 'w', newline='')
+        writer = csv.writer(output_file)
+        writer.writerow(['File', 'Most similar file', 'Similarity', 'Maximum single similarity', 'State similarity'])
+        for path, best_row, most_similar_chart, similarity, max_similarity, state_similarity in zip(
+                score_columns.paths.tolist(), best_rows.tolist(), most_similar.tolist(), similarity_maxima.tolist(),
+                max_similarity_maxima.tolist(), state_similarity_maxima.tolist()):
+            if best_row >= 0:
+                writer.writerow([path, score_columns.paths[most_similar_chart], f'{similarity:.4f}',
+                                 f'{max_similarity:.4f}', f'{state_similarity:.4f}'])
+        if output_file is not sys.stdout:
+            output_file.close()
+            print(f'Maxima saved as {arguments.output}')
 
     @staticmethod
     def matches():
+        from colorama import Fore
         parser = argparse.ArgumentParser(description='Show matches')
         parser.add_argument('result_file', help='Path of the comparison result file')
         parser.add_argument('id', type=int, help='ID')
         arguments = parser.parse_args(sys.argv[2:])
-        unprocessed_statechart_and_preprocessing_result_pairs, comparison_result = \
-            Main.load_comparison_result(arguments.result_file)
+        statechart_summaries, comparison_result = Main.load_comparison_result(arguments.result_file)
         path1, path2, comparison_result_ = comparison_result[arguments.id - 1]
         print((Fore.GREEN + f'#{arguments.id}'))
         print(f'Statechart 1: {os.path.basename(path1)}')
         print(f'Statechart 2: {os.path.basename(path2)}')
         print(f'Average similarity: {"{:.2%}".format(comparison_result_.similarity)}')
         print(f'Maximum similarity: {"{:.2%}".format(comparison_result_.max_similarity)}')
+        if getattr(comparison_result_, 'beam_width', 0) > 0:
+            print(f'Beam width: {comparison_result_.beam_width}, {comparison_result_.seconds:.2f} s')
         print()
 
         print(('\033[1m' + 'Preprocessing:'))
-        Main.print_preprocessing_results(path1, unprocessed_statechart_and_preprocessing_result_pairs[path1])
-        Main.print_preprocessing_results(path2, unprocessed_statechart_and_preprocessing_result_pairs[path2])
+        statechart1 = Main.get_summary(statechart_summaries[path1])
+        statechart2 = Main.get_summary(statechart_summaries[path2])
+        Main.print_preprocessing_results(path1, statechart1)
+        Main.print_preprocessing_results(path2, statechart2)
 
-        statechart1: Statechart = unprocessed_statechart_and_preprocessing_result_pairs[path1][0]
-        statechart2: Statechart = unprocessed_statechart_and_preprocessing_result_pairs[path2][0]
         print(('\033[1m' + 'Matches:'))
         grouped_matches = Main.group(comparison_result_.diff.matches.items())
         print('\033[3m' + 'States')
@@ -124,10 +405,10 @@ class Main:
         print()
         print('\033[3m' + 'Transitions')
         for (id1, id2), labels in grouped_matches['transition']:
-            transitions1 = [y for x in statechart1.transitions.values() for y in x if y.transition_id == id1][0]
+            transitions1 = statechart1.transitions[id1]
             named_transitions1 = \
                 f'{statechart1.get_name(transitions1.source_id)} -> {statechart1.get_name(transitions1.source_id)}'
-            transitions2 = [y for x in statechart2.transitions.values() for y in x if y.transition_id == id2][0]
+            transitions2 = statechart2.transitions[id2]
             named_transitions2 = \
                 f'{statechart2.get_name(transitions2.source_id)} -> {statechart2.get_name(transitions2.source_id)}'
             print(f'{named_transitions1} = {named_transitions2}: {labels}')
@@ -174,7 +455,7 @@ class Main:
         print()
         print('\033[3m' + 'Transitions')
         for id_, labels in grouped_something['transition']:
-            transitions = [y for x in statechart.transitions.values() for y in x if y.transition_id == id_][0]
+            transitions = statechart.transitions[id_]
             named_transitions = \
                 f'{statechart.get_name(transitions.source_id)} -> {statechart.get_name(transitions.target_id)}'
             print(f'{named_transitions}: {labels}')
@@ -199,27 +480,78 @@ class Main:
             return False
 
     @staticmethod
-    def load_statecharts(directory):
+    def find_statechart_paths(directory):
         statechart_paths = set()
         for root, _, files in os.walk(directory):
             [statechart_paths.add(os.path.join(root, file)) for file in files if
              os.path.splitext(file)[1] in ['.ysc', '.sct']]
+        return sorted(statechart_paths)
+
+    @staticmethod
+    def load_statecharts(directory, streaming=False):
+        from yak_parser.StatechartParser import StatechartParser
+        from nyc import loader
         statecharts_with_path = []
-        for statechart_path in statechart_paths:
+        for statechart_path in Main.find_statechart_paths(directory):
             try:
-                statecharts_with_path.append((statechart_path, StatechartParser().parse(path=statechart_path)))
+                statechart = loader.load(statechart_path) if streaming \
+                    else StatechartParser().parse(path=statechart_path)
+                statecharts_with_path.append((statechart_path, statechart))
             except ValueError as err:
                 print(f'Skipped {statechart_path}: {err}')
         return statecharts_with_path
 
     @staticmethod
-    def save_comparison_result(comparison_result):
-        result_filename = 'comparison.result'
+    def parse_shard(value):
+        from nyc import sharding
+        try:
+            return sharding.parse_shard(value)
+        except ValueError as err:
+            raise argparse.ArgumentTypeError(str(err))
+
+    @staticmethod
+    def add_execution_arguments(parser):
+        from nyc import execution
+        parser.add_argument('--workers', type=int,
+                            help='Number of workers, by default the usable CPUs as limited by CPU affinity, '
+                                 'the cgroup CPU quota and the available memory')
+        parser.add_argument('--backend', choices=execution.BACKENDS,
+                            help='serial: compare in this process, e.g. for profiling; thread: thread pool; '
+                                 'process: process pool (default with more than one worker)')
+        parser.add_argument('--worker-memory', type=int, default=execution.DEFAULT_WORKER_MEMORY // 2 ** 20,
+                            metavar='MB', help='Memory to reserve per worker when sizing the pool automatically')
+
+    @staticmethod
+    def get_execution(arguments) -> Tuple[int, str]:
+        """Returns the number of workers and the backend of the parsed execution arguments."""
+        from nyc import execution
+        workers = arguments.workers or execution.get_default_worker_count(arguments.worker_memory * 2 ** 20)
+        return workers, arguments.backend or execution.get_default_backend(workers)
+
+    @staticmethod
+    def sort_comparison_result(comparison_result):
+        comparison_result.sort(
+            key=lambda result: result[2].similarity * result[2].max_similarity * result[2].state_similarity,
+            reverse=True)
+
+    @staticmethod
+    def save_comparison_result(comparison_result, result_filename='comparison.result'):
+        from nyc import scores
         result_file = open(result_filename, 'wb')
         pickle.dump(comparison_result, result_file)
         result_file.close()
+        scores.save(scores.create_score_columns(comparison_result[1]), result_filename)
         print(f'Result saved as {result_filename}')
 
+    @staticmethod
+    def load_score_columns(path):
+        from nyc import scores
+        score_columns = scores.load(path)
+        if score_columns is None:
+            _, comparison_result = Main.load_comparison_result(path)
+            score_columns = scores.create_score_columns(comparison_result)
+        return score_columns
+
     @staticmethod
     def load_comparison_result(path):
         result_file = open(path, 'rb')
@@ -228,15 +560,23 @@ class Main:
         return comparison_result
 
     @staticmethod
-    def print_preprocessing_results(path, unprocessed_statechart_and_processing_result):
-        processing_result = unprocessed_statechart_and_processing_result[1]
-        unreachable_states = processing_result.unreachable_states
-        removed_nesting_states = processing_result.removed_nesting_states
-        removed_duplicate_transitions = processing_result.removed_duplicate_transitions
+    def get_summary(statechart_summary) -> StatechartSummary:
+        """Result files of earlier versions contain the unprocessed statechart and the preprocessing result."""
+        if not isinstance(statechart_summary, tuple):
+            return statechart_summary
+        statechart, preprocessing_result = statechart_summary
+        summary = summarize(statechart)
+        summary.set_preprocessing_result(preprocessing_result)
+        return summary
+
+    @staticmethod
+    def print_preprocessing_results(path, statechart: StatechartSummary):
+        unreachable_states = statechart.unreachable_states
+        removed_nesting_states = statechart.removed_nesting_states
+        removed_duplicate_transitions = statechart.removed_duplicate_transitions
         if len(unreachable_states) + len(removed_nesting_states) + len(removed_duplicate_transitions) != 0:
             print('\033[3m' + f'{os.path.basename(path)}:')
 
-            statechart: Statechart = unprocessed_statechart_and_processing_result[0]
             if len(unreachable_states) != 0:
                 print('Removed unreachable states')
                 print([statechart.get_name(state) for state in unreachable_states])
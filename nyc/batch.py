@@ -0,0 +1,185 @@
+"""
+Batched evaluation of state mappings for the exact search. Mappings are enumerated in blocks of integer arrays in
+the order of iterate_mappings, a row maps every state of the first graph to a state of the second graph or to -1.
+The state matches of a block are gathered from the state overlap matrix and the edge group matches from a table of
+the best match count of every pair of edge groups, so thousands of mappings are scored by a few NumPy operations.
+With candidate domains, only the mappings within them are enumerated, in another order; ties are still broken like
+in the order of iterate_mappings.
+"""
+
+import itertools
+import math
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Callable
+
+import numpy
+
+from nyc.budget import Budget
+
+BLOCK_SIZE = 16384
+
+
+def iterate_mapping_blocks(state_count1: int, state_count2: int, block_size: int = BLOCK_SIZE) \
+        -> Iterator[numpy.ndarray]:
+    """
+    Yields the state mappings of iterate_mappings(range(state_count1), range(state_count2)) in the same order, as
+    blocks of rows that contain the mapped state of every state of the first graph or -1.
+    """
+    element_count = min(state_count1, state_count2)
+    combinations = create_array(itertools.combinations(range(state_count2), element_count), element_count)
+    # The last states of a permutation are enumerated by one array of index patterns per prefix, as long as a block
+    # stays below the block size
+    suffix_length = 0
+    while suffix_length < element_count and len(combinations) * math.perm(
+            state_count1 - element_count + suffix_length + 1, suffix_length + 1) <= block_size:
+        suffix_length += 1
+    patterns = create_array(itertools.permutations(range(state_count1 - element_count + suffix_length), suffix_length),
+                            suffix_length)
+    pattern_rows = numpy.arange(len(patterns))[:, None]
+    for prefix in itertools.permutations(range(state_count1), element_count - suffix_length):
+        remaining_states = numpy.array([state for state in range(state_count1) if state not in prefix],
+                                       dtype=numpy.int64)
+        permutations = numpy.concatenate(
+            (numpy.broadcast_to(numpy.array(prefix, dtype=numpy.int64), (len(patterns), len(prefix))),
+             remaining_states[patterns]), axis=1)
+        block = numpy.full((len(patterns), state_count1, len(combinations)), -1, dtype=numpy.int64)
+        block[pattern_rows, permutations, :] = combinations.T
+        yield block.transpose(0, 2, 1).reshape(len(patterns) * len(combinations), state_count1)
+
+
+def iterate_domain_blocks(allowed: numpy.ndarray, block_size: int = BLOCK_SIZE, prefix: Sequence[int] = ()) \
+        -> Iterator[numpy.ndarray]:
+    """
+    Yields the state mappings of iterate_mapping_blocks that only contain allowed state pairs. The states of the first
+    graph are mapped one after another, and the rows are split into blocks whenever there are too many. The prefix
+    fixes the states the first states of the first graph are mapped to, -1 leaves a state unmapped.
+    """
+    state_count1, state_count2 = allowed.shape
+    candidates = [numpy.flatnonzero(allowed[state1]) for state1 in range(state_count1)]
+    row = numpy.full((1, state_count1), -1, dtype=numpy.int64)
+    row[0, :len(prefix)] = prefix
+    # Used states of the second graph as bit masks, states of the first graph are only left unmapped if it is larger
+    used_states = numpy.array([sum(1 << state2 for state2 in prefix if state2 >= 0)], dtype=numpy.int64)
+    unmapped_counts = numpy.array([sum(1 for state2 in prefix if state2 < 0)], dtype=numpy.int64)
+    return extend_rows(row, used_states, unmapped_counts, len(prefix), candidates,
+                       max(0, state_count1 - state_count2), block_size)
+
+
+def extend_rows(rows: numpy.ndarray, used_states: numpy.ndarray, unmapped_counts: numpy.ndarray, state1: int,
+                candidates: List[numpy.ndarray], max_unmapped_count: int, block_size: int) -> Iterator[numpy.ndarray]:
+    if len(rows) == 0:
+        return
+    if state1 == len(candidates):
+        yield rows
+        return
+    parts = []
+    for state2 in candidates[state1].tolist():
+        is_free = (used_states & (1 << state2)) == 0
+        part = rows[is_free]
+        part[:, state1] = state2
+        parts.append((part, used_states[is_free] | (1 << state2), unmapped_counts[is_free]))
+    can_skip = unmapped_counts < max_unmapped_count
+    parts.append((rows[can_skip], used_states[can_skip], unmapped_counts[can_skip] + 1))
+    rows, used_states, unmapped_counts = (numpy.concatenate(arrays) for arrays in zip(*parts))
+    for start in range(0, len(rows), block_size):
+        end = start + block_size
+        yield from extend_rows(rows[start:end], used_states[start:end], unmapped_counts[start:end], state1 + 1,
+                               candidates, max_unmapped_count, block_size)
+
+
+def get_order_keys(rows: numpy.ndarray, state_count2: int) -> numpy.ndarray:
+    """
+    Returns a key of every state mapping whose lexicographic order is the order of iterate_mappings: the mapped
+    states of the first graph ordered by the states they are mapped to, followed by those states.
+    """
+    element_count = min(rows.shape[1], state_count2)
+    permutations = numpy.argsort(numpy.where(rows < 0, state_count2, rows), axis=1, kind='stable')[:, :element_count]
+    return numpy.concatenate((permutations, numpy.take_along_axis(rows, permutations, axis=1)), axis=1)
+
+
+def create_array(tuples: Iterator[Tuple[int, ...]], length: int) -> numpy.ndarray:
+    """Converts tuples of the given length to the rows of an array, also if the length is 0."""
+    rows = list(tuples)
+    return numpy.array(rows, dtype=numpy.int64).reshape(len(rows), length)
+
+
+class BlockScorer:
+    """Scores blocks of state mappings like Comparator.get_state_mapping_score."""
+
+    def __init__(self, state_overlaps: numpy.ndarray, grouped_edges1: Dict[Tuple[int, int], Tuple[int, ...]],
+                 grouped_edges2: Dict[Tuple[int, int], Tuple[int, ...]],
+                 get_group_score: Callable[[Tuple[int, ...], Tuple[int, ...]], int]):
+        state_count1, state_count2 = state_overlaps.shape
+        self.states = numpy.arange(state_count1)
+        # The last column belongs to unmapped states, which index it with -1
+        self.state_overlaps = numpy.zeros((state_count1, state_count2 + 1), dtype=numpy.int64)
+        self.state_overlaps[:, :state_count2] = state_overlaps
+        self.group_sources = numpy.array([source for source, _ in grouped_edges1], dtype=numpy.int64)
+        self.group_targets = numpy.array([target for _, target in grouped_edges1], dtype=numpy.int64)
+        self.groups = numpy.arange(len(grouped_edges1))
+        self.group_lookup = numpy.full((state_count2 + 1, state_count2 + 1), -1, dtype=numpy.int64)
+        self.group_scores = numpy.zeros((len(grouped_edges1), len(grouped_edges2) + 1), dtype=numpy.int64)
+        for group2, ((source2, target2), edges2) in enumerate(grouped_edges2.items()):
+            self.group_lookup[source2, target2] = group2
+            for group1, ((source1, target1), edges1) in enumerate(grouped_edges1.items()):
+                # Only loops are mapped to loops
+                if (source1 == target1) == (source2 == target2):
+                    self.group_scores[group1, group2] = get_group_score(edges1, edges2)
+
+    def score(self, block: numpy.ndarray) -> numpy.ndarray:
+        scores = self.state_overlaps[self.states, block].sum(axis=1)
+        if len(self.groups) > 0:
+            groups2 = self.group_lookup[block[:, self.group_sources], block[:, self.group_targets]]
+            scores += self.group_scores[self.groups, groups2].sum(axis=1)
+        return scores
+
+
+def get_best_state_mapping(scorer: BlockScorer, tie_break: numpy.ndarray, state_count2: int,
+                           budget: Optional[Budget] = None, allowed: Optional[numpy.ndarray] = None) \
+        -> Tuple[Dict[int, int], int]:
+    """
+    Returns the state mapping with the most matches and its match count. Of the mappings with the most matches, the
+    first one with the highest tie-break score is returned, like the serial exact search. The budget counts one step
+    per mapping, so an exhausted budget stops at the same mapping as the serial search. With a matrix of the allowed
+    state pairs, only the mappings within these domains are searched.
+    """
+    state_count1 = len(tie_break)
+    blocks = iterate_mapping_blocks(state_count1, state_count2) if allowed is None else iterate_domain_blocks(allowed)
+    best_state_mapping, best_score, _, _ = search_blocks(scorer, tie_break, state_count2, blocks, budget)
+    return best_state_mapping, best_score
+
+
+def search_blocks(scorer: BlockScorer, tie_break: numpy.ndarray, state_count2: int, blocks: Iterator[numpy.ndarray],
+                  budget: Optional[Budget] = None) -> Optional[Tuple[Dict[int, int], int, int, Tuple[int, ...]]]:
+    """
+    Returns the best state mapping of the blocks like get_best_state_mapping, its match count, tie-break score and
+    order key, or None if there are no mappings. Results of different blocks are merged by comparing these.
+    """
+    state_count1 = len(tie_break)
+    padded_tie_break = numpy.zeros((state_count1, state_count2 + 1), dtype=numpy.int64)
+    padded_tie_break[:, :state_count2] = tie_break
+    states = numpy.arange(state_count1)
+    best_row, best_score, best_tie_break_score, best_order_key = None, None, None, None
+    for block in blocks:
+        if budget is not None and budget.steps is not None:
+            block = block[:max(1, budget.steps - budget.used_steps)]
+        scores = scorer.score(block)
+        block_score = int(scores.max())
+        if best_score is None or block_score >= best_score:
+            candidates = block[scores == block_score]
+            tie_break_scores = padded_tie_break[states, candidates].sum(axis=1)
+            tie_break_score = int(tie_break_scores.max())
+            candidates = candidates[tie_break_scores == tie_break_score]
+            order_keys = get_order_keys(candidates, state_count2)
+            # Without states to map there is a single, empty mapping
+            candidate = int(numpy.lexsort(order_keys.T[::-1])[0]) if order_keys.shape[1] > 0 else 0
+            order_key = tuple(order_keys[candidate].tolist())
+            if best_score is None or block_score > best_score or tie_break_score > best_tie_break_score or \
+                    tie_break_score == best_tie_break_score and order_key < best_order_key:
+                best_row = candidates[candidate]
+                best_score, best_tie_break_score, best_order_key = block_score, tie_break_score, order_key
+        if budget is not None and budget.step(len(block)):
+            break
+    if best_row is None:
+        return None
+    best_state_mapping = {state1: int(state2) for state1, state2 in enumerate(best_row.tolist()) if state2 >= 0}
+    return best_state_mapping, best_score, best_tie_break_score, best_order_key
@@ -0,0 +1,164 @@
+"""
+Beam search state matcher, between the greedy matcher and the exact search. Like the greedy matcher it maps one
+state pair per round, but it keeps the best `width` partial mappings instead of one: every round extends each of
+them by its best `width` candidate pairs and keeps the best `width` different extensions. Partial mappings are
+ranked by their match count and then by the look-ahead score of their state pairs, the order the greedy matcher
+picks its pairs in, so a width of 1 takes the greedy steps. The extension the greedy matcher would pick is always
+kept, so the greedy mapping is among the complete mappings the best one is chosen from. Every partial mapping has
+its own candidate queue, which is only copied for the extensions that are kept.
+"""
+
+import heapq
+from typing import Dict, FrozenSet, List, Tuple, Optional
+
+from nyc.budget import Budget
+from nyc.greedy import GreedyMatcher
+
+MAX_WIDTH = 16
+# Candidate queue entries the search copies and scores for all widths together, about 2 seconds
+AUTO_WIDTH_COST = 2 * 10 ** 6
+
+
+def get_auto_width(state_count1: int, state_count2: int) -> int:
+    """
+    Returns the width for a pair of statecharts. Every partial mapping copies and rescores a queue of up to
+    state_count1 * state_count2 candidates per round, so the width shrinks with the cube of the size.
+    """
+    cost_per_width = state_count1 * state_count2 * min(state_count1, state_count2)
+    return max(1, min(MAX_WIDTH, AUTO_WIDTH_COST // max(1, cost_per_width)))
+
+
+class PartialMapping:
+    def __init__(self):
+        self.state_mapping: Dict[int, int] = {}
+        self.inverse_state_mapping: Dict[int, int] = {}
+        self.edge_mapping: Dict[int, int] = {}
+        self.match_count = 0
+        self.look_ahead = 0
+        # Candidate scores and queue like in GreedyMatcher.get_best_mapping
+        self.scores: Dict[Tuple[int, int], Tuple[int, Dict[int, int]]] = {}
+        self.queue: List = []
+        self.is_greedy = True
+
+    def copy(self) -> 'PartialMapping':
+        partial_mapping = PartialMapping()
+        partial_mapping.state_mapping = self.state_mapping.copy()
+        partial_mapping.inverse_state_mapping = self.inverse_state_mapping.copy()
+        partial_mapping.edge_mapping = self.edge_mapping.copy()
+        partial_mapping.match_count = self.match_count
+        partial_mapping.look_ahead = self.look_ahead
+        partial_mapping.scores = self.scores.copy()
+        partial_mapping.queue = self.queue.copy()
+        return partial_mapping
+
+
+class Extension:
+    """A partial mapping of the beam and one of its best candidates, the order-th best one."""
+
+    def __init__(self, partial_mapping: PartialMapping, order: int, score: int, look_ahead: int,
+                 mapping_element: Tuple[int, int]):
+        self.partial_mapping = partial_mapping
+        self.order = order
+        self.mapping_element = mapping_element
+        self.rank = partial_mapping.match_count + score, partial_mapping.look_ahead + look_ahead
+        # The greedy matcher takes the best candidate of the greedy partial mapping
+        self.is_greedy = partial_mapping.is_greedy and order == 0
+
+    def get_state_mapping(self) -> FrozenSet[Tuple[int, int]]:
+        return frozenset(self.partial_mapping.state_mapping.items()) | {self.mapping_element}
+
+
+class BeamMatcher(GreedyMatcher):
+    def __init__(self, *args, width: int = 1, **kwargs):
+        """Takes the arguments of GreedyMatcher and the number of partial mappings to keep."""
+        super().__init__(*args, **kwargs)
+        self.width = width
+
+    def get_best_mapping(self, budget: Optional[Budget] = None, pool=None) \
+            -> Tuple[Tuple[Dict[int, int], Dict[int, int]], int]:
+        """
+        Returns the state and edge mapping with the most matches the search found and its match count. An exhausted
+        budget stops after the current round and returns the best partial mapping, the first round is always
+        completed.
+        """
+        root = PartialMapping()
+        candidates = [(state1, state2) for state1 in self.states1 for state2 in self.states2]
+        self.push_candidates(root.queue, root.scores, candidates, {}, {}, pool)
+        if budget is not None:
+            budget.step(len(candidates))
+        beam = [root]
+        for _ in range(min(len(self.states1), len(self.states2))):
+            extensions = [Extension(partial_mapping, order, score, look_ahead, mapping_element)
+                          for partial_mapping in beam
+                          for order, (score, look_ahead, mapping_element) in
+                          enumerate(self.get_best_candidates(partial_mapping))]
+            # Stable, so equal ranks keep the order of the beam and of the queues
+            extensions.sort(key=lambda extension: extension.rank, reverse=True)
+            beam = [self.extend(extension, budget, pool) for extension in self.select_extensions(extensions)]
+            if budget is not None and budget.is_exhausted():
+                break
+        best = max(beam, key=lambda partial_mapping: (partial_mapping.match_count, partial_mapping.look_ahead))
+        return (best.state_mapping, best.edge_mapping), best.match_count
+
+    def get_best_candidates(self, partial_mapping: PartialMapping) -> List[Tuple[int, int, Tuple[int, int]]]:
+        """
+        Returns the score, look-ahead score and state pair of the best candidates of the partial mapping in queue
+        order. Outdated queue entries are dropped, the returned ones stay in the queue.
+        """
+        queue = partial_mapping.queue
+        best_entries = []
+        while queue and len(best_entries) < self.width:
+            entry = heapq.heappop(queue)
+            negative_score, _, state1, state2, mapping_element = entry
+            if state1 in partial_mapping.state_mapping or state2 in partial_mapping.inverse_state_mapping or \
+                    partial_mapping.scores[mapping_element][0] != -negative_score:
+                continue
+            best_entries.append(entry)
+        for entry in best_entries:
+            heapq.heappush(queue, entry)
+        return [(-negative_score, -negative_look_ahead, mapping_element)
+                for negative_score, negative_look_ahead, _, _, mapping_element in best_entries]
+
+    def select_extensions(self, extensions: List[Extension]) -> List[Extension]:
+        """
+        Returns the best extensions that lead to different state mappings, at most width of them. The greedy
+        extension replaces the last one if it is not among them.
+        """
+        selected_extensions: Dict[FrozenSet[Tuple[int, int]], Extension] = {}
+        has_greedy_extension = False
+        for extension in extensions:
+            state_mapping = extension.get_state_mapping()
+            selected_extension = selected_extensions.get(state_mapping)
+            if selected_extension is not None:
+                # The same state mapping reached in another order continues the greedy partial mapping
+                selected_extension.is_greedy = selected_extension.is_greedy or extension.is_greedy
+                has_greedy_extension = has_greedy_extension or extension.is_greedy
+            elif len(selected_extensions) < self.width:
+                selected_extensions[state_mapping] = extension
+                has_greedy_extension = has_greedy_extension or extension.is_greedy
+            elif extension.is_greedy:
+                selected_extensions.popitem()
+                selected_extensions[state_mapping] = extension
+                has_greedy_extension = True
+            if has_greedy_extension and len(selected_extensions) == self.width:
+                break
+        return list(selected_extensions.values())
+
+    def extend(self, extension: Extension, budget: Optional[Budget], pool=None) -> PartialMapping:
+        """Returns a copy of the partial mapping of the extension with its state pair added and rescored."""
+        partial_mapping = extension.partial_mapping.copy()
+        partial_mapping.is_greedy = extension.is_greedy
+        state1, state2 = extension.mapping_element
+        score, edge_mapping = partial_mapping.scores[extension.mapping_element]
+        partial_mapping.match_count += score
+        partial_mapping.look_ahead += self.look_ahead[state1][state2]
+        partial_mapping.state_mapping[state1] = state2
+        partial_mapping.inverse_state_mapping[state2] = state1
+        partial_mapping.edge_mapping.update(edge_mapping)
+        affected_candidates = self.get_affected_candidates(extension.mapping_element, partial_mapping.state_mapping,
+                                                           partial_mapping.inverse_state_mapping)
+        self.push_candidates(partial_mapping.queue, partial_mapping.scores, affected_candidates,
+                             partial_mapping.state_mapping, partial_mapping.inverse_state_mapping, pool)
+        if budget is not None:
+            budget.step(len(affected_candidates))
+        return partial_mapping
@@ -0,0 +1,25 @@
+import time
+from typing import Optional
+
+
+class Budget:
+    """
+    Time and step limit of a single comparison. The clock starts when the budget is created,
+    a step is one scored mapping or mapping candidate, or one branch-and-bound node of the integer program.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, steps: Optional[int] = None):
+        self.seconds = seconds
+        self.steps = steps
+        self.used_steps = 0
+        self.deadline = None if seconds is None else time.monotonic() + seconds
+
+    def step(self, count: int = 1) -> bool:
+        """Consumes steps and returns whether the budget is exhausted."""
+        self.used_steps += count
+        return self.is_exhausted()
+
+    def is_exhausted(self) -> bool:
+        if self.steps is not None and self.used_steps >= self.steps:
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
@@ -1,388 +1,349 @@
 import itertools
-from collections import defaultdict, Collection
-from typing import List, Tuple, Any, Set, Dict, Iterator
-
-import networkx
-from yak_parser.Statechart import Statechart, NodeType, ScHistoryType
-
-
-class Diff:
-    def __init__(self, matches: Dict[Tuple[Any, Any], Set[str]], additions: Dict[Any, Set[str]],
-                 deletions: Dict[Any, Set[str]]):
-        self.matches = matches
-        self.additions = additions
-        self.deletions = deletions
-
-    def __eq__(self, other) -> bool:
-        return self.matches == other.matches and \
-               self.additions == other.additions and \
-               self.deletions == other.deletions
-
-
-class ComparisonResult:
-    def __init__(self, diff: Diff, similarity_: float, single_similarity0: float, single_similarity1: float,
-                 state_similarity: float, is_greedy: bool):
-        self.diff = diff
-        self.similarity = similarity_
-        self.single_similarity0 = single_similarity0
-        self.single_similarity1 = single_similarity1
-        self.state_similarity = state_similarity
-        self.is_greedy = is_greedy
-
-    @property
-    def max_similarity(self) -> float:
-        return max(self.single_similarity0, self.single_similarity1)
+import math
+import time
+from functools import partial
+from typing import List, Tuple, Any, Set, Dict, Iterator, Optional, Union
+
+import numpy
+from yak_parser.Statechart import Statechart
+
+from nyc import domains
+from nyc.batch import BlockScorer, get_best_state_mapping, BLOCK_SIZE
+from nyc.beam import BeamMatcher, get_auto_width
+from nyc.budget import Budget
+from nyc.edge_memo import EdgeGroupMemo, match_edge_groups
+from nyc.graph import ComparisonGraph, LabelOverlaps, get_tie_break_overlaps
+from nyc.greedy import GreedyMatcher, StateIndex
+from nyc.hierarchical import HierarchicalMatcher
+from nyc.mappings import get_mappings, get_best_edge_mapping, get_greedy_edge_mapping, EdgeMatchFunction
+from nyc.parallel import PairPool
+from nyc.result import Diff, ComparisonResult
+
+Mapping = Tuple[Dict[int, int], Dict[int, int]]
+ENGINES = ['auto', 'hierarchical', 'ilp', 'beam']
+MAX_EXACT_STATES = 10
+MAX_EXACT_DEGREE = 10
+# Larger statecharts are searched exactly if they have at most this many mappings, within their candidate domains
+MAX_EXACT_MAPPINGS = math.factorial(MAX_EXACT_STATES)
+MAX_DOMAIN_STATES = 16
 
 
 class Comparator:
-    def __init__(self, statechart1: Statechart, statechart2: Statechart):
-        self.statechart1 = statechart1
-        self.statechart2 = statechart2
-        self.graph1 = create_comparison_graph(statechart1)
-        self.graph2 = create_comparison_graph(statechart2)
-        self.states1 = get_states(self.graph1)
-        self.states2 = get_states(self.graph2)
-        self.edges1 = get_edges(self.graph1)
-        self.edges2 = get_edges(self.graph2)
-        self.grouped_edges1 = group_edges(self.graph1, self.edges1)
-        self.grouped_edges2 = group_edges(self.graph2, self.edges2)
-        self.labeled_nodes1 = get_labeled_nodes(self.graph1)
-        self.labeled_nodes2 = get_labeled_nodes(self.graph2)
-        self.mapping_to_matches_cache = {}
-
-    def compare(self) -> ComparisonResult:
-        max_degree1 = 0 if self.grouped_edges1 == {} else \
-            max((len(transitions) for state_pair, transitions in self.grouped_edges1.items()))
-        max_degree2 = 0 if self.grouped_edges2 == {} else \
-            max((len(transitions) for state_pair, transitions in self.grouped_edges2.items()))
-        is_greedy = max(len(self.states1), len(self.states2), max_degree1, max_degree2) > 10
-        if is_greedy:
-            best_mapping, score = self.get_best_mapping_greedy()
+    """
+    Compares two statecharts on their comparison graphs. Mappings are pairs of a state mapping and an edge mapping
+    between the integer ids of the graphs, statechart ids are only used in the results.
+    """
+
+    def __init__(self, statechart1: Union[Statechart, ComparisonGraph],
+                 statechart2: Union[Statechart, ComparisonGraph], memo: Optional[EdgeGroupMemo] = None,
+                 strictness: int = 0):
+        self.comparison_graph1 = statechart1 if isinstance(statechart1, ComparisonGraph) \
+            else ComparisonGraph(statechart1)
+        self.comparison_graph2 = statechart2 if isinstance(statechart2, ComparisonGraph) \
+            else ComparisonGraph(statechart2)
+        self.overlaps = LabelOverlaps(self.comparison_graph1, self.comparison_graph2)
+        self.state_overlaps: List[List[int]] = self.overlaps.states.tolist()
+        self.edge_overlaps: List[List[int]] = self.overlaps.edges.tolist()
+        self.grouped_edges1 = self.comparison_graph1.get_grouped_edges()
+        self.grouped_edges2 = self.comparison_graph2.get_grouped_edges()
+        self.edge_group_results: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], Tuple[Dict[int, int], int]] = {}
+        self.tie_break_array: Optional[numpy.ndarray] = None
+        self.tie_break: Optional[List[List[int]]] = None
+        self.memo = memo
+        self.strictness = strictness
+        self.domains: Optional[numpy.ndarray] = None
+        self.domain_mapping_count = 0
+        self.has_domains = False
+
+    def compare(self, budget: Optional[Budget] = None, engine: str = 'auto', workers: int = 1,
+                beam_width: Optional[int] = None) -> ComparisonResult:
+        """
+        Compares the statecharts. The auto engine searches all mappings exactly if the statecharts are small and
+        uses the greedy algorithm otherwise, the hierarchical engine matches region by region. The ilp engine solves
+        the mappings of statecharts that are too large for the exact search as an integer program; if the solver
+        stops before it proves its mapping optimal, the result is partial, keeps the better of its mapping and the
+        greedy one and reports the optimality gap. The beam engine searches the mappings of statecharts that are too
+        large for the exact search with a beam of the given width, by default one that fits the size of the pair.
+        If a budget is given and runs out, the best mapping found so far is used and the result is marked as
+        partial. An exhausted exact search falls back to the greedy algorithm, which is cheap for the small
+        statecharts the exact search is used for. Exact searches within candidate domains of a strictness above 0 may
+        miss the best mapping and are marked as greedy, like the other approximate results.
+        With more than one worker, the auto and the hierarchical engine split the search across a process pool and
+        return the same result. Budgets are not shared between processes, so budgeted comparisons always run
+        serially, and so do exact searches of statecharts that are only small enough within their candidate domains.
+        """
+        start = time.perf_counter()
+        gap = 0.0
+        used_beam_width = 0
+        if engine == 'beam' and self.uses_greedy():
+            used_beam_width = beam_width or get_auto_width(self.comparison_graph1.state_count,
+                                                           self.comparison_graph2.state_count)
+            best_mapping, score = self.get_best_mapping_beam(used_beam_width, budget)
+            is_greedy = True
+            is_partial = budget is not None and budget.is_exhausted()
+        elif engine == 'hierarchical':
+            if workers > 1 and budget is None:
+                with PairPool(self, workers) as pool:
+                    best_mapping, score, is_greedy = self.get_best_mapping_hierarchical(pool=pool)
+            else:
+                best_mapping, score, is_greedy = self.get_best_mapping_hierarchical(budget)
+            is_partial = budget is not None and budget.is_exhausted()
+        elif engine == 'ilp' and self.uses_greedy():
+            best_mapping, score, upper_bound = self.get_best_mapping_ilp(budget)
+            is_greedy = False
+            is_partial = score < upper_bound
+            if is_partial:
+                greedy_mapping, greedy_score = self.get_best_mapping_greedy()
+                if greedy_score > score:
+                    best_mapping, score, is_greedy = greedy_mapping, greedy_score, True
+                gap = (upper_bound - score) / upper_bound
+        elif workers > 1 and budget is None and (self.uses_greedy() or max(
+                self.comparison_graph1.state_count, self.comparison_graph2.state_count) <= MAX_EXACT_STATES):
+            is_greedy = self.uses_greedy()
+            is_partial = False
+            if not is_greedy:
+                # The workers get the domains with their copy of the comparator
+                self.get_domains()
+            with PairPool(self, workers) as pool:
+                if is_greedy:
+                    best_mapping, score = self.get_best_mapping_greedy(pool=pool)
+                else:
+                    best_state_mapping, score = pool.get_best_state_mapping_exact()
+                    best_mapping = best_state_mapping, self.get_edge_mapping(best_state_mapping)
+                    is_greedy = self.has_strict_domains()
         else:
-            mappings = self.get_statechart_mappings()
-            best_mappings, score = maxima(mappings, key=lambda mapping: len(self.get_matches(mapping)))
-
-            if len(best_mappings) > 1:
-                tie_break_graph1 = create_tie_break_comparison_graph(self.statechart1)
-                tie_break_graph2 = create_tie_break_comparison_graph(self.statechart2)
-                best_mapping = \
-                    maxima(best_mappings,
-                           key=lambda mapping: len(get_matches(tie_break_graph1, tie_break_graph2, mapping)))[0][0]
+            is_greedy = self.uses_greedy()
+            is_partial = False
+            if is_greedy:
+                best_mapping, score = self.get_best_mapping_greedy(budget)
+                is_partial = budget is not None and budget.is_exhausted()
             else:
-                best_mapping = best_mappings[0]
-
+                best_mapping, score = self.get_best_mapping_exact(budget)
+                is_greedy = self.has_strict_domains()
+                if budget is not None and budget.is_exhausted():
+                    is_partial = True
+                    greedy_mapping, greedy_score = self.get_best_mapping_greedy()
+                    if greedy_score > score:
+                        best_mapping, score, is_greedy = greedy_mapping, greedy_score, True
+        result = self.create_result(best_mapping, score, is_greedy, is_partial, gap)
+        result.beam_width = used_beam_width
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def create_result(self, best_mapping: Mapping, score: int, is_greedy: bool, is_partial: bool, gap: float = 0.0) \
+            -> ComparisonResult:
+        """Returns the diff and similarities of the chosen mapping."""
+        graph1 = self.comparison_graph1
+        graph2 = self.comparison_graph2
         matches = self.get_matches(best_mapping)
-        grouped_matches = group_labeled_matches(matches)
         diff = Diff(
-            grouped_matches,
-            additions=group_labeled_elements({labeled_node for labeled_node in self.labeled_nodes2
-                                              if labeled_node not in [match[1] for match in matches]}),
-            deletions=group_labeled_elements({labeled_node for labeled_node in self.labeled_nodes1
-                                              if labeled_node not in [match[0] for match in matches]})
+            group_labeled_matches(matches),
+            additions=group_labeled_elements(graph2.get_labeled_nodes() - {match[1] for match in matches}),
+            deletions=group_labeled_elements(graph1.get_labeled_nodes() - {match[0] for match in matches})
         )
+        state_mapping, _ = best_mapping
         return ComparisonResult(
             diff=diff,
-            similarity_=2 * score / (len(self.labeled_nodes1) + len(self.labeled_nodes2)),
-            state_similarity=
-            2 * len([j for i in [x[1] for x in self.group(grouped_matches.items())['state']] for j in i]) /
-            (len([x for x in self.labeled_nodes1 if x[0] in self.states1]) +
-             len([x for x in self.labeled_nodes2 if x[0] in self.states2])),
-            single_similarity0=score / len(self.labeled_nodes1),
-            single_similarity1=score / len(self.labeled_nodes2),
-            is_greedy=is_greedy
+            similarity_=divide(2 * score, graph1.labeled_node_count + graph2.labeled_node_count),
+            state_similarity=divide(
+                2 * sum(self.state_overlaps[state1][state2] for state1, state2 in state_mapping.items()),
+                len(graph1.state_labels) + len(graph2.state_labels)),
+            single_similarity0=divide(score, graph1.labeled_node_count),
+            single_similarity1=divide(score, graph2.labeled_node_count),
+            is_greedy=is_greedy,
+            is_partial=is_partial,
+            gap=gap
         )
 
-    def get_match_type(self, labels):
-        if labels == {'hierarchy'}:
-            return 'hierarchy'
-        elif self.is_transition(labels):
-            return 'transition'
-        else:
-            return 'state'
-
-    def is_transition(self, labels):
-        if 'transition' in labels:
-            return True
-        elif any(x.startswith('trigger_') for x in labels):
-            return True
-        elif any(x.startswith('guard_') for x in labels):
-            return True
-        elif any(x.startswith('effect_') for x in labels):
+    def uses_greedy(self) -> bool:
+        """
+        Returns whether the auto engine uses the greedy algorithm. Statecharts with more states are still searched
+        exactly if they have few enough mappings, within their candidate domains.
+        """
+        graph1 = self.comparison_graph1
+        graph2 = self.comparison_graph2
+        if max(graph1.get_max_degree(), graph2.get_max_degree()) > MAX_EXACT_DEGREE:
             return True
-        else:
+        state_count = max(graph1.state_count, graph2.state_count)
+        element_count = min(graph1.state_count, graph2.state_count)
+        if state_count <= MAX_EXACT_STATES or math.perm(state_count, element_count) <= MAX_EXACT_MAPPINGS:
             return False
-
-    def group(self, matches: List[Tuple[Any, Set[str]]]) -> Dict[str, List[Tuple[Any, Set[str]]]]:
-        dictionary = defaultdict(list)
-        for x, labels in matches:
-            dictionary[self.get_match_type(labels)].append((x, labels))
-        return dictionary
-
-    def get_best_mapping_greedy(self):
-        mapping = {}
-        match_count = 0
-        unmapped_states1 = {state for state in self.states1 if state not in mapping.keys()}
-        unmapped_states2 = {state for state in self.states2 if state not in mapping.values()}
-        while min(len(unmapped_states1), len(unmapped_states2)) > 0:
-            scored_mapping_elements_with_mappings = defaultdict(list)
-            for mapping_element in itertools.product(unmapped_states1, unmapped_states2):
-                match_count_, mapping_ = self.get_mapping_element_score(mapping_element, mapping)
-                scored_mapping_elements_with_mappings[match_count_].append((mapping_element, mapping_))
-
-            match_count = max(scored_mapping_elements_with_mappings.keys())
-            mapping_elements_with_mappings = scored_mapping_elements_with_mappings[match_count]
-            if len(mapping_elements_with_mappings) > 1:
-                best_mapping_element, mapping = maxima(
-                    mapping_elements_with_mappings,
-                    key=lambda mapping_element_with_mapping: self.look_ahead(mapping_element_with_mapping[0])
-                )[0][0]
-            else:
-                best_mapping_element, mapping = mapping_elements_with_mappings[0]
-            unmapped_states1.remove(best_mapping_element[0])
-            unmapped_states2.remove(best_mapping_element[1])
-
-        return mapping, match_count
-
-    def get_mapping_element_score(self, mapping_element: Tuple[Any, Any], mapping: Dict[Any, Any]):
-        mapping = expand_mapping(mapping, mapping_element)
-        grouped_mapable_adjacent_edges1 = \
-            get_grouped_mapable_adjacent_edges(mapping_element[0], self.graph1, mapping.keys())
-        grouped_mapable_adjacent_edges2 = \
-            get_grouped_mapable_adjacent_edges(mapping_element[1], self.graph2, mapping.values())
-
-        for source, target in grouped_mapable_adjacent_edges1.copy():
-            grouped_mapable_adjacent_edges1[(mapping[source], mapping[target])] = \
-                grouped_mapable_adjacent_edges1.pop((source, target))
-
-        for group_key in [value for value in grouped_mapable_adjacent_edges1 if
-                          value in grouped_mapable_adjacent_edges2]:
-            unmapped_edges1: Set = grouped_mapable_adjacent_edges1[group_key].copy()
-            unmapped_edges2: Set = grouped_mapable_adjacent_edges2[group_key].copy()
-            while min(len(unmapped_edges1), len(unmapped_edges2)) > 0:
-                candidate = maxima(
-                    itertools.product(unmapped_edges1, unmapped_edges2),
-                    key=lambda edge_mapping_element:
-                    len(self.get_matches(expand_mapping(mapping, edge_mapping_element)))
-                )[0][0]
-                mapping[candidate[0]] = candidate[1]
-                unmapped_edges1.remove(candidate[0])
-                unmapped_edges2.remove(candidate[1])
-
-        return len(self.get_matches(mapping)), mapping
-
-    def look_ahead(self, mapping_element: Tuple[Any, Any]):
-        outgoing_labeled_transitions1 = \
-            get_labeled_edges(self.graph1, self.edges1, self.labeled_nodes1, mapping_element[0], True)
-        outgoing_labeled_transitions2 = \
-            get_labeled_edges(self.graph2, self.edges2, self.labeled_nodes2, mapping_element[1], True)
-        a = get_potential_new_labeled_nodes(outgoing_labeled_transitions1, outgoing_labeled_transitions2)
-        b = get_potential_new_labeled_nodes(outgoing_labeled_transitions2, outgoing_labeled_transitions1)
-
-        incoming_labeled_transitions1 = \
-            get_labeled_edges(self.graph1, self.edges1, self.labeled_nodes1, mapping_element[0], False)
-        incoming_labeled_transitions2 = \
-            get_labeled_edges(self.graph2, self.edges2, self.labeled_nodes2, mapping_element[1], False)
-        c = get_potential_new_labeled_nodes(incoming_labeled_transitions1, incoming_labeled_transitions2)
-        d = get_potential_new_labeled_nodes(incoming_labeled_transitions2, incoming_labeled_transitions1)
-
-        return len(a + b + c + d)
-
-    def get_matches(self, mapping: Dict[Any, Any]) \
-            -> Set[Tuple[Tuple[Any, str], Tuple[Any, str]]]:
-        mapping_str = str(mapping)
-        cached_matches = self.mapping_to_matches_cache.get(mapping_str)
-        if cached_matches:
-            return cached_matches
-        else:
-            matches = set()
-            for labeled_node in self.labeled_nodes1:
-                match = (mapping.get(labeled_node[0]), labeled_node[1])
-                if match in self.labeled_nodes2:
-                    matches.add((labeled_node, match))
-            self.mapping_to_matches_cache[mapping_str] = matches
-            return matches
+        return self.get_domains() is None or self.domain_mapping_count > MAX_EXACT_MAPPINGS
+
+    def get_domains(self) -> Optional[numpy.ndarray]:
+        """
+        Returns the allowed state pairs of the exact search, see domains.get_domains, or None for statecharts that
+        are too small to profit from them or too large to search exactly anyway.
+        """
+        if not self.has_domains:
+            state_count1 = self.comparison_graph1.state_count
+            state_count2 = self.comparison_graph2.state_count
+            if max(state_count1, state_count2) <= MAX_DOMAIN_STATES and \
+                    math.perm(max(state_count1, state_count2), min(state_count1, state_count2)) > BLOCK_SIZE:
+                (greedy_state_mapping, _), greedy_score = self.get_best_mapping_greedy()
+                self.domains = domains.get_domains(self.comparison_graph1, self.comparison_graph2, self.overlaps,
+                                                   greedy_state_mapping, greedy_score, self.strictness)
+                self.domain_mapping_count = domains.count_mappings(self.domains)
+            self.has_domains = True
+        return self.domains
+
+    def has_strict_domains(self) -> bool:
+        """Returns whether the exact search leaves out state pairs that a best mapping may contain, see get_domains."""
+        return self.strictness > 0 and self.get_domains() is not None
+
+    def get_best_mapping_exact(self, budget: Optional[Budget] = None) -> Tuple[Mapping, int]:
+        """
+        Searches all state mappings. The edge groups between two mapped state pairs only add matches of their own,
+        so every group is matched on its own and only its best edge mapping is considered, which yields the same
+        best mapping as searching all combinations of edge mappings. The mappings are scored in blocks with NumPy.
+        """
+        best_state_mapping, score = get_best_state_mapping(self.create_block_scorer(), self.get_tie_break_array(),
+                                                           self.comparison_graph2.state_count, budget,
+                                                           self.get_domains())
+        return (best_state_mapping, self.get_edge_mapping(best_state_mapping)), score
+
+    def create_block_scorer(self) -> BlockScorer:
+        return BlockScorer(self.overlaps.states, self.grouped_edges1, self.grouped_edges2,
+                           lambda edges1, edges2: self.get_best_edge_mapping(edges1, edges2)[1])
+
+    def get_best_mapping_greedy(self, budget: Optional[Budget] = None, pool: Optional[PairPool] = None) \
+            -> Tuple[Mapping, int]:
+        return self.create_greedy_matcher().get_best_mapping(budget, pool)
+
+    def get_best_mapping_beam(self, width: int, budget: Optional[Budget] = None) -> Tuple[Mapping, int]:
+        matcher = BeamMatcher(StateIndex(self.comparison_graph1), StateIndex(self.comparison_graph2),
+                              self.state_overlaps, self.edge_overlaps, self.overlaps.look_ahead.tolist(),
+                              match_edges=self.get_edge_match_function(get_greedy_edge_mapping), width=width)
+        return matcher.get_best_mapping(budget)
+
+    def create_greedy_matcher(self) -> GreedyMatcher:
+        return GreedyMatcher(StateIndex(self.comparison_graph1), StateIndex(self.comparison_graph2),
+                             self.state_overlaps, self.edge_overlaps, self.overlaps.look_ahead.tolist(),
+                             match_edges=self.get_edge_match_function(get_greedy_edge_mapping))
+
+    def get_best_mapping_hierarchical(self, budget: Optional[Budget] = None, pool: Optional[PairPool] = None) \
+            -> Tuple[Mapping, int, bool]:
+        """
+        Returns the mapping, its score and whether it may be worse than the best mapping: if a region or edge group
+        was too large to match exactly, or if the regions restricted the mapping and its score stays below the upper
+        bound of domains.get_score_bound.
+        """
+        matcher = self.create_hierarchical_matcher()
+        best_mapping, score = matcher.get_best_mapping(budget, pool)
+        is_greedy = matcher.is_greedy or matcher.is_decomposed() and score < domains.get_score_bound(
+            self.comparison_graph1, self.comparison_graph2, self.overlaps)
+        return best_mapping, score, is_greedy
+
+    def create_hierarchical_matcher(self) -> HierarchicalMatcher:
+        return HierarchicalMatcher(self.comparison_graph1, self.comparison_graph2, self.state_overlaps,
+                                   self.edge_overlaps, self.overlaps.look_ahead.tolist(), self.get_tie_break(),
+                                   self.get_edge_match_function(get_best_edge_mapping),
+                                   self.get_edge_match_function(get_greedy_edge_mapping))
+
+    def get_best_mapping_ilp(self, budget: Optional[Budget] = None) -> Tuple[Mapping, int, int]:
+        """Returns the mapping of the integer program, its score and an upper bound of the best score."""
+        # scipy is only needed by this engine
+        from nyc import ilp
+        solution = ilp.solve(self.comparison_graph1, self.comparison_graph2, self.overlaps.states, self.overlaps.edges,
+                             self.get_tie_break_array(), budget)
+        return (solution.state_mapping, solution.edge_mapping), solution.score, solution.upper_bound
+
+    def get_tie_break_array(self) -> numpy.ndarray:
+        """Returns the tie-break scores as a matrix, which keeps its shape if one of the graphs has no states."""
+        if self.tie_break_array is None:
+            self.tie_break_array = get_tie_break_overlaps(self.comparison_graph1, self.comparison_graph2).astype(int)
+        return self.tie_break_array
+
+    def get_tie_break(self) -> List[List[int]]:
+        if self.tie_break is None:
+            self.tie_break = self.get_tie_break_array().tolist()
+        return self.tie_break
+
+    def get_state_mapping_score(self, state_mapping: Dict[int, int]) -> int:
+        """Returns the matches of the state mapping and the best mapping of every edge group between them."""
+        score = sum(self.state_overlaps[state1][state2] for state1, state2 in state_mapping.items())
+        for (source, target), edges1 in self.grouped_edges1.items():
+            if source in state_mapping and target in state_mapping:
+                edges2 = self.grouped_edges2.get((state_mapping[source], state_mapping[target]))
+                if edges2 is not None:
+                    score += self.get_best_edge_mapping(edges1, edges2)[1]
+        return score
+
+    def get_edge_mapping(self, state_mapping: Dict[int, int]) -> Dict[int, int]:
+        edge_mapping = {}
+        for (source, target), edges1 in self.grouped_edges1.items():
+            if source in state_mapping and target in state_mapping:
+                edges2 = self.grouped_edges2.get((state_mapping[source], state_mapping[target]))
+                if edges2 is not None:
+                    edge_mapping.update(self.get_best_edge_mapping(edges1, edges2)[0])
+        return edge_mapping
+
+    def get_best_edge_mapping(self, edges1: Tuple[int, ...], edges2: Tuple[int, ...]) -> Tuple[Dict[int, int], int]:
+        """Returns the first best mapping between two edge groups, cached per pair of groups."""
+        result = self.edge_group_results.get((edges1, edges2))
+        if result is None:
+            result = self.get_edge_match_function(get_best_edge_mapping)(edges1, edges2, self.edge_overlaps)
+            self.edge_group_results[edges1, edges2] = result
+        return result
+
+    def get_edge_match_function(self, match_function: EdgeMatchFunction) -> EdgeMatchFunction:
+        """Returns the match function of edge groups, looked up in the memo first if there is one."""
+        if self.memo is None:
+            return match_function
+        return partial(match_edge_groups, self.memo, match_function, self.comparison_graph1, self.comparison_graph2)
+
+    def get_score(self, mapping: Mapping) -> int:
+        """Returns the number of labels the mapped states and edges share."""
+        state_mapping, edge_mapping = mapping
+        return sum(self.state_overlaps[state1][state2] for state1, state2 in state_mapping.items()) + \
+            sum(self.edge_overlaps[edge1][edge2] for edge1, edge2 in edge_mapping.items())
+
+    def get_matches(self, mapping: Mapping) -> Set[Tuple[Tuple[Any, str], Tuple[Any, str]]]:
+        graph1 = self.comparison_graph1
+        graph2 = self.comparison_graph2
+        state_mapping, edge_mapping = mapping
+        matches = set()
+        for state1, state2 in state_mapping.items():
+            for label in graph1.get_state_labels(state1) & graph2.get_state_labels(state2):
+                matches.add(((graph1.state_ids[state1], label), (graph2.state_ids[state2], label)))
+        for edge1, edge2 in edge_mapping.items():
+            for label in graph1.get_edge_labels(edge1) & graph2.get_edge_labels(edge2):
+                matches.add(((graph1.edge_ids[edge1], label), (graph2.edge_ids[edge2], label)))
+        return matches
+
+    def get_id_mapping(self, mapping: Mapping) -> Dict[Any, Any]:
+        """Converts a mapping to a single dictionary between the statechart ids of the states and edges."""
+        state_mapping, edge_mapping = mapping
+        id_mapping = {self.comparison_graph1.state_ids[state1]: self.comparison_graph2.state_ids[state2]
+                      for state1, state2 in state_mapping.items()}
+        id_mapping.update((self.comparison_graph1.edge_ids[edge1], self.comparison_graph2.edge_ids[edge2])
+                          for edge1, edge2 in edge_mapping.items())
+        return id_mapping
 
     def get_statechart_mappings(self) -> List[Dict[Any, Any]]:
-        state_mappings = get_mappings(self.states1, self.states2)
-        mappings = []
-        for state_mapping in state_mappings:
-            grouped_transition_mapping_groups = []
-            for (source, target), transitions1 in self.grouped_edges1.items():
-                if state_mapping.get(source) and state_mapping.get(target):
-                    transitions2 = self.grouped_edges2[state_mapping[source], state_mapping[target]]
-                    transition_mappings = get_mappings(transitions1, transitions2)
-                    if transition_mappings != [{}]:
-                        grouped_transition_mapping_groups.append(transition_mappings)
-            for transition_mapping_groups in list(itertools.product(*grouped_transition_mapping_groups)):
-                mapping = state_mapping.copy()
-                for transition_mapping_group in transition_mapping_groups:
-                    mapping.update(transition_mapping_group)
-                mappings.append(mapping)
-        return mappings
-
-
-def get_grouped_mapable_adjacent_edges(best_mapping_element, graph, mapping):
-    predecessors = {x for x in graph.predecessors(best_mapping_element) if graph.nodes[x]['source_id'] in mapping}
-    predecessors_grouped = group_edges(graph, predecessors)
-    successors = {x for x in graph.successors(best_mapping_element) if graph.nodes[x]['target_id'] in mapping}
-    successors_grouped = group_edges(graph, successors)
-    return {**predecessors_grouped, **successors_grouped}
-
-
-def get_labeled_edges(graph: networkx.DiGraph, edges: Set[Any], labeled_nodes: Set[Tuple[Any, str]],
-                      state: Any, use_source: bool):
-    relevant_edges = [edge for edge in edges if graph.nodes[edge]['source_id' if use_source else 'target_id'] == state]
-    return [(node, label) for node, label in labeled_nodes if node in relevant_edges]
-
-
-def get_potential_new_labeled_nodes(labeled_nodes1: List[Tuple[Any, str]], labeled_nodes2: List[Tuple[Any, str]]):
-    return [(node, label) for node, label in labeled_nodes1 if label in [label for node, label in labeled_nodes2]]
-
-
-def expand_mapping(mapping: Dict[Any, Any], mapping_element: Tuple[Any, Any]):
-    copy = mapping.copy()
-    copy[mapping_element[0]] = mapping_element[1]
-    return copy
-
-
-def create_comparison_graph(statechart: Statechart) -> networkx.DiGraph:
-    graph = networkx.DiGraph()
-    # noinspection PyArgumentList
-    for _, region in statechart.hierarchy.out_edges('root'):
-        # noinspection PyArgumentList
-        for _, state in statechart.hierarchy.out_edges(region):
-            build_hierarchy(statechart.hierarchy, state, statechart.hierarchy.nodes[region]['obj'].history, graph)
-
-    for transitions in statechart.transitions.values():
-        for transition in transitions:
-            labels = {'transition'}
-            for trigger in transition.specification.triggers:
-                trigger_stripped = remove_whitespace(trigger)
-                if trigger_stripped:
-                    labels.add('trigger_' + trigger_stripped)
-            for effect in transition.specification.effects:
-                effect_stripped = remove_whitespace(effect)
-                if effect_stripped:
-                    labels.add('effect_' + effect_stripped)
-            guard = transition.specification.guard
-            if guard:
-                guard_stripped = remove_whitespace(guard)
-                if guard_stripped:
-                    labels.add('guard_' + guard_stripped)
-            graph.add_node(transition.transition_id, labels=labels, source_id=transition.source_id,
-                           target_id=transition.target_id)
-
-            graph.add_edge(transition.source_id, transition.transition_id)
-            graph.add_edge(transition.transition_id, transition.target_id)
-    return graph
-
-
-def remove_whitespace(guard):
-    return "".join(guard.split())
-
-
-def build_hierarchy(hierarchy: networkx.DiGraph, state: Any, history_type: ScHistoryType,
-                    labeled_graph: networkx.DiGraph):
-    labels = {'state'}
-    state_attributes = hierarchy.nodes[state]
-    if state_attributes['ntype'] == NodeType.STATE and hierarchy.nodes[state]['obj'].initial:
-        labels.add('initial')
-    if state_attributes['ntype'] == NodeType.FINAL:
-        labels.add('final')
-    if state_attributes['ntype'] == NodeType.CHOICE:
-        labels.add('choice')
-
-    if history_type == ScHistoryType.SHALLOW:
-        labels.update({'history', 'shallow_history'})
-    elif history_type == ScHistoryType.DEEP:
-        labels.update({'history', 'deep_history'})
-    # noinspection PyArgumentList
-    edges_to_regions = list(hierarchy.out_edges(state))
-    subregion_count = len(edges_to_regions)
-    if subregion_count != 0:
-        labels.add('composite' if subregion_count == 1 else 'orthogonal')
-        for _, region in edges_to_regions:
-            # noinspection PyArgumentList
-            for _, substate in hierarchy.out_edges(region):
-                edge_id = state + substate
-                labeled_graph.add_node(edge_id, labels={'hierarchy'}, source_id=state, target_id=substate)
-                labeled_graph.add_edge(state, edge_id)
-                labeled_graph.add_edge(edge_id, substate)
-                build_hierarchy(hierarchy, substate, hierarchy.nodes[region]['obj'].history, labeled_graph)
-
-    labeled_graph.add_node(state, labels=labels)
-
-
-def create_tie_break_comparison_graph(statechart: Statechart) -> networkx.DiGraph:
-    graph = networkx.DiGraph()
-    for node in [
-        node for node in statechart.hierarchy.nodes if statechart.hierarchy.nodes[node]['ntype'] == NodeType.STATE
-    ]:
-        graph.add_node(node, labels={'state', 'name_' + statechart.hierarchy.nodes[node]['obj'].name})
-    return graph
-
-
-def get_states(graph: networkx.DiGraph) -> Set[Any]:
-    graph_labels = networkx.get_node_attributes(graph, 'labels').items()
-    return {node for node, labels in graph_labels if 'state' in labels}
-
-
-def get_edges(graph: networkx.DiGraph) -> Set[Any]:
-    graph_labels = networkx.get_node_attributes(graph, 'labels').items()
-    return {node for node, labels in graph_labels if 'transition' in labels or 'hierarchy' in labels}
-
-
-def get_mappings(list1: Collection[Any], list2: Collection[Any]) -> List[Dict[Any, Any]]:
-    element_count = min(len(list1), len(list2))
-    list1_permutations = itertools.permutations(list1, element_count)
-    list2_combinations = list(itertools.combinations(list2, element_count))
-    return [
-        dict(zip(permutation, combination))
-        for permutation in list1_permutations
-        for combination in list2_combinations
-    ]
-
-
-def group_edges(graph: networkx.DiGraph, transitions: Set[Any]) -> Dict[Tuple[Any, Any], Set[Any]]:
-    dictionary = defaultdict(set)
-    for transition in transitions:
-        dictionary[get_source_and_target_states(graph, transition)].add(transition)
-    return dictionary
-
+        return [self.get_id_mapping(mapping) for mapping in self.iterate_statechart_mappings()]
 
-def get_source_and_target_states(graph, transition):
-    transition_attributes = graph.nodes[transition]
-    source = transition_attributes['source_id']
-    target = transition_attributes['target_id']
-    return source, target
-
-
-def maxima(iterable: Iterator[Any], key) -> Tuple[List[Any], float]:
-    elements_scored = defaultdict(list)
-    for element in iterable:
-        elements_scored[key(element)].append(element)
-    max_score = max(elements_scored)
-    return elements_scored[max_score], max_score
-
-
-def get_matches(graph1: networkx.DiGraph, graph2: networkx.DiGraph, mapping: Dict[Any, Any]) \
-        -> Set[Tuple[Tuple[Any, str], Tuple[Any, str]]]:
-    matches = set()
-    labeled_nodes2 = get_labeled_nodes(graph2)
-    for labeled_node in get_labeled_nodes(graph1):
-        match = (mapping.get(labeled_node[0]), labeled_node[1])
-        if match in labeled_nodes2:
-            matches.add((labeled_node, match))
-    return matches
-
-
-def get_labeled_nodes(graph: networkx.DiGraph) -> Set[Tuple[Any, str]]:
-    return {
-        grandchild for sublist in
-        [[(node, label) for label in labels] for (node, labels) in
-         networkx.get_node_attributes(graph, 'labels').items()]
-        for grandchild in sublist
-    }
+    def iterate_statechart_mappings(self) -> Iterator[Mapping]:
+        state_mappings = get_mappings(range(self.comparison_graph1.state_count),
+                                      range(self.comparison_graph2.state_count))
+        for state_mapping in state_mappings:
+            grouped_edge_mapping_groups = []
+            for (source, target), edges1 in self.grouped_edges1.items():
+                if source in state_mapping and target in state_mapping:
+                    edges2 = self.grouped_edges2.get((state_mapping[source], state_mapping[target]), ())
+                    edge_mappings = get_mappings(edges1, edges2)
+                    if edge_mappings != [{}]:
+                        grouped_edge_mapping_groups.append(edge_mappings)
+            for edge_mapping_groups in itertools.product(*grouped_edge_mapping_groups):
+                edge_mapping = {}
+                for edge_mapping_group in edge_mapping_groups:
+                    edge_mapping.update(edge_mapping_group)
+                yield state_mapping, edge_mapping
+
+
+def divide(matches: int, labels: int) -> float:
+    """Returns the share of matched labels, 0 if there are no labels, e.g. after subtracting a template."""
+    return matches / labels if labels > 0 else 0.0
 
 
 def group_labeled_matches(matches: Set[Tuple[Tuple[Any, str], Tuple[Any, str]]]) -> Dict[Tuple[Any, Any], Set[str]]:
@@ -4,9 +4,13 @@ The function previously was inside of the comparator.py module
 but has been relocated into its one module for the multiprocessing code to work.
 """
 
+from nyc.budget import Budget
 from nyc.comparator import Comparator
 
 
-def compare_pair(named_statechart_pair):
-    comparator = Comparator(named_statechart_pair[0][1], named_statechart_pair[1][1])
-    return named_statechart_pair[0][0], named_statechart_pair[1][0], comparator.compare()
+def compare_pair(named_statechart_pair, time_budget=None, step_budget=None, engine='auto', workers=1,
+                 beam_width=None, strictness=0):
+    comparator = Comparator(named_statechart_pair[0][1], named_statechart_pair[1][1], strictness=strictness)
+    budget = None if time_budget is None and step_budget is None else Budget(time_budget, step_budget)
+    comparison_result = comparator.compare(budget, engine, workers, beam_width)
+    return named_statechart_pair[0][0], named_statechart_pair[1][0], comparison_result
@@ -0,0 +1,178 @@
+"""
+Candidate domains of the exact search: the states of the second graph every state of the first graph may be mapped
+to. At strictness 0 only the state pairs that no best mapping contains are left out, so the exact search still finds
+the same mapping. Every state pair gets an upper bound of the matches it can add, its state matches and the most its
+incident edges can match with the incident edges of the other state. Every mapping scores at most the sum of the
+bounds of its pairs, and the assignment with the highest sum bounds every mapping. A pair is left out if the best
+assignment that contains it stays below the score of the greedy mapping.
+
+Higher strictness levels also leave out pairs of states that look too different, and the exact search is no longer
+guaranteed to find the best mapping:
+
+1. Final states and choices are only mapped to their own kind.
+2. Initial, composite and orthogonal states are only mapped to their own kind as well, and states with triggers only
+   to states that share a trigger.
+
+The pairs of the greedy mapping are always kept, so the search is never worse than the greedy algorithm.
+"""
+
+from typing import Dict, List, Set, Tuple
+
+import numpy
+
+from nyc.graph import ComparisonGraph, LabelOverlaps
+
+MAX_STRICTNESS = 2
+KIND_LABELS = ['final', 'choice']
+STRUCTURE_LABELS = ['initial', 'composite', 'orthogonal']
+TRIGGER_PREFIX = 'trigger_'
+
+
+def get_domains(graph1: ComparisonGraph, graph2: ComparisonGraph, overlaps: LabelOverlaps,
+                greedy_state_mapping: Dict[int, int], greedy_score: int, strictness: int = 0) -> numpy.ndarray:
+    """Returns a boolean matrix of the allowed state pairs."""
+    bounds = get_pair_bounds(graph1, graph2, overlaps)
+    best_sum, reduced_costs = get_best_assignment(bounds)
+    allowed = (best_sum - reduced_costs) >= 2 * greedy_score
+    if strictness >= 1:
+        allowed &= get_label_compatibility(graph1, graph2, KIND_LABELS)
+    if strictness >= 2:
+        allowed &= get_label_compatibility(graph1, graph2, STRUCTURE_LABELS)
+        allowed &= get_trigger_compatibility(graph1, graph2)
+    for state1, state2 in greedy_state_mapping.items():
+        allowed[state1, state2] = True
+    return allowed
+
+
+def get_score_bound(graph1: ComparisonGraph, graph2: ComparisonGraph, overlaps: LabelOverlaps) -> int:
+    """Returns an upper bound of the score of every mapping, the best assignment of the pair bounds."""
+    best_sum, _ = get_best_assignment(get_pair_bounds(graph1, graph2, overlaps))
+    return best_sum // 2
+
+
+def get_best_assignment(bounds: numpy.ndarray) -> Tuple[int, numpy.ndarray]:
+    """
+    Returns the highest sum of the bounds of an assignment of the state pairs, and by how much the best assignment
+    that contains each pair falls below it.
+    """
+    # Unmapped states are paired with zero-bound dummy states
+    size = max(bounds.shape)
+    costs = numpy.zeros((size, size), dtype=numpy.int64)
+    costs[:bounds.shape[0], :bounds.shape[1]] = -bounds
+    row_potentials, column_potentials = get_assignment_potentials(costs.tolist())
+    best_sum = -(sum(row_potentials) + sum(column_potentials))
+    reduced_costs = costs - numpy.array(row_potentials)[:, None] - numpy.array(column_potentials)[None, :]
+    return best_sum, reduced_costs[:bounds.shape[0], :bounds.shape[1]]
+
+
+def get_pair_bounds(graph1: ComparisonGraph, graph2: ComparisonGraph, overlaps: LabelOverlaps) -> numpy.ndarray:
+    """
+    Returns twice the most matches every state pair can add: its state matches twice and, for the outgoing and the
+    incoming edges, the sum of the best overlap of every edge of one state with an edge of the other, the smaller of
+    the two sums. Every edge match is counted at its source and at its target pair.
+    """
+    bounds = 2 * overlaps.states.astype(numpy.int64)
+    for states1, states2 in [(graph1.source, graph2.source), (graph1.target, graph2.target)]:
+        best_overlaps1 = numpy.zeros((graph1.edge_count, graph2.state_count), dtype=numpy.int64)
+        numpy.maximum.at(best_overlaps1.T, states2, overlaps.edges.T)
+        bounds1 = numpy.zeros(bounds.shape, dtype=numpy.int64)
+        numpy.add.at(bounds1, states1, best_overlaps1)
+        best_overlaps2 = numpy.zeros((graph2.edge_count, graph1.state_count), dtype=numpy.int64)
+        numpy.maximum.at(best_overlaps2.T, states1, overlaps.edges)
+        bounds2 = numpy.zeros(bounds.T.shape, dtype=numpy.int64)
+        numpy.add.at(bounds2, states2, best_overlaps2)
+        bounds += numpy.minimum(bounds1, bounds2.T)
+    return bounds
+
+
+def get_assignment_potentials(costs: List[List[int]]) -> Tuple[List[int], List[int]]:
+    """
+    Solves the assignment problem of a square cost matrix with the Hungarian algorithm and returns the row and column
+    potentials. Their sum is the lowest cost of an assignment, and an assignment that contains a pair costs at least
+    that plus the cost of the pair minus its potentials.
+    """
+    size = len(costs)
+    # 1-based like the textbook version, row 0 and column 0 are the start of every augmenting path
+    row_potentials = [0] * (size + 1)
+    column_potentials = [0] * (size + 1)
+    column_rows = [0] * (size + 1)
+    previous_columns = [0] * (size + 1)
+    for row in range(1, size + 1):
+        column_rows[0] = row
+        column = 0
+        min_slacks = [None] * (size + 1)
+        is_used = [False] * (size + 1)
+        while True:
+            is_used[column] = True
+            current_row = column_rows[column]
+            delta, next_column = None, 0
+            for other_column in range(1, size + 1):
+                if not is_used[other_column]:
+                    slack = costs[current_row - 1][other_column - 1] - row_potentials[current_row] - \
+                        column_potentials[other_column]
+                    if min_slacks[other_column] is None or slack < min_slacks[other_column]:
+                        min_slacks[other_column] = slack
+                        previous_columns[other_column] = column
+                    if delta is None or min_slacks[other_column] < delta:
+                        delta, next_column = min_slacks[other_column], other_column
+            for other_column in range(size + 1):
+                if is_used[other_column]:
+                    row_potentials[column_rows[other_column]] += delta
+                    column_potentials[other_column] -= delta
+                else:
+                    min_slacks[other_column] -= delta
+            column = next_column
+            if column_rows[column] == 0:
+                break
+        while column != 0:
+            previous_column = previous_columns[column]
+            column_rows[column] = column_rows[previous_column]
+            column = previous_column
+    return row_potentials[1:], column_potentials[1:]
+
+
+def get_label_compatibility(graph1: ComparisonGraph, graph2: ComparisonGraph, labels: List[str]) -> numpy.ndarray:
+    """Returns which state pairs agree on every one of the labels."""
+    has_labels1 = numpy.array([[label in graph1.get_state_labels(state) for label in labels]
+                               for state in range(graph1.state_count)], dtype=bool).reshape(-1, len(labels))
+    has_labels2 = numpy.array([[label in graph2.get_state_labels(state) for label in labels]
+                               for state in range(graph2.state_count)], dtype=bool).reshape(-1, len(labels))
+    return (has_labels1[:, None, :] == has_labels2[None, :, :]).all(axis=2)
+
+
+def get_trigger_compatibility(graph1: ComparisonGraph, graph2: ComparisonGraph) -> numpy.ndarray:
+    """Returns which state pairs share a trigger of their incident edges or have no triggers on one side."""
+    triggers1 = get_incident_triggers(graph1)
+    triggers2 = get_incident_triggers(graph2)
+    return numpy.array([[not state_triggers1 or not state_triggers2 or bool(state_triggers1 & state_triggers2)
+                         for state_triggers2 in triggers2] for state_triggers1 in triggers1],
+                       dtype=bool).reshape(graph1.state_count, graph2.state_count)
+
+
+def get_incident_triggers(graph: ComparisonGraph) -> List[Set[str]]:
+    triggers = [set() for _ in range(graph.state_count)]
+    for edge in range(graph.edge_count):
+        edge_triggers = {label for label in graph.get_edge_labels(edge) if label.startswith(TRIGGER_PREFIX)}
+        triggers[graph.source[edge]] |= edge_triggers
+        triggers[graph.target[edge]] |= edge_triggers
+    return triggers
+
+
+def count_mappings(allowed: numpy.ndarray) -> int:
+    """
+    Returns the number of mappings the exact search enumerates within the domains, which map as many states as the
+    smaller graph has. Counted over the subsets of the states of the larger graph that are mapped to.
+    """
+    if allowed.shape[0] > allowed.shape[1]:
+        allowed = allowed.T
+    masks = numpy.arange(1 << allowed.shape[1], dtype=numpy.int64)
+    counts = numpy.zeros(len(masks), dtype=numpy.int64)
+    counts[0] = 1
+    for row in allowed:
+        next_counts = numpy.zeros_like(counts)
+        for column in numpy.flatnonzero(row):
+            bit = 1 << int(column)
+            free_masks = masks[(masks & bit) == 0]
+            next_counts[free_masks | bit] += counts[free_masks]
+        counts = next_counts
+    return int(counts.sum())
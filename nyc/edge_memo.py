@@ -0,0 +1,145 @@
+"""
+Corpus-wide memo of edge group mappings. The same transition groups, e.g. the button transitions of a panel between
+two states, recur in pair after pair of a corpus, and every comparison would match them again. The memo keys a pair
+of groups by their label signatures, the labels of every edge of a group in group order, and stores the match count
+and the mapping as positions within the groups, so it serves every later pair of groups with the same labels,
+whichever statecharts they belong to. The order of the edges is part of the key because the first best mapping in
+that order is chosen, so a memoized mapping is always the one that would have been computed.
+
+Every worker keeps one memo for all tiles it compares and sends the entries it added back with the results. The
+memos of a run are merged and can be saved for the next run.
+"""
+
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from nyc.graph import ComparisonGraph
+from nyc.mappings import EdgeMatchFunction
+
+DEFAULT_MAX_ENTRIES = 100000
+# Groups with a single edge on either side are matched faster than they are looked up
+MIN_GROUP_SIZE = 2
+
+Key = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+Entry = Tuple[Tuple[Tuple[int, int], ...], int]
+
+worker_memos = threading.local()
+
+
+class EdgeGroupMemo:
+    """The least recently used edge group mappings, at most max_entries, and the hits and misses of the lookups."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: Dict[Key, Entry] = OrderedDict()
+        self.new_entries: Dict[Key, Entry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups > 0 else 0.0
+
+    def get(self, key: Key) -> Optional[Entry]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Key, entry: Entry):
+        self.add(key, entry)
+        self.new_entries[key] = entry
+        if len(self.new_entries) > self.max_entries:
+            del self.new_entries[next(iter(self.new_entries))]
+
+    def add(self, key: Key, entry: Entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def take_update(self) -> 'EdgeGroupMemo':
+        """Returns the entries put and the lookups since the last update and starts a new one."""
+        update = EdgeGroupMemo(self.max_entries)
+        update.entries.update(self.new_entries)
+        update.hits, update.misses = self.hits, self.misses
+        self.new_entries = {}
+        self.hits = self.misses = 0
+        return update
+
+    def merge(self, other: 'EdgeGroupMemo'):
+        """Adds the entries and lookups of another memo, e.g. the update of a worker."""
+        for key, entry in other.entries.items():
+            self.add(key, entry)
+        self.hits += other.hits
+        self.misses += other.misses
+
+
+def match_edge_groups(memo: Optional[EdgeGroupMemo], match_function: EdgeMatchFunction, graph1: ComparisonGraph,
+                      graph2: ComparisonGraph, edges1: Sequence[int], edges2: Sequence[int],
+                      edge_overlaps: List[List[int]]) -> Tuple[Dict[int, int], int]:
+    """
+    Returns match_function(edges1, edges2, edge_overlaps), from the memo if it holds the mapping of two groups with
+    the same signatures.
+    """
+    if memo is None or min(len(edges1), len(edges2)) < MIN_GROUP_SIZE:
+        return match_function(edges1, edges2, edge_overlaps)
+    signatures1 = graph1.get_edge_signatures()
+    signatures2 = graph2.get_edge_signatures()
+    key = (match_function.__name__, tuple(signatures1[edge] for edge in edges1),
+           tuple(signatures2[edge] for edge in edges2))
+    entry = memo.get(key)
+    if entry is not None:
+        positions, score = entry
+        return {edges1[position1]: edges2[position2] for position1, position2 in positions}, score
+    mapping, score = match_function(edges1, edges2, edge_overlaps)
+    positions1 = {edge: position for position, edge in enumerate(edges1)}
+    positions2 = {edge: position for position, edge in enumerate(edges2)}
+    memo.put(key, (tuple((positions1[edge1], positions2[edge2]) for edge1, edge2 in mapping.items()), score))
+    return mapping, score
+
+
+def get_worker_memo(max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = None) -> EdgeGroupMemo:
+    """Returns the memo of this worker thread or process, loaded from the path if it exists when it is first used."""
+    memo = getattr(worker_memos, 'memo', None)
+    if memo is None:
+        memo = load(path, max_entries) if path is not None and os.path.exists(path) else EdgeGroupMemo(max_entries)
+        worker_memos.memo = memo
+    return memo
+
+
+def compare_tile(tile, compare_function: Callable[..., list], max_entries: int = DEFAULT_MAX_ENTRIES,
+                 path: Optional[str] = None) -> Tuple[list, EdgeGroupMemo]:
+    """Compares the tile with compare_function and the memo of this worker, returns the results and its update."""
+    memo = get_worker_memo(max_entries, path)
+    return compare_function(tile, memo=memo), memo.take_update()
+
+
+def save(memo: EdgeGroupMemo, path: str):
+    with open(path, 'wb') as memo_file:
+        pickle.dump(list(memo.entries.items()), memo_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(path: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> EdgeGroupMemo:
+    """Loads the entries of a saved memo, the most recently used ones if there are more than max_entries."""
+    with open(path, 'rb') as memo_file:
+        entries = pickle.load(memo_file)
+    if not isinstance(entries, list):
+        raise ValueError(f'{path} is not an edge group memo')
+    memo = EdgeGroupMemo(max_entries)
+    for key, entry in entries[-max_entries:]:
+        memo.add(key, entry)
+    return memo
@@ -0,0 +1,126 @@
+"""
+Execution backends and worker sizing. The number of workers defaults to the CPUs the process may actually use,
+which is the smaller of its CPU affinity and the cgroup CPU quota, and is further limited so that every worker gets
+a given amount of the memory that is available to the process, which is bounded by the cgroup memory limit.
+Both cgroup v2 and v1 are supported.
+"""
+
+import math
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Any
+
+from tqdm import tqdm
+from tqdm.contrib.concurrent import process_map, thread_map
+
+BACKENDS = ['serial', 'thread', 'process']
+CGROUP_ROOT = '/sys/fs/cgroup'
+DEFAULT_WORKER_MEMORY = 512 * 1024 * 1024
+
+
+def read_file(path: str) -> Optional[str]:
+    try:
+        with open(path) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def get_cpu_quota(cgroup_root: str = CGROUP_ROOT) -> Optional[float]:
+    """Returns the number of CPUs the cgroup CPU quota allows, None if there is no quota."""
+    cpu_max = read_file(os.path.join(cgroup_root, 'cpu.max'))
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(' ')
+        return None if quota == 'max' else int(quota) / int(period or 100000)
+    quota = read_file(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_quota_us'))
+    period = read_file(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_period_us'))
+    if quota is None or period is None or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def get_cpu_limit(cgroup_root: str = CGROUP_ROOT) -> int:
+    """Returns the number of CPUs the process can use, at least 1."""
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = get_cpu_quota(cgroup_root)
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def get_available_memory(cgroup_root: str = CGROUP_ROOT, meminfo_path: str = '/proc/meminfo') -> Optional[int]:
+    """
+    Returns the memory in bytes the process can still allocate, which is the smaller of the available system
+    memory and the unused part of the cgroup memory limit. None if neither is known.
+    """
+    available = []
+    meminfo = read_file(meminfo_path)
+    if meminfo is not None:
+        for line in meminfo.splitlines():
+            if line.startswith('MemAvailable:'):
+                available.append(int(line.split()[1]) * 1024)
+    for limit_file, usage_file in [('memory.max', 'memory.current'),
+                                   (os.path.join('memory', 'memory.limit_in_bytes'),
+                                    os.path.join('memory', 'memory.usage_in_bytes'))]:
+        limit = read_file(os.path.join(cgroup_root, limit_file))
+        if limit is None:
+            continue
+        if limit != 'max':
+            usage = read_file(os.path.join(cgroup_root, usage_file))
+            available.append(max(0, int(limit) - int(usage or 0)))
+        break
+    return min(available, default=None)
+
+
+def get_default_worker_count(worker_memory: int = DEFAULT_WORKER_MEMORY, cgroup_root: str = CGROUP_ROOT) -> int:
+    """Returns the number of CPUs the process can use, reduced so that every worker gets the given memory."""
+    workers = get_cpu_limit(cgroup_root)
+    available_memory = get_available_memory(cgroup_root)
+    if available_memory is not None:
+        workers = min(workers, available_memory // worker_memory)
+    return max(1, workers)
+
+
+def get_default_backend(workers: int) -> str:
+    return 'process' if workers > 1 else 'serial'
+
+
+def map_items(function: Callable[[Any], Any], items: Iterable[Any], backend: str, workers: int,
+              **tqdm_arguments) -> List[Any]:
+    """
+    Applies the function to all items with a progress bar and returns the results in order. The serial backend runs
+    in this process, so profilers and debuggers see the comparisons.
+    """
+    if backend == 'serial':
+        return [function(item) for item in tqdm(items, **tqdm_arguments)]
+    if backend == 'thread':
+        return thread_map(function, items, max_workers=workers, **tqdm_arguments)
+    if backend == 'process':
+        return process_map(function, items, max_workers=workers, **tqdm_arguments)
+    raise ValueError(f'Unknown backend "{backend}"')
+
+
+class SerialExecutor(Executor):
+    """Runs every submitted call immediately in this process."""
+
+    def submit(self, function, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(function(*args, **kwargs))
+        except Exception as err:
+            future.set_exception(err)
+        return future
+
+
+def create_executor(backend: str, workers: int) -> Executor:
+    """Returns an executor of the backend, for pipelines that submit work as it becomes available."""
+    if backend == 'serial':
+        return SerialExecutor()
+    if backend == 'thread':
+        return ThreadPoolExecutor(max_workers=workers)
+    if backend == 'process':
+        return ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f'Unknown backend "{backend}"')
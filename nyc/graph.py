@@ -0,0 +1,276 @@
+from typing import Any, Dict, List, Set, Tuple, Optional
+
+import networkx
+import numpy
+from yak_parser.Statechart import Statechart, NodeType, ScHistoryType
+
+
+class ComparisonGraph:
+    """
+    Array-backed comparison graph of a statechart. States and edges (transitions and hierarchy edges) have
+    separate integer ids in the order of their statechart ids. Labels, adjacency, the grouping of the edges by
+    their source and target state and the states of every region are stored as offset arrays: the values of element
+    ``i`` are ``values[offsets[i]:offsets[i + 1]]``. networkx is only used while building the graph.
+    It only depends on one statechart, so it can be built once and shared by all comparisons the statechart takes
+    part in. Excluded labeled nodes, e.g. those a template matches, are left out; see remove_labeled_nodes.
+    """
+
+    def __init__(self, statechart: Statechart, excluded_labeled_nodes: Optional[Set[Tuple[Any, str]]] = None):
+        graph = create_comparison_graph(statechart)
+        if excluded_labeled_nodes:
+            remove_labeled_nodes(graph, excluded_labeled_nodes)
+        labels: Dict[Any, Set[str]] = networkx.get_node_attributes(graph, 'labels')
+        # Edges (transitions and hierarchy edges) know their states, states are the other labeled nodes
+        self.state_ids: List[Any] = sorted(node for node in labels if 'source_id' not in graph.nodes[node])
+        state_index = {state: i for i, state in enumerate(self.state_ids)}
+        edge_ids = sorted(node for node in labels if 'source_id' in graph.nodes[node])
+        self.edge_ids: List[Any] = [edge for edge in edge_ids if graph.nodes[edge]['source_id'] in state_index
+                                    and graph.nodes[edge]['target_id'] in state_index]
+        # Preprocessing can leave transitions from or to states without labels, e.g. nested states of a removed
+        # composite state. Those states are not states of the graph, so the transitions can never be matched and only
+        # their labels count, like in the original networkx comparison
+        self.unmatchable_labeled_nodes: Set[Tuple[Any, str]] = {
+            (edge, label) for edge in sorted(set(edge_ids) - set(self.edge_ids)) for label in labels[edge]}
+        self.source = numpy.array([state_index[graph.nodes[edge]['source_id']] for edge in self.edge_ids],
+                                  dtype=numpy.int32)
+        self.target = numpy.array([state_index[graph.nodes[edge]['target_id']] for edge in self.edge_ids],
+                                  dtype=numpy.int32)
+
+        self.label_names: List[str] = sorted({label for node_labels in labels.values() for label in node_labels})
+        label_index = {label: i for i, label in enumerate(self.label_names)}
+        self.state_label_offsets, self.state_labels = create_offset_arrays(
+            [[label_index[label] for label in labels[state]] for state in self.state_ids])
+        self.edge_label_offsets, self.edge_labels = create_offset_arrays(
+            [[label_index[label] for label in labels[edge]] for edge in self.edge_ids])
+
+        edges = numpy.arange(len(self.edge_ids), dtype=numpy.int32)
+        self.outgoing_offsets, self.outgoing_edges = group_by_state(self.source, edges, len(self.state_ids))
+        self.incoming_offsets, self.incoming_edges = group_by_state(self.target, edges, len(self.state_ids))
+
+        order = numpy.lexsort((edges, self.target, self.source))
+        is_group_start = numpy.ones(len(order), dtype=bool)
+        is_group_start[1:] = (numpy.diff(self.source[order]) != 0) | (numpy.diff(self.target[order]) != 0)
+        self.group_sources = self.source[order][is_group_start]
+        self.group_targets = self.target[order][is_group_start]
+        self.group_offsets = numpy.append(numpy.flatnonzero(is_group_start), len(order)).astype(numpy.int32)
+        self.group_edges = order.astype(numpy.int32)
+
+        region_parents = get_region_parents(statechart.hierarchy)
+        self.region_ids: List[Any] = sorted(region_parents)
+        self.region_parents = numpy.array([state_index.get(region_parents[region], -1) for region in self.region_ids],
+                                          dtype=numpy.int32)
+        self.region_state_offsets, self.region_states = create_offset_arrays(
+            # noinspection PyArgumentList
+            [[state_index[state] for _, state in statechart.hierarchy.out_edges(region) if state in state_index]
+             for region in self.region_ids])
+
+        self.tie_break_names: List[Optional[str]] = [
+            statechart.hierarchy.nodes[state]['obj'].name
+            if statechart.hierarchy.nodes[state]['ntype'] == NodeType.STATE else None
+            for state in self.state_ids
+        ]
+        self.edge_signatures: Optional[List[str]] = None
+
+    @property
+    def state_count(self) -> int:
+        return len(self.state_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_ids)
+
+    @property
+    def labeled_node_count(self) -> int:
+        return len(self.state_labels) + len(self.edge_labels) + len(self.unmatchable_labeled_nodes)
+
+    def get_max_degree(self) -> int:
+        return int(numpy.diff(self.group_offsets).max(initial=0))
+
+    def get_region_states(self, region: int) -> List[int]:
+        return self.region_states[self.region_state_offsets[region]:self.region_state_offsets[region + 1]].tolist()
+
+    def get_grouped_edges(self) -> Dict[Tuple[int, int], Tuple[int, ...]]:
+        return {
+            (int(source), int(target)): tuple(self.group_edges[start:end].tolist())
+            for source, target, start, end in
+            zip(self.group_sources, self.group_targets, self.group_offsets[:-1], self.group_offsets[1:])
+        }
+
+    def get_state_labels(self, state: int) -> Set[str]:
+        return {self.label_names[label] for label in
+                self.state_labels[self.state_label_offsets[state]:self.state_label_offsets[state + 1]]}
+
+    def get_edge_labels(self, edge: int) -> Set[str]:
+        return {self.label_names[label] for label in
+                self.edge_labels[self.edge_label_offsets[edge]:self.edge_label_offsets[edge + 1]]}
+
+    def get_edge_signatures(self) -> List[str]:
+        """Returns the sorted labels of every edge joined into one string, which identifies the labels of the edge."""
+        if self.edge_signatures is None:
+            self.edge_signatures = ['\0'.join(sorted(self.get_edge_labels(edge))) for edge in range(self.edge_count)]
+        return self.edge_signatures
+
+    def get_labeled_nodes(self) -> Set[Tuple[Any, str]]:
+        return {(state_id, label) for state, state_id in enumerate(self.state_ids)
+                for label in self.get_state_labels(state)} | \
+               {(edge_id, label) for edge, edge_id in enumerate(self.edge_ids)
+                for label in self.get_edge_labels(edge)} | self.unmatchable_labeled_nodes
+
+    def get_label_matrix(self, offsets: numpy.ndarray, labels: numpy.ndarray, vocabulary: Dict[str, int]) \
+            -> numpy.ndarray:
+        """Returns a 0/1 matrix of nodes x vocabulary labels."""
+        translation = numpy.array([vocabulary[label] for label in self.label_names], dtype=numpy.int32)
+        matrix = numpy.zeros((len(offsets) - 1, len(vocabulary)), dtype=numpy.int32)
+        rows = numpy.repeat(numpy.arange(len(offsets) - 1), numpy.diff(offsets))
+        matrix[rows, translation[labels]] = 1
+        return matrix
+
+
+class LabelOverlaps:
+    """
+    The number of labels every state and every edge of one graph shares with every state and edge of the other
+    graph, which is the number of matches mapping them adds. Also contains the look-ahead score of every state pair,
+    the number of labels of adjacent edges that could match if the states were mapped.
+    """
+
+    def __init__(self, graph1: ComparisonGraph, graph2: ComparisonGraph):
+        vocabulary = {label: i for i, label in enumerate(sorted(set(graph1.label_names) | set(graph2.label_names)))}
+        state_labels1 = graph1.get_label_matrix(graph1.state_label_offsets, graph1.state_labels, vocabulary)
+        state_labels2 = graph2.get_label_matrix(graph2.state_label_offsets, graph2.state_labels, vocabulary)
+        edge_labels1 = graph1.get_label_matrix(graph1.edge_label_offsets, graph1.edge_labels, vocabulary)
+        edge_labels2 = graph2.get_label_matrix(graph2.edge_label_offsets, graph2.edge_labels, vocabulary)
+        self.states = state_labels1 @ state_labels2.T
+        self.edges = edge_labels1 @ edge_labels2.T
+
+        look_ahead = numpy.zeros_like(self.states)
+        for edge_state1, edge_state2 in [(graph1.source, graph2.source), (graph1.target, graph2.target)]:
+            adjacent_labels1 = numpy.zeros((graph1.state_count, len(vocabulary)), dtype=numpy.int32)
+            numpy.add.at(adjacent_labels1, edge_state1, edge_labels1)
+            adjacent_labels2 = numpy.zeros((graph2.state_count, len(vocabulary)), dtype=numpy.int32)
+            numpy.add.at(adjacent_labels2, edge_state2, edge_labels2)
+            look_ahead += adjacent_labels1 @ (adjacent_labels2 > 0).T.astype(numpy.int32)
+            look_ahead += ((adjacent_labels1 > 0).astype(numpy.int32) @ adjacent_labels2.T)
+        self.look_ahead = look_ahead
+
+
+def get_tie_break_overlaps(graph1: ComparisonGraph, graph2: ComparisonGraph) -> numpy.ndarray:
+    """
+    Returns the tie-break score of every state pair, 2 for regular states with the same name, 1 for other pairs of
+    regular states and 0 otherwise.
+    """
+    names = {name: i for i, name in enumerate(set(graph1.tie_break_names) | set(graph2.tie_break_names))}
+    names1 = numpy.array([-1 if name is None else names[name] for name in graph1.tie_break_names], dtype=numpy.int32)
+    names2 = numpy.array([-1 if name is None else names[name] for name in graph2.tie_break_names], dtype=numpy.int32)
+    is_regular = (names1[:, None] >= 0) & (names2[None, :] >= 0)
+    return (is_regular * (1 + (names1[:, None] == names2[None, :]))).astype(numpy.int32)
+
+
+def create_offset_arrays(values: List[List[int]]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    offsets = numpy.zeros(len(values) + 1, dtype=numpy.int32)
+    numpy.cumsum([len(value) for value in values], out=offsets[1:])
+    flat_values = numpy.array([element for value in values for element in sorted(value)], dtype=numpy.int32)
+    return offsets, flat_values
+
+
+def group_by_state(states: numpy.ndarray, edges: numpy.ndarray, state_count: int) \
+        -> Tuple[numpy.ndarray, numpy.ndarray]:
+    order = numpy.argsort(states, kind='stable')
+    offsets = numpy.zeros(state_count + 1, dtype=numpy.int32)
+    numpy.cumsum(numpy.bincount(states, minlength=state_count), out=offsets[1:])
+    return offsets, edges[order]
+
+
+def get_region_parents(hierarchy: networkx.DiGraph) -> Dict[Any, Any]:
+    """Returns the parent state, or root, of every region that is part of the hierarchy."""
+    region_parents = {}
+    parents = ['root']
+    while parents:
+        parent = parents.pop()
+        # noinspection PyArgumentList
+        for _, region in hierarchy.out_edges(parent):
+            region_parents[region] = parent
+            # noinspection PyArgumentList
+            parents.extend(state for _, state in hierarchy.out_edges(region))
+    return region_parents
+
+
+def create_comparison_graph(statechart: Statechart) -> networkx.DiGraph:
+    graph = networkx.DiGraph()
+    # noinspection PyArgumentList
+    for _, region in statechart.hierarchy.out_edges('root'):
+        # noinspection PyArgumentList
+        for _, state in statechart.hierarchy.out_edges(region):
+            build_hierarchy(statechart.hierarchy, state, statechart.hierarchy.nodes[region]['obj'].history, graph)
+
+    for transitions in statechart.transitions.values():
+        for transition in transitions:
+            labels = {'transition'}
+            for trigger in transition.specification.triggers:
+                trigger_stripped = remove_whitespace(trigger)
+                if trigger_stripped:
+                    labels.add('trigger_' + trigger_stripped)
+            for effect in transition.specification.effects:
+                effect_stripped = remove_whitespace(effect)
+                if effect_stripped:
+                    labels.add('effect_' + effect_stripped)
+            guard = transition.specification.guard
+            if guard:
+                guard_stripped = remove_whitespace(guard)
+                if guard_stripped:
+                    labels.add('guard_' + guard_stripped)
+            graph.add_node(transition.transition_id, labels=labels, source_id=transition.source_id,
+                           target_id=transition.target_id)
+
+            graph.add_edge(transition.source_id, transition.transition_id)
+            graph.add_edge(transition.transition_id, transition.target_id)
+    return graph
+
+
+def remove_labeled_nodes(graph: networkx.DiGraph, labeled_nodes: Set[Tuple[Any, str]]):
+    """
+    Removes the labels of the labeled nodes from a comparison graph. Edges without labels are removed, and so are
+    states without labels that no remaining edge connects.
+    """
+    for node, label in labeled_nodes:
+        if node in graph:
+            graph.nodes[node]['labels'].discard(label)
+    graph.remove_nodes_from([node for node, data in list(graph.nodes(data=True))
+                             if 'source_id' in data and not data['labels']])
+    graph.remove_nodes_from([node for node, data in list(graph.nodes(data=True))
+                             if 'source_id' not in data and not data.get('labels') and graph.degree(node) == 0])
+
+
+def remove_whitespace(guard):
+    return "".join(guard.split())
+
+
+def build_hierarchy(hierarchy: networkx.DiGraph, state: Any, history_type: ScHistoryType,
+                    labeled_graph: networkx.DiGraph):
+    labels = {'state'}
+    state_attributes = hierarchy.nodes[state]
+    if state_attributes['ntype'] == NodeType.STATE and hierarchy.nodes[state]['obj'].initial:
+        labels.add('initial')
+    if state_attributes['ntype'] == NodeType.FINAL:
+        labels.add('final')
+    if state_attributes['ntype'] == NodeType.CHOICE:
+        labels.add('choice')
+
+    if history_type == ScHistoryType.SHALLOW:
+        labels.update({'history', 'shallow_history'})
+    elif history_type == ScHistoryType.DEEP:
+        labels.update({'history', 'deep_history'})
+    # noinspection PyArgumentList
+    edges_to_regions = list(hierarchy.out_edges(state))
+    subregion_count = len(edges_to_regions)
+    if subregion_count != 0:
+        labels.add('composite' if subregion_count == 1 else 'orthogonal')
+        for _, region in edges_to_regions:
+            # noinspection PyArgumentList
+            for _, substate in hierarchy.out_edges(region):
+                edge_id = state + substate
+                labeled_graph.add_node(edge_id, labels={'hierarchy'}, source_id=state, target_id=substate)
+                labeled_graph.add_edge(state, edge_id)
+                labeled_graph.add_edge(edge_id, substate)
+                build_hierarchy(hierarchy, substate, hierarchy.nodes[region]['obj'].history, labeled_graph)
+
+    labeled_graph.add_node(state, labels=labels)
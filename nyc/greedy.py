@@ -0,0 +1,163 @@
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple, Optional, Sequence
+
+from nyc.budget import Budget
+from nyc.graph import ComparisonGraph
+from nyc.mappings import get_greedy_edge_mapping, EdgeMatchFunction
+
+
+class StateIndex:
+    """Per-state adjacency of a comparison graph as Python lists, which are faster to index than arrays."""
+
+    def __init__(self, graph: ComparisonGraph):
+        self.source: List[int] = graph.source.tolist()
+        self.target: List[int] = graph.target.tolist()
+        incoming_offsets = graph.incoming_offsets.tolist()
+        outgoing_offsets = graph.outgoing_offsets.tolist()
+        incoming_edges = graph.incoming_edges.tolist()
+        outgoing_edges = graph.outgoing_edges.tolist()
+        self.incoming: List[List[int]] = [incoming_edges[incoming_offsets[state]:incoming_offsets[state + 1]]
+                                          for state in range(graph.state_count)]
+        self.outgoing: List[List[int]] = [outgoing_edges[outgoing_offsets[state]:outgoing_offsets[state + 1]]
+                                          for state in range(graph.state_count)]
+        self.neighbors: List[Set[int]] = [
+            {self.source[edge] for edge in self.incoming[state]} | {self.target[edge] for edge in self.outgoing[state]}
+            for state in range(graph.state_count)
+        ]
+        self.adjacent_edges: List[List[Tuple[Tuple[int, int], int, List[int]]]] = [
+            self.group_adjacent_edges(state) for state in range(graph.state_count)
+        ]
+
+    def group_adjacent_edges(self, state: int) -> List[Tuple[Tuple[int, int], int, List[int]]]:
+        """Groups the edges of a state by source and target, together with the state at the other end."""
+        grouped_edges = defaultdict(list)
+        for edge in self.incoming[state]:
+            grouped_edges[self.source[edge], state].append(edge)
+        for edge in self.outgoing[state]:
+            if self.target[edge] != state:
+                grouped_edges[state, self.target[edge]].append(edge)
+        return [((source, target), source if target == state else target, edges)
+                for (source, target), edges in grouped_edges.items()]
+
+    def get_mapable_adjacent_edges(self, state: int, mapping: Dict[int, int]) -> Dict[Tuple[int, int], List[int]]:
+        """Returns the edges between the state and itself or a mapped state, grouped by source and target."""
+        return {source_and_target: edges for source_and_target, other_state, edges in self.adjacent_edges[state]
+                if other_state == state or other_state in mapping}
+
+
+class GreedyMatcher:
+    """
+    Greedy state matcher. Every round maps the unmapped state pair that adds the most matches,
+    ties are broken by the look-ahead score and then by node id. Candidate scores are kept in a priority
+    queue and only the candidates adjacent to the newly mapped states are rescored after each round.
+    """
+
+    def __init__(self, index1: StateIndex, index2: StateIndex, state_scores: List[List[int]],
+                 edge_overlaps: List[List[int]], look_ahead: List[List[int]], states1: Optional[Sequence[int]] = None,
+                 states2: Optional[Sequence[int]] = None, match_edges: EdgeMatchFunction = get_greedy_edge_mapping):
+        """
+        The state scores are the matches mapping two states adds on its own, indexed by the state ids of both
+        graphs. If states are given, only they are mapped and only the edges between them are scored. The edge
+        groups between mapped states are matched with match_edges.
+        """
+        self.index1 = index1
+        self.index2 = index2
+        self.states1 = range(len(index1.incoming)) if states1 is None else states1
+        self.states2 = range(len(index2.incoming)) if states2 is None else states2
+        self.state_set1 = set(self.states1)
+        self.state_set2 = set(self.states2)
+        self.state_overlaps = state_scores
+        self.edge_overlaps = edge_overlaps
+        self.look_ahead = look_ahead
+        self.match_edges = match_edges
+
+    def get_best_mapping(self, budget: Optional[Budget] = None, pool=None) \
+            -> Tuple[Tuple[Dict[int, int], Dict[int, int]], int]:
+        """
+        Returns the state and edge mapping and its match count. An exhausted budget stops after the current round,
+        the first round is always completed. If a pair pool is given, large rounds are scored on its workers.
+        """
+        state_mapping = {}
+        inverse_state_mapping = {}
+        edge_mapping = {}
+        match_count = 0
+        scores = {}
+        queue = []
+        candidates = [(state1, state2) for state1 in self.states1 for state2 in self.states2]
+        self.push_candidates(queue, scores, candidates, state_mapping, inverse_state_mapping, pool)
+        if budget is not None:
+            budget.step(len(self.states1) * len(self.states2))
+
+        while len(state_mapping) < min(len(self.states1), len(self.states2)):
+            negative_score, _, _, _, mapping_element = heapq.heappop(queue)
+            state1, state2 = mapping_element
+            score, mapping_element_edge_mapping = scores[mapping_element]
+            if state1 in state_mapping or state2 in inverse_state_mapping or score != -negative_score:
+                continue
+            match_count += score
+            state_mapping[state1] = state2
+            inverse_state_mapping[state2] = state1
+            edge_mapping.update(mapping_element_edge_mapping)
+
+            affected_candidates = self.get_affected_candidates(mapping_element, state_mapping, inverse_state_mapping)
+            self.push_candidates(queue, scores, affected_candidates, state_mapping, inverse_state_mapping, pool)
+            if budget is not None and budget.step(len(affected_candidates)):
+                break
+
+        return (state_mapping, edge_mapping), match_count
+
+    def get_affected_candidates(self, mapping_element: Tuple[int, int], state_mapping: Dict[int, int],
+                                inverse_state_mapping: Dict[int, int]) -> List[Tuple[int, int]]:
+        """Returns the unmapped state pairs whose score changes when the newly mapped element was added."""
+        state1, state2 = mapping_element
+        affected_candidates = set()
+        for neighbor in self.index1.neighbors[state1]:
+            if neighbor not in state_mapping and neighbor in self.state_set1:
+                affected_candidates.update((neighbor, state) for state in self.states2
+                                           if state not in inverse_state_mapping)
+        for neighbor in self.index2.neighbors[state2]:
+            if neighbor not in inverse_state_mapping and neighbor in self.state_set2:
+                affected_candidates.update((state, neighbor) for state in self.states1
+                                           if state not in state_mapping)
+        return list(affected_candidates)
+
+    def push_candidates(self, queue: List, scores: Dict, candidates: List[Tuple[int, int]],
+                        state_mapping: Dict[int, int], inverse_state_mapping: Dict[int, int], pool=None):
+        results = None if pool is None else \
+            pool.score_greedy_candidates(candidates, state_mapping, inverse_state_mapping)
+        if results is None:
+            results = [self.get_mapping_element_score(candidate, state_mapping, inverse_state_mapping)
+                       for candidate in candidates]
+        for candidate, (score, edge_mapping) in zip(candidates, results):
+            self.push_candidate(queue, scores, candidate, score, edge_mapping)
+
+    def push_candidate(self, queue: List, scores: Dict, mapping_element: Tuple[int, int], score: int,
+                       edge_mapping: Dict[int, int]):
+        previous_score = scores.get(mapping_element)
+        scores[mapping_element] = score, edge_mapping
+        if previous_score is not None and previous_score[0] == score:
+            return
+        state1, state2 = mapping_element
+        heapq.heappush(queue, (-score, -self.look_ahead[state1][state2], state1, state2, mapping_element))
+
+    def get_mapping_element_score(self, mapping_element: Tuple[int, int], state_mapping: Dict[int, int],
+                                  inverse_state_mapping: Dict[int, int]) -> Tuple[int, Dict[int, int]]:
+        """Returns the number of matches the mapping element adds to the mapping and the edge mapping it implies."""
+        state1, state2 = mapping_element
+        edge_mapping = {}
+        score = self.state_overlaps[state1][state2]
+
+        def map_state1(state):
+            return state2 if state == state1 else state_mapping[state]
+
+        grouped_edges1 = self.index1.get_mapable_adjacent_edges(state1, state_mapping)
+        grouped_edges2 = self.index2.get_mapable_adjacent_edges(state2, inverse_state_mapping)
+        for (source, target), edges1 in grouped_edges1.items():
+            edges2 = grouped_edges2.get((map_state1(source), map_state1(target)))
+            if edges2 is None:
+                continue
+            group_edge_mapping, group_score = self.match_edges(edges1, edges2, self.edge_overlaps)
+            score += group_score
+            edge_mapping.update(group_edge_mapping)
+        return score, edge_mapping
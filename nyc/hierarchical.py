@@ -0,0 +1,202 @@
+"""
+Hierarchical comparison engine. Instead of mapping all states of all nesting levels as one pool, the regions of
+both statecharts are matched top-down: two states are worth their own matches plus the best matching of their
+subregions, and two regions are worth the best mapping between their states. Every pair of regions is an
+independent subproblem, solved exactly if it is small enough and greedily otherwise, so nested statecharts are
+compared exactly as long as each of their regions is small. States are only mapped to states of matched regions.
+Transitions between different regions do not influence the state mapping, they are matched in a final pass over
+the resulting state mapping, together with all other edges. Both restrictions can lose matches that the exact
+search finds, so the mapping of statecharts with more than one region is only known to be the best if it reaches
+an upper bound, see Comparator.get_best_mapping_hierarchical.
+
+With a pool of workers, the subregions of every pair of top-level states are matched on the workers, and the
+top-level regions are matched with their results like in the serial run.
+"""
+
+from typing import Dict, List, Tuple, Optional
+
+from nyc.budget import Budget
+from nyc.graph import ComparisonGraph
+from nyc.greedy import GreedyMatcher, StateIndex
+from nyc.mappings import get_mappings, get_best_edge_mapping, get_greedy_edge_mapping, EdgeMatchFunction
+
+GREEDY_LIMIT = 10
+
+
+class RegionTree:
+    """The regions of a comparison graph, the states in every region and the transition groups inside them."""
+
+    def __init__(self, graph: ComparisonGraph):
+        self.region_states: List[List[int]] = [graph.get_region_states(region)
+                                               for region in range(len(graph.region_ids))]
+        self.root_regions: List[int] = []
+        self.child_regions: List[List[int]] = [[] for _ in range(graph.state_count)]
+        for region, parent in enumerate(graph.region_parents.tolist()):
+            (self.root_regions if parent < 0 else self.child_regions[parent]).append(region)
+        state_regions = {state: region for region, states in enumerate(self.region_states) for state in states}
+        self.grouped_edges = graph.get_grouped_edges()
+        self.region_groups: List[Dict[Tuple[int, int], Tuple[int, ...]]] = [{} for _ in self.region_states]
+        for (source, target), edges in self.grouped_edges.items():
+            if state_regions[source] == state_regions[target]:
+                self.region_groups[state_regions[source]][source, target] = edges
+
+
+class HierarchicalMatcher:
+    def __init__(self, graph1: ComparisonGraph, graph2: ComparisonGraph, state_overlaps: List[List[int]],
+                 edge_overlaps: List[List[int]], look_ahead: List[List[int]], tie_break: List[List[int]],
+                 match_edges_exact: EdgeMatchFunction = get_best_edge_mapping,
+                 match_edges_greedy: EdgeMatchFunction = get_greedy_edge_mapping):
+        self.tree1 = RegionTree(graph1)
+        self.tree2 = RegionTree(graph2)
+        self.index1 = StateIndex(graph1)
+        self.index2 = StateIndex(graph2)
+        self.state_overlaps = state_overlaps
+        self.edge_overlaps = edge_overlaps
+        self.look_ahead = look_ahead
+        self.tie_break = tie_break
+        self.match_edges_exact = match_edges_exact
+        self.match_edges_greedy = match_edges_greedy
+        self.is_greedy = False
+        self.subregion_results: Dict[Tuple[int, int], Tuple[int, Dict[int, int]]] = {}
+        self.region_pair_results: Dict[Tuple[int, int], Tuple[int, Dict[int, int]]] = {}
+        self.group_results: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], Tuple[Dict[int, int], int]] = {}
+        self.budget: Optional[Budget] = None
+
+    def get_best_mapping(self, budget: Optional[Budget] = None, pool=None) \
+            -> Tuple[Tuple[Dict[int, int], Dict[int, int]], int]:
+        """
+        Returns the state and edge mapping and its match count. If a pair pool is given, the subregions of the
+        top-level states are matched on its workers.
+        """
+        self.budget = budget
+        if pool is not None:
+            state_pairs = self.get_nested_state_pairs()
+            results, is_greedy = pool.match_subregions(state_pairs)
+            self.subregion_results.update(zip(state_pairs, results))
+            self.is_greedy = self.is_greedy or is_greedy
+        _, state_mapping = self.match_regions(self.tree1.root_regions, self.tree2.root_regions)
+        score = sum(self.state_overlaps[state1][state2] for state1, state2 in state_mapping.items())
+        edge_mapping = {}
+        for (source, target), edges1 in self.tree1.grouped_edges.items():
+            if source in state_mapping and target in state_mapping:
+                edges2 = self.tree2.grouped_edges.get((state_mapping[source], state_mapping[target]))
+                if edges2 is not None:
+                    group_edge_mapping, group_score = self.match_edges(edges1, edges2)
+                    edge_mapping.update(group_edge_mapping)
+                    score += group_score
+        return (state_mapping, edge_mapping), score
+
+    def is_decomposed(self) -> bool:
+        """Returns whether the regions restrict the mapping, which they do not if both statecharts are flat."""
+        return len(self.tree1.region_states) > 1 or len(self.tree2.region_states) > 1
+
+    def get_nested_state_pairs(self) -> List[Tuple[int, int]]:
+        """Returns the pairs of top-level states that both have subregions, the independent subproblems."""
+        states1 = [state for region in self.tree1.root_regions for state in self.tree1.region_states[region]
+                   if self.tree1.child_regions[state]]
+        states2 = [state for region in self.tree2.root_regions for state in self.tree2.region_states[region]
+                   if self.tree2.child_regions[state]]
+        return [(state1, state2) for state1 in states1 for state2 in states2]
+
+    def get_subregion_result(self, state1: int, state2: int) -> Tuple[int, Dict[int, int]]:
+        """Returns the score and state mapping of the best matching of the subregions of two states."""
+        result = self.subregion_results.get((state1, state2))
+        if result is None:
+            result = self.match_regions(self.tree1.child_regions[state1], self.tree2.child_regions[state2])
+            self.subregion_results[state1, state2] = result
+        return result
+
+    def get_state_pair_score(self, state1: int, state2: int) -> int:
+        """Returns the matches of two states and their best matched subregions, including their hierarchy edges."""
+        return self.state_overlaps[state1][state2] + self.get_subregion_result(state1, state2)[0]
+
+    def match_regions(self, regions1: List[int], regions2: List[int]) -> Tuple[int, Dict[int, int]]:
+        """Returns the score and state mapping of the best mapping between two sets of sibling regions."""
+        if not regions1 or not regions2:
+            return 0, {}
+        region_pair_results = {(region1, region2): self.match_region_pair(region1, region2)
+                               for region1 in regions1 for region2 in regions2}
+        if max(len(regions1), len(regions2)) <= GREEDY_LIMIT:
+            best_region_mapping, best_score = {}, -1
+            for region_mapping in get_mappings(regions1, regions2):
+                score = sum(region_pair_results[region_pair][0] for region_pair in region_mapping.items())
+                if score > best_score:
+                    best_region_mapping, best_score = region_mapping, score
+        else:
+            self.is_greedy = True
+            best_region_mapping, best_score = {}, 0
+            for region1, region2 in sorted(region_pair_results,
+                                           key=lambda region_pair: -region_pair_results[region_pair][0]):
+                if region1 not in best_region_mapping and region2 not in best_region_mapping.values():
+                    best_region_mapping[region1] = region2
+                    best_score += region_pair_results[region1, region2][0]
+        state_mapping = {}
+        for region_pair in best_region_mapping.items():
+            state_mapping.update(region_pair_results[region_pair][1])
+        return best_score, state_mapping
+
+    def match_region_pair(self, region1: int, region2: int) -> Tuple[int, Dict[int, int]]:
+        """
+        Returns the score and state mapping of the best mapping between the states of two regions and their
+        subregions. Subregions only count the matches of their own states, their hierarchy edges and the transitions
+        inside them.
+        """
+        result = self.region_pair_results.get((region1, region2))
+        if result is not None:
+            return result
+        states1 = self.tree1.region_states[region1]
+        states2 = self.tree2.region_states[region2]
+        # The hierarchy edges from the parents of nested states match as well
+        hierarchy_score = 0 if region1 in self.tree1.root_regions else 1
+        state_scores = {state1: {state2: self.get_state_pair_score(state1, state2) + hierarchy_score
+                                 for state2 in states2} for state1 in states1}
+        groups1 = self.tree1.region_groups[region1]
+        groups2 = self.tree2.region_groups[region2]
+        max_degree = max((len(edges) for groups in (groups1, groups2) for edges in groups.values()), default=0)
+        if not states1 or not states2:
+            result = 0, {}
+        elif max(len(states1), len(states2), max_degree) <= GREEDY_LIMIT:
+            result = self.match_states_exact(states1, states2, state_scores, groups1, groups2)
+        else:
+            self.is_greedy = True
+            matcher = GreedyMatcher(self.index1, self.index2, state_scores, self.edge_overlaps, self.look_ahead,
+                                    states1, states2, self.match_edges_greedy)
+            (state_mapping, _), score = matcher.get_best_mapping(self.budget)
+            result = score, state_mapping
+        state_mapping = result[1].copy()
+        for state_pair in result[1].items():
+            state_mapping.update(self.subregion_results[state_pair][1])
+        result = result[0], state_mapping
+        self.region_pair_results[region1, region2] = result
+        return result
+
+    def match_states_exact(self, states1: List[int], states2: List[int], state_scores: Dict[int, Dict[int, int]],
+                           groups1: Dict[Tuple[int, int], Tuple[int, ...]],
+                           groups2: Dict[Tuple[int, int], Tuple[int, ...]]) -> Tuple[int, Dict[int, int]]:
+        """Returns the best state mapping of a region pair, ties are broken like in the exact search."""
+        best_state_mapping, best_score, best_tie_break_score = {}, -1, -1
+        for state_mapping in get_mappings(states1, states2):
+            score = sum(state_scores[state1][state2] for state1, state2 in state_mapping.items())
+            for (source, target), edges1 in groups1.items():
+                if source in state_mapping and target in state_mapping:
+                    edges2 = groups2.get((state_mapping[source], state_mapping[target]))
+                    if edges2 is not None:
+                        score += self.match_edges(edges1, edges2)[1]
+            if score >= best_score:
+                tie_break_score = sum(self.tie_break[state1][state2] for state1, state2 in state_mapping.items())
+                if score > best_score or tie_break_score > best_tie_break_score:
+                    best_state_mapping, best_score, best_tie_break_score = state_mapping, score, tie_break_score
+            if self.budget is not None and self.budget.step():
+                break
+        return best_score, best_state_mapping
+
+    def match_edges(self, edges1: Tuple[int, ...], edges2: Tuple[int, ...]) -> Tuple[Dict[int, int], int]:
+        result = self.group_results.get((edges1, edges2))
+        if result is None:
+            if max(len(edges1), len(edges2)) <= GREEDY_LIMIT:
+                result = self.match_edges_exact(edges1, edges2, self.edge_overlaps)
+            else:
+                self.is_greedy = True
+                result = self.match_edges_greedy(edges1, edges2, self.edge_overlaps)
+            self.group_results[edges1, edges2] = result
+        return result
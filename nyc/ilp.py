@@ -0,0 +1,116 @@
+"""
+Exact mapping as a 0/1 integer program, solved with scipy.optimize.milp. There is a variable x[i, j] for every pair of
+states and a variable y[e, f] for every pair of edges that share labels. Every state and edge is mapped at most once,
+and an edge can only be mapped to an edge whose source and target are mapped to its source and target:
+
+    sum of y[e, f] over the edges f from state j  <=  x[source(e), j]      (and the same for the targets)
+    sum of y[e, f] over the edges e from state i  <=  x[i, source(f)]
+
+The objective is the number of labels the mapped states and edges share, the match count of Comparator.get_matches.
+It is weighted so that the tie-break score only decides between mappings with the same match count, like in the
+exhaustive search. scipy is only imported by this module.
+"""
+
+import math
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy
+from scipy.optimize import milp, LinearConstraint, Bounds
+from scipy.sparse import coo_matrix
+
+from nyc.budget import Budget
+from nyc.graph import ComparisonGraph
+
+DEFAULT_TIME_LIMIT = 60.0
+
+
+class Solution:
+    def __init__(self, state_mapping: Dict[int, int], edge_mapping: Dict[int, int], score: int, upper_bound: int,
+                 is_optimal: bool):
+        self.state_mapping = state_mapping
+        self.edge_mapping = edge_mapping
+        self.score = score
+        self.upper_bound = upper_bound
+        self.is_optimal = is_optimal
+
+
+def solve(graph1: ComparisonGraph, graph2: ComparisonGraph, state_overlaps: numpy.ndarray,
+          edge_overlaps: numpy.ndarray, tie_break: numpy.ndarray, budget: Optional[Budget] = None) -> Solution:
+    """
+    Returns the best mapping the solver finds and an upper bound of the match count. The time limit is the rest of
+    the time budget or DEFAULT_TIME_LIMIT, the steps of the budget limit the branch-and-bound nodes.
+    """
+    state_count1, state_count2 = state_overlaps.shape
+    state_pairs = state_count1 * state_count2
+    edges1, edges2 = numpy.nonzero(edge_overlaps)
+    variable_count = state_pairs + len(edges1)
+    # Every match outweighs the largest possible tie-break score
+    weight = 2 * min(state_count1, state_count2) + 1
+    objective = -numpy.concatenate(((weight * state_overlaps + tie_break).ravel(),
+                                    weight * edge_overlaps[edges1, edges2])).astype(float)
+
+    rows, columns, values, upper_bounds = [], [], [], []
+
+    def add_sum_rows(row_keys: numpy.ndarray, variables: numpy.ndarray, upper_bound: float) \
+            -> Tuple[numpy.ndarray, int]:
+        """Adds a row per distinct key that sums the variables of the key, returns the keys and their first row."""
+        first_row = sum(len(bounds) for bounds in upper_bounds)
+        keys, key_rows = numpy.unique(row_keys, return_inverse=True)
+        rows.append(first_row + key_rows)
+        columns.append(variables)
+        values.append(numpy.ones(len(variables)))
+        upper_bounds.append(numpy.full(len(keys), upper_bound))
+        return keys, first_row
+
+    state_variables = numpy.arange(state_pairs)
+    add_sum_rows(state_variables // state_count2, state_variables, 1)
+    add_sum_rows(state_variables % state_count2, state_variables, 1)
+    edge_variables = state_pairs + numpy.arange(len(edges1))
+    add_sum_rows(edges2, edge_variables, 1)
+    for states1, states2 in [(graph1.source, graph2.source), (graph1.target, graph2.target)]:
+        # Keys are pairs of an edge of the first graph and a state of the second graph
+        keys, first_row = add_sum_rows(edges1.astype(numpy.int64) * state_count2 + states2[edges2], edge_variables, 0)
+        rows.append(first_row + numpy.arange(len(keys)))
+        columns.append(states1[keys // state_count2].astype(numpy.int64) * state_count2 + keys % state_count2)
+        values.append(numpy.full(len(keys), -1.0))
+        # The same for pairs of an edge of the second graph and a state of the first graph, which tightens the bound
+        keys, first_row = add_sum_rows(edges2.astype(numpy.int64) * state_count1 + states1[edges1], edge_variables, 0)
+        rows.append(first_row + numpy.arange(len(keys)))
+        columns.append(keys % state_count1 * state_count2 + states2[keys // state_count1])
+        values.append(numpy.full(len(keys), -1.0))
+    upper_bounds = numpy.concatenate(upper_bounds)
+    matrix = coo_matrix((numpy.concatenate(values), (numpy.concatenate(rows), numpy.concatenate(columns))),
+                        shape=(len(upper_bounds), variable_count)).tocsr()
+
+    options = {'time_limit': get_time_limit(budget), 'mip_rel_gap': 0}
+    if budget is not None and budget.steps is not None:
+        options['node_limit'] = max(1, budget.steps - budget.used_steps)
+    result = milp(objective, integrality=numpy.ones(variable_count), bounds=Bounds(0, 1),
+                  constraints=LinearConstraint(matrix, -numpy.inf, upper_bounds), options=options)
+    if budget is not None:
+        budget.step(getattr(result, 'mip_node_count', None) or 0)
+
+    state_mapping, edge_mapping = {}, {}
+    if result.x is not None:
+        chosen = result.x > 0.5
+        state_mapping = {int(variable // state_count2): int(variable % state_count2)
+                         for variable in numpy.flatnonzero(chosen[:state_pairs])}
+        edge_mapping = {int(edges1[pair]): int(edges2[pair]) for pair in numpy.flatnonzero(chosen[state_pairs:])}
+    score = int(sum(state_overlaps[state1, state2] for state1, state2 in state_mapping.items()) +
+                sum(edge_overlaps[edge1, edge2] for edge1, edge2 in edge_mapping.items()))
+    is_optimal = result.status == 0
+    dual_bound = getattr(result, 'mip_dual_bound', None)
+    if is_optimal:
+        upper_bound = score
+    elif dual_bound is None or not math.isfinite(dual_bound):
+        upper_bound = min(graph1.labeled_node_count, graph2.labeled_node_count)
+    else:
+        upper_bound = max(score, math.floor(-dual_bound / weight + 1e-9))
+    return Solution(state_mapping, edge_mapping, score, upper_bound, is_optimal)
+
+
+def get_time_limit(budget: Optional[Budget]) -> float:
+    if budget is None or budget.seconds is None:
+        return DEFAULT_TIME_LIMIT
+    return max(0.0, budget.deadline - time.monotonic())
@@ -0,0 +1,186 @@
+"""
+Streaming loader for YAKINDU statecharts. It builds the same hierarchy and transitions as
+yak_parser's StatechartParser, but reads the file incrementally (like iterparse) and stops after the statechart
+element, so the diagram notation is never read, and it skips the definition section, which the comparison does not
+use. No ElementTree of the document is built either.
+
+The loader still produces a yak_parser Statechart rather than the inputs of ComparisonGraph: the preprocessor
+rewrites the hierarchy and the transitions of the Statechart, the summaries of the results are taken from it and
+the comparison graphs are only built after preprocessing, so every statechart passes through this form anyway.
+Specifications are parsed here like StatechartParser parses them, without its parsing methods.
+"""
+
+import re
+from typing import Dict, List, Optional, Iterator, Tuple
+from xml.etree.ElementTree import XMLPullParser, Element
+
+from yak_parser.Statechart import Statechart, NodeType, ScHistoryType, ScState, ScRegion, ScFinalState, \
+    ScTransition, ScSpecification
+
+SGRAPH_STATECHART = '{http://www.yakindu.org/sct/sgraph/2.0.0}Statechart'
+XMI_ID = '{http://www.omg.org/XMI}id'
+XSI_TYPE = '{http://www.w3.org/2001/XMLSchema-instance}type'
+CHUNK_SIZE = 4096
+# trigger [guard] / effect, as in StatechartParser
+SPECIFICATION_PATTERN = re.compile(r'([^\[\]/]*)\s*(\[[^\[\]/]+])?\s*(/[^\[\]/]+)?')
+
+
+class RegionFrame:
+    def __init__(self, region_id: str, region_name: Optional[str], region: ScRegion):
+        self.region_id = region_id
+        self.region_name = region_name
+        self.region = region
+        self.initial_id: Optional[str] = None
+        self.has_entry = False
+        self.states: Dict[str, ScState] = {}
+
+
+class VertexFrame:
+    def __init__(self, vertex_type: str, vertex_id: str):
+        self.vertex_type = vertex_type
+        self.vertex_id = vertex_id
+        self.transitions: List[ScTransition] = []
+        self.entry_target: Optional[str] = None
+
+
+def load(path) -> Statechart:
+    """Loads the statechart of a .ysc or .sct file. The definition section is not parsed."""
+    statechart = Statechart()
+    statechart.hierarchy.add_node('root', ntype=NodeType.ROOT)
+    stack = []
+    in_statechart = False
+    for event, element in iterate_events(path):
+        if element.tag == SGRAPH_STATECHART:
+            if event == 'end':
+                return statechart
+            in_statechart = True
+            continue
+        if not in_statechart:
+            continue
+
+        if event == 'start':
+            if element.tag == 'regions':
+                stack.append(start_region(element, get_parent_id(stack), statechart))
+            elif element.tag == 'vertices':
+                stack.append(start_vertex(element, stack[-1], statechart))
+            elif element.tag == 'outgoingTransitions' and isinstance(stack[-1], VertexFrame):
+                vertex = stack[-1]
+                if vertex.vertex_type == 'sgraph:Entry':
+                    if vertex.entry_target is None:
+                        vertex.entry_target = element.attrib['target']
+                elif vertex.vertex_type == 'sgraph:State':
+                    vertex.transitions.append(parse_transition(element, vertex.vertex_id))
+        elif element.tag == 'regions':
+            end_region(stack.pop())
+            element.clear()
+        elif element.tag == 'vertices':
+            end_vertex(stack.pop(), stack[-1], statechart)
+            element.clear()
+    raise AssertionError('No statechart element found!')
+
+
+def iterate_events(path) -> Iterator[Tuple[str, Element]]:
+    """Like iterparse, but reads small chunks, so little is parsed beyond the point where the caller stops."""
+    source = open(path, 'rb') if isinstance(path, str) else path
+    try:
+        pull_parser = XMLPullParser(events=('start', 'end'))
+        while True:
+            data = source.read(CHUNK_SIZE)
+            if not data:
+                break
+            pull_parser.feed(data)
+            yield from pull_parser.read_events()
+        pull_parser.close()
+        yield from pull_parser.read_events()
+    finally:
+        if source is not path:
+            source.close()
+
+
+def get_parent_id(stack: List) -> str:
+    return 'root' if len(stack) == 0 else stack[-1].vertex_id
+
+
+def start_region(element, parent_id: str, statechart: Statechart) -> RegionFrame:
+    region_name = element.get('name')
+    region_id = element.attrib[XMI_ID]
+    # Argument order as in StatechartParser.parse_region
+    region = ScRegion(region_name, region_id)
+    statechart.hierarchy.add_node(region_id, label=region_name, ntype=NodeType.REGION, obj=region, shape='box')
+    statechart.hierarchy.add_edge(parent_id, region_id)
+    return RegionFrame(region_id, region_name, region)
+
+
+def start_vertex(element, region_frame: RegionFrame, statechart: Statechart) -> VertexFrame:
+    vertex_type = element.attrib[XSI_TYPE]
+    vertex_id = element.attrib[XMI_ID]
+    region_id = region_frame.region_id
+    if vertex_type == 'sgraph:Entry':
+        if not region_frame.has_entry:
+            region_frame.region.history = get_history_type(element, region_frame.region_name)
+    elif vertex_type == 'sgraph:State':
+        state = ScState(state_id=vertex_id, name=element.attrib['name'])
+        if 'specification' in element.attrib:
+            for specification in element.attrib['specification'].split('\r\n'):
+                state.specifications.append(parse_specification(specification))
+        statechart.hierarchy.add_node(vertex_id, label=state.name, obj=state, ntype=NodeType.STATE)
+        statechart.hierarchy.add_edge(region_id, vertex_id)
+        region_frame.states[vertex_id] = state
+    elif vertex_type == 'sgraph:FinalState':
+        statechart.hierarchy.add_node(vertex_id, label='Final', obj=ScFinalState(state_id=vertex_id),
+                                      ntype=NodeType.FINAL, peripheries=2)
+        statechart.hierarchy.add_edge(region_id, vertex_id)
+    else:
+        raise ValueError('Region "%s" contains vertex of unsupported type "%s".'
+                         % (region_frame.region_name, vertex_type))
+    return VertexFrame(vertex_type, vertex_id)
+
+
+def parse_transition(element, source_id: str) -> ScTransition:
+    return ScTransition(transition_id=element.attrib[XMI_ID], source_id=source_id, target_id=element.attrib['target'],
+                        specification=parse_specification(element.get('specification', '')))
+
+
+def parse_specification(text: str) -> ScSpecification:
+    """Parses the specification of a state or transition: triggers, a guard in brackets and effects after a slash."""
+    specification = ScSpecification()
+    if len(text.strip()) == 0:
+        return specification
+    match = SPECIFICATION_PATTERN.match(text.strip())
+    assert match is not None, 'Could not parse specification "%s": regex does not match.' % text
+    triggers, guard, effects = match.groups()
+    if guard is not None:
+        specification.guard = guard[1:-1]
+    if triggers:
+        specification.triggers.update(trigger.strip() for trigger in triggers.split(','))
+    if effects is not None:
+        specification.effects.update(effect.strip() for effect in effects[1:].split(';'))
+    return specification
+
+
+def get_history_type(element, region_name: Optional[str]) -> ScHistoryType:
+    vertex_kind = element.get('kind')
+    if vertex_kind is None:
+        return ScHistoryType.NONE
+    elif vertex_kind == 'DEEP_HISTORY':
+        return ScHistoryType.DEEP
+    elif vertex_kind == 'SHALLOW_HISTORY':
+        return ScHistoryType.SHALLOW
+    raise ValueError('Region "%s" contains entry of unsupported kind "%s".' % (region_name, vertex_kind))
+
+
+def end_vertex(vertex: VertexFrame, region_frame: RegionFrame, statechart: Statechart):
+    if vertex.vertex_type == 'sgraph:Entry':
+        if not region_frame.has_entry:
+            assert vertex.entry_target is not None, \
+                'Region "%s" contains entry vertex without outgoing transition!' % region_frame.region_name
+            region_frame.has_entry = True
+            region_frame.initial_id = vertex.entry_target
+    elif vertex.transitions:
+        statechart.transitions[vertex.vertex_id].extend(vertex.transitions)
+
+
+def end_region(region_frame: RegionFrame):
+    initial_state = region_frame.states.get(region_frame.initial_id)
+    if initial_state is not None:
+        initial_state.initial = True
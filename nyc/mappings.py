@@ -0,0 +1,66 @@
+import itertools
+from typing import List, Tuple, Any, Dict, Iterator, Collection, Optional, Sequence, Callable
+
+from nyc.budget import Budget
+
+EdgeMatchFunction = Callable[[Sequence[int], Sequence[int], List[List[int]]], Tuple[Dict[int, int], int]]
+
+
+def get_mappings(list1: Collection[Any], list2: Collection[Any]) -> List[Dict[Any, Any]]:
+    return list(iterate_mappings(list1, list2))
+
+
+def iterate_mappings(list1: Collection[Any], list2: Collection[Any]) -> Iterator[Dict[Any, Any]]:
+    element_count = min(len(list1), len(list2))
+    list1_permutations = itertools.permutations(list1, element_count)
+    list2_combinations = list(itertools.combinations(list2, element_count))
+    return (
+        dict(zip(permutation, combination))
+        for permutation in list1_permutations
+        for combination in list2_combinations
+    )
+
+
+def maxima(iterable: Iterator[Any], key, budget: Optional[Budget] = None) -> Tuple[List[Any], float]:
+    """Returns the elements with the highest key in iteration order and the key. Only they are kept in memory."""
+    best_elements, max_score = [], None
+    for element in iterable:
+        score = key(element)
+        if max_score is None or score > max_score:
+            best_elements, max_score = [element], score
+        elif score == max_score:
+            best_elements.append(element)
+        if budget is not None and budget.step():
+            break
+    return best_elements, max_score
+
+
+def get_best_edge_mapping(edges1: Sequence[int], edges2: Sequence[int], edge_overlaps: List[List[int]]) \
+        -> Tuple[Dict[int, int], int]:
+    """
+    Returns the first of the mappings between two edge groups with the most matches, in the order of get_mappings.
+    """
+    best_mapping, best_score = {}, -1
+    for mapping in get_mappings(edges1, edges2):
+        score = sum(edge_overlaps[edge1][edge2] for edge1, edge2 in mapping.items())
+        if score > best_score:
+            best_mapping, best_score = mapping, score
+    return best_mapping, best_score
+
+
+def get_greedy_edge_mapping(edges1: Sequence[int], edges2: Sequence[int], edge_overlaps: List[List[int]]) \
+        -> Tuple[Dict[int, int], int]:
+    """Pairs the edges of two groups greedily, the pair with the most matches first."""
+    mapping, score = {}, 0
+    unmapped_edges1 = list(edges1)
+    unmapped_edges2 = list(edges2)
+    while min(len(unmapped_edges1), len(unmapped_edges2)) > 0:
+        edge_score, edge1, edge2 = max(
+            ((edge_overlaps[edge1][edge2], edge1, edge2) for edge1 in unmapped_edges1 for edge2 in unmapped_edges2),
+            key=lambda scored_edge_mapping_element: scored_edge_mapping_element[0]
+        )
+        score += edge_score
+        mapping[edge1] = edge2
+        unmapped_edges1.remove(edge1)
+        unmapped_edges2.remove(edge2)
+    return mapping, score
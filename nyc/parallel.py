@@ -0,0 +1,204 @@
+"""
+Intra-pair parallelism. A single large comparison is split across a pool of worker processes that each hold a copy
+of the comparator:
+
+- The exact search is partitioned on the states the first states of the first graph are mapped to. Every worker
+  scores the mappings of one prefix in NumPy blocks, within the candidate domains of the comparator, and the best
+  mappings of the prefixes are merged by score, tie-break score and their position in the serial order, so ties are
+  broken exactly like in the serial search. The workers share the best score found so far, starting with the score
+  of the greedy mapping, and skip prefixes whose mappings cannot reach it: every mapping scores at most half the
+  sum of the pair bounds of domains.get_pair_bounds. Without candidate domains, which already leave out the pairs
+  that cannot reach the greedy score, blocks are skipped the same way. Mappings with the best score are never
+  skipped, so the result stays the same.
+- The greedy algorithm scores the candidates of every round in chunks on the workers. Candidates are ordered by
+  score, look-ahead and state ids in the queue, so the rounds pick the same pairs as the serial run.
+- The hierarchical engine matches the subregions of the pairs of top-level states in chunks on the workers. They
+  are independent subproblems, so the top-level regions are matched with the same results as in the serial run.
+
+Every worker only builds the matcher or scorer its tasks need, the first time it needs it.
+"""
+
+import itertools
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple, Optional
+
+import numpy
+
+from nyc import domains
+from nyc.batch import iterate_domain_blocks, search_blocks
+
+worker_comparator = None
+worker_best_score = None
+worker_matcher = None
+worker_hierarchical_matcher = None
+worker_scorer = None
+worker_pair_bounds = None
+
+CHUNKS_PER_WORKER = 4
+MIN_PARALLEL_CANDIDATES = 1000
+
+
+def initialize_worker(comparator, best_score):
+    global worker_comparator, worker_best_score
+    worker_comparator = comparator
+    worker_best_score = best_score
+
+
+def get_allowed(comparator) -> numpy.ndarray:
+    """Returns the allowed state pairs of the comparator, all of them if it has no candidate domains."""
+    if comparator.domains is not None:
+        return comparator.domains
+    return numpy.ones((comparator.comparison_graph1.state_count, comparator.comparison_graph2.state_count),
+                      dtype=bool)
+
+
+def iterate_prefixes(allowed: numpy.ndarray, prefix_length: int) -> Iterator[Tuple[int, ...]]:
+    """
+    Yields the states the first states of the first graph can be mapped to within the allowed state pairs, -1 for
+    unmapped states, which are only possible if the first graph is larger.
+    """
+    state_count1, state_count2 = allowed.shape
+    max_unmapped_count = max(0, state_count1 - state_count2)
+    for prefix in itertools.product(range(-1, state_count2), repeat=prefix_length):
+        mapped_states = [state2 for state2 in prefix if state2 >= 0]
+        if len(set(mapped_states)) == len(mapped_states) and \
+                prefix_length - len(mapped_states) <= max_unmapped_count and \
+                all(state2 < 0 or allowed[state1, state2] for state1, state2 in enumerate(prefix)):
+            yield prefix
+
+
+def search_prefix(prefix: Tuple[int, ...]) -> Optional[Tuple[Dict[int, int], int, int, Tuple[int, ...]]]:
+    """
+    Searches the state mappings that start with the prefix, see batch.search_blocks. Returns the best mapping, its
+    score, tie-break score and position in the serial order, or None if the prefix has no mappings.
+    """
+    global worker_scorer, worker_pair_bounds
+    if worker_scorer is None:
+        worker_scorer = worker_comparator.create_block_scorer()
+        # The last column belongs to unmapped states, which index it with -1
+        bounds = domains.get_pair_bounds(worker_comparator.comparison_graph1, worker_comparator.comparison_graph2,
+                                         worker_comparator.overlaps)
+        worker_pair_bounds = numpy.zeros((bounds.shape[0], bounds.shape[1] + 1), dtype=numpy.int64)
+        worker_pair_bounds[:, :-1] = bounds
+    allowed = get_allowed(worker_comparator)
+    if get_prefix_bound(worker_pair_bounds, allowed, prefix) < 2 * worker_best_score.value:
+        return None
+    blocks = iterate_domain_blocks(allowed, prefix=prefix)
+    if worker_comparator.domains is None:
+        blocks = prune_blocks(blocks, worker_pair_bounds)
+    result = search_blocks(worker_scorer, worker_comparator.get_tie_break_array(),
+                           worker_comparator.comparison_graph2.state_count, blocks)
+    if result is not None:
+        with worker_best_score.get_lock():
+            worker_best_score.value = max(worker_best_score.value, result[1])
+    return result
+
+
+def get_prefix_bound(pair_bounds: numpy.ndarray, allowed: numpy.ndarray, prefix: Tuple[int, ...]) -> int:
+    """
+    Returns twice the most a mapping that starts with the prefix can score: the bounds of the pairs of the prefix and
+    the highest allowed bound of every other state of the first graph.
+    """
+    states = numpy.arange(len(prefix), dtype=numpy.int64)
+    remaining_bounds = numpy.where(allowed[len(prefix):], pair_bounds[len(prefix):, :-1], 0)
+    return int(pair_bounds[states, list(prefix)].sum()) + int(remaining_bounds.max(axis=1, initial=0).sum())
+
+
+def prune_blocks(blocks: Iterator[numpy.ndarray], pair_bounds: numpy.ndarray) -> Iterator[numpy.ndarray]:
+    """Leaves out the blocks none of whose mappings can reach the best score the workers found so far."""
+    states = numpy.arange(pair_bounds.shape[0])
+    for block in blocks:
+        if int(pair_bounds[states, block].sum(axis=1).max(initial=0)) >= 2 * worker_best_score.value:
+            yield block
+
+
+def score_candidates(candidates: List[Tuple[int, int]], state_mapping: Dict[int, int],
+                     inverse_state_mapping: Dict[int, int]) -> List[Tuple[int, Dict[int, int]]]:
+    global worker_matcher
+    if worker_matcher is None:
+        worker_matcher = worker_comparator.create_greedy_matcher()
+    return [worker_matcher.get_mapping_element_score(candidate, state_mapping, inverse_state_mapping)
+            for candidate in candidates]
+
+
+def match_subregions(state_pairs: List[Tuple[int, int]]) -> Tuple[List[Tuple[int, Dict[int, int]]], bool]:
+    """Returns the subregion results of the state pairs and whether a subregion was matched greedily."""
+    global worker_hierarchical_matcher
+    if worker_hierarchical_matcher is None:
+        worker_hierarchical_matcher = worker_comparator.create_hierarchical_matcher()
+    results = [worker_hierarchical_matcher.get_subregion_result(state1, state2) for state1, state2 in state_pairs]
+    return results, worker_hierarchical_matcher.is_greedy
+
+
+class PairPool:
+    """Worker processes for the comparison of one pair."""
+
+    def __init__(self, comparator, workers: int):
+        self.comparator = comparator
+        self.workers = workers
+        self.best_score = multiprocessing.Value('q', -1)
+        self.executor = ProcessPoolExecutor(workers, initializer=initialize_worker,
+                                            initargs=(comparator, self.best_score))
+        self.allowed = get_allowed(comparator)
+
+    def __enter__(self) -> 'PairPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.executor.shutdown()
+
+    def get_best_state_mapping_exact(self) -> Tuple[Dict[int, int], int]:
+        """Returns the state mapping the serial exact search picks and its score."""
+        state_count1, state_count2 = self.allowed.shape
+        # Two mapped states per prefix if one gives too few jobs to balance the workers
+        prefix_length = min(state_count1, 1 if state_count2 + 1 >= self.workers * CHUNKS_PER_WORKER else 2)
+        # The greedy mapping maps as many states as the exact search within the domains, which always contain it
+        _, greedy_score = self.comparator.get_best_mapping_greedy()
+        with self.best_score.get_lock():
+            self.best_score.value = greedy_score
+        futures = [self.executor.submit(search_prefix, prefix)
+                   for prefix in iterate_prefixes(self.allowed, prefix_length)]
+        best_result = None
+        for future in futures:
+            result = future.result()
+            if result is None:
+                continue
+            _, score, tie_break_score, order_key = result
+            if best_result is None or (score, tie_break_score) > best_result[1:3] or \
+                    (score, tie_break_score) == best_result[1:3] and order_key < best_result[3]:
+                best_result = result
+        if best_result is None:
+            return {}, 0
+        best_state_mapping, best_score, _, _ = best_result
+        return best_state_mapping, best_score
+
+    def score_greedy_candidates(self, candidates: List[Tuple[int, int]], state_mapping: Dict[int, int],
+                                inverse_state_mapping: Dict[int, int]) -> Optional[List[Tuple[int, Dict[int, int]]]]:
+        """Scores the candidates of a greedy round on the workers, returns None if there are too few."""
+        if not candidates or len(candidates) < MIN_PARALLEL_CANDIDATES:
+            return None
+        chunk_size = math.ceil(len(candidates) / (self.workers * CHUNKS_PER_WORKER))
+        futures = [self.executor.submit(score_candidates, candidates[i:i + chunk_size], state_mapping,
+                                        inverse_state_mapping)
+                   for i in range(0, len(candidates), chunk_size)]
+        return [result for future in futures for result in future.result()]
+
+    def match_subregions(self, state_pairs: List[Tuple[int, int]]) \
+            -> Tuple[List[Tuple[int, Dict[int, int]]], bool]:
+        """
+        Matches the subregions of the state pairs on the workers, returns their results and whether a subregion was
+        matched greedily.
+        """
+        if not state_pairs:
+            return [], False
+        chunk_size = math.ceil(len(state_pairs) / (self.workers * CHUNKS_PER_WORKER))
+        futures = [self.executor.submit(match_subregions, state_pairs[i:i + chunk_size])
+                   for i in range(0, len(state_pairs), chunk_size)]
+        results, is_greedy = [], False
+        for future in futures:
+            chunk_results, chunk_is_greedy = future.result()
+            results.extend(chunk_results)
+            is_greedy = is_greedy or chunk_is_greedy
+        return results, is_greedy
@@ -0,0 +1,138 @@
+"""
+Pipelined comparison of a corpus. The statecharts are parsed and preprocessed by the workers that also compare them,
+and the pairs of a tile are scheduled as soon as both of its blocks of statecharts are ready, so the first
+comparisons start while the rest of the corpus is still loading. Loading is held back while the queue of tiles is
+full, which bounds the work in flight.
+"""
+
+import itertools
+import math
+from collections import deque
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Tuple, Optional, Union
+
+from tqdm import tqdm
+from yak_parser.Statechart import Statechart
+
+from nyc.edge_memo import EdgeGroupMemo
+from nyc.graph import ComparisonGraph
+from nyc.result import StatechartSummary
+from nyc.tiling import Tile
+
+TILES_IN_FLIGHT_PER_WORKER = 2
+
+
+def load_statechart(path: str, streaming: bool = False, template_graph: Optional[ComparisonGraph] = None) \
+        -> Tuple[Union[Statechart, ComparisonGraph], StatechartSummary]:
+    """
+    Parses and preprocesses a statechart. With a template, the comparison graph of the statechart without the
+    template is returned instead of the statechart. Raises ValueError if it cannot be parsed.
+    """
+    from yak_parser.StatechartParser import StatechartParser
+    from nyc import loader, snapshot, template
+    statechart = loader.load(path) if streaming else StatechartParser().parse(path=path)
+    summary = snapshot.preprocess(statechart)
+    if template_graph is not None:
+        return template.subtract(template_graph, statechart), summary
+    return statechart, summary
+
+
+class Pipeline:
+    """
+    Compares all pairs of the statecharts at the paths and every statechart at the paths with every archive
+    statechart. Statechart i of the paths belongs to block i // tile_size; the archive blocks follow the blocks of
+    the paths and are ready from the start. With a memo, compare_function returns the results of a tile together
+    with the update of the memo of its worker, see edge_memo.compare_tile, and the updates are merged into the memo.
+    """
+
+    def __init__(self, paths: List[str], archive_statecharts: List[Tuple[str, Statechart]], tile_size: int,
+                 executor: Executor, workers: int,
+                 load_function: Callable[[str], Tuple[Union[Statechart, ComparisonGraph], StatechartSummary]],
+                 compare_function: Callable[[Tile], list], memo: Optional[EdgeGroupMemo] = None):
+        self.paths = paths
+        self.tile_size = tile_size
+        self.executor = executor
+        self.workers = workers
+        self.load_function = load_function
+        self.compare_function = compare_function
+        self.memo = memo
+        self.archive_offset = math.ceil(len(paths) / tile_size) * tile_size
+        self.statecharts: Dict[int, Tuple[str, Statechart]] = {
+            self.archive_offset + i: named_statechart for i, named_statechart in enumerate(archive_statecharts)}
+        self.summaries: Dict[str, StatechartSummary] = {}
+        self.unloaded_counts = [min(tile_size, len(paths) - block * tile_size)
+                                for block in range(self.archive_offset // tile_size)]
+        self.ready_blocks: List[int] = []
+        self.archive_blocks = sorted({index // tile_size for index in self.statecharts})
+        self.waiting_tiles = deque()
+        self.results = {}
+
+    def run(self, **tqdm_arguments) -> List[Tuple[str, str, object]]:
+        """
+        Returns the results in the order of the pairs of the loaded statecharts, all pairs of the paths first and then
+        the pairs with the archive, like a comparison that loads everything first.
+        """
+        archive_indexes = sorted(self.statecharts)
+        pair_count = len(self.paths) * (len(self.paths) - 1) // 2 + len(self.paths) * len(archive_indexes)
+        loads, tiles = {}, {}
+        next_path = 0
+        with tqdm(total=pair_count, **tqdm_arguments) as progress:
+            while next_path < len(self.paths) or loads or tiles or self.waiting_tiles:
+                max_tiles = self.workers * TILES_IN_FLIGHT_PER_WORKER
+                while self.waiting_tiles and len(tiles) < max_tiles:
+                    tile = self.waiting_tiles.popleft()
+                    tiles[self.executor.submit(self.compare_function, tile)] = tile
+                while next_path < len(self.paths) and len(loads) < self.workers and not self.waiting_tiles \
+                        and len(tiles) < max_tiles:
+                    loads[self.executor.submit(self.load_function, self.paths[next_path])] = next_path
+                    next_path += 1
+                done, _ = wait(list(loads) + list(tiles), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in loads:
+                        self.add_statechart(loads.pop(future), future)
+                    else:
+                        tile = tiles.pop(future)
+                        tile_results = future.result()
+                        if self.memo is not None:
+                            tile_results, update = tile_results
+                            self.memo.merge(update)
+                        self.results.update(zip(tile.pairs, tile_results))
+                        progress.update(len(tile.pairs))
+        indexes = sorted(index for index in self.statecharts if index < self.archive_offset)
+        pairs = itertools.chain(itertools.combinations(indexes, 2), itertools.product(indexes, archive_indexes))
+        return [self.results[pair] for pair in pairs]
+
+    def get_named_statecharts(self) -> List[Tuple[str, Statechart]]:
+        """Returns the loaded statecharts of the paths."""
+        return [self.statecharts[index] for index in sorted(self.statecharts) if index < self.archive_offset]
+
+    def add_statechart(self, index: int, future):
+        path = self.paths[index]
+        try:
+            statechart, summary = future.result()
+            self.statecharts[index] = (path, statechart)
+            self.summaries[path] = summary
+        except ValueError as err:
+            print(f'Skipped {path}: {err}')
+        block = index // self.tile_size
+        self.unloaded_counts[block] -= 1
+        if self.unloaded_counts[block] == 0:
+            self.ready_blocks.append(block)
+            for other_block in self.ready_blocks:
+                self.add_tile(min(block, other_block), max(block, other_block))
+            for archive_block in self.archive_blocks:
+                self.add_tile(block, archive_block)
+
+    def add_tile(self, block1: int, block2: int):
+        indexes1 = self.get_block_indexes(block1)
+        if block1 == block2:
+            pairs = list(itertools.combinations(indexes1, 2))
+        else:
+            pairs = list(itertools.product(indexes1, self.get_block_indexes(block2)))
+        if pairs:
+            self.waiting_tiles.append(
+                Tile({index: self.statecharts[index] for pair in pairs for index in pair}, pairs))
+
+    def get_block_indexes(self, block: int) -> List[int]:
+        return [index for index in range(block * self.tile_size, (block + 1) * self.tile_size)
+                if index in self.statecharts]
@@ -0,0 +1,90 @@
+"""
+Classes stored in comparison result files. They only hold built-in types and this module imports nothing but the
+standard library, so result files can be unpickled without yak_parser, NetworkX or NumPy.
+"""
+
+from typing import Any, Dict, List, Set, Tuple
+
+
+class Diff:
+    def __init__(self, matches: Dict[Tuple[Any, Any], Set[str]], additions: Dict[Any, Set[str]],
+                 deletions: Dict[Any, Set[str]]):
+        self.matches = matches
+        self.additions = additions
+        self.deletions = deletions
+
+    def __eq__(self, other) -> bool:
+        return self.matches == other.matches and \
+               self.additions == other.additions and \
+               self.deletions == other.deletions
+
+
+class ComparisonResult:
+    def __init__(self, diff: Diff, similarity_: float, single_similarity0: float, single_similarity1: float,
+                 state_similarity: float, is_greedy: bool, is_partial: bool = False, gap: float = 0.0,
+                 beam_width: int = 0, seconds: float = 0.0):
+        self.diff = diff
+        self.similarity = similarity_
+        self.single_similarity0 = single_similarity0
+        self.single_similarity1 = single_similarity1
+        self.state_similarity = state_similarity
+        self.is_greedy = is_greedy
+        self.is_partial = is_partial
+        # Share of the best possible match count the mapping may miss, only above 0 for partial ILP results
+        self.gap = gap
+        # Width of the beam search, 0 if another engine compared the pair
+        self.beam_width = beam_width
+        self.seconds = seconds
+
+    @property
+    def max_similarity(self) -> float:
+        return max(self.single_similarity0, self.single_similarity1)
+
+
+class TransitionSummary:
+    def __init__(self, transition_id: str, source_id: str, target_id: str, specification: str):
+        self.transition_id = transition_id
+        self.source_id = source_id
+        self.target_id = target_id
+        self.specification = specification
+
+
+class StatechartSummary:
+    """
+    The names and transitions of a statechart before preprocessing and what preprocessing removed, which is all the
+    matches command shows of it.
+    """
+
+    def __init__(self, names: Dict[str, str], transitions: Dict[str, TransitionSummary]):
+        self.names = names
+        self.transitions = transitions
+        self.unreachable_states: List[str] = []
+        self.removed_nesting_states: List[str] = []
+        self.removed_duplicate_transitions: List[TransitionSummary] = []
+
+    def get_name(self, id_: str) -> str:
+        return self.names[id_]
+
+    def set_preprocessing_result(self, preprocessing_result):
+        self.unreachable_states = list(preprocessing_result.unreachable_states)
+        self.removed_nesting_states = list(preprocessing_result.removed_nesting_states)
+        self.removed_duplicate_transitions = [summarize_transition(transition) for transition in
+                                              preprocessing_result.removed_duplicate_transitions]
+
+
+def summarize(statechart) -> StatechartSummary:
+    """Summarizes a yak_parser statechart, call it before preprocessing the statechart."""
+    names = {}
+    for node in statechart.hierarchy.nodes:
+        try:
+            names[node] = statechart.get_name(node)
+        except (KeyError, AttributeError):
+            pass
+    transitions = {transition.transition_id: summarize_transition(transition)
+                   for source_transitions in statechart.transitions.values() for transition in source_transitions}
+    return StatechartSummary(names, transitions)
+
+
+def summarize_transition(transition) -> TransitionSummary:
+    return TransitionSummary(transition.transition_id, transition.source_id, transition.target_id,
+                             str(transition.specification))
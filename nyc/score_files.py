@@ -0,0 +1,108 @@
+"""
+Layout of the score column files and a reader that does not need NumPy. The list command reads the columns with this
+reader and only imports NumPy to filter them, so it starts without it and never builds the pickled results; commands
+that compute on whole columns memory-map them with nyc.scores.
+"""
+
+import array
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+GREEDY = 1
+PARTIAL = 2
+COLUMNS = ['chart1', 'chart2', 'similarity', 'single_similarity0', 'single_similarity1', 'state_similarity', 'flags',
+           'beam_width', 'seconds']
+DTYPES = {'chart1': 'i4', 'chart2': 'i4', 'similarity': 'f8', 'single_similarity0': 'f8',
+          'single_similarity1': 'f8', 'state_similarity': 'f8', 'flags': 'u1', 'beam_width': 'u4', 'seconds': 'f8'}
+# Results saved before the beam width became 'u4' store it as 'u2'
+TYPECODES = {'i4': 'i', 'i8': 'q', 'f8': 'd', 'u1': 'B', 'u2': 'H', 'u4': 'I'}
+NPY_MAGIC = b'\x93NUMPY'
+NPY_HEADER = re.compile(r"'descr':\s*'([<>|=])(\w+)'.*'shape':\s*\((\d+),?\)")
+
+
+def get_directory(result_filename: str) -> str:
+    return result_filename + '.scores'
+
+
+def get_path(result_filename: str, column: str) -> str:
+    return os.path.join(get_directory(result_filename), f'{column}.npy')
+
+
+def is_current(result_filename: str) -> bool:
+    """Returns whether all score columns were saved and are not older than the result file."""
+    flags_path = get_path(result_filename, 'flags')
+    return all(os.path.exists(get_path(result_filename, column)) for column in COLUMNS) and \
+        os.path.getmtime(flags_path) >= os.path.getmtime(result_filename)
+
+
+def create_columns(comparison_result: List[Tuple[Any, Any, Any]]) -> Dict[str, list]:
+    """Returns the paths of all statecharts and the score columns of a comparison result as lists."""
+    paths = sorted({path for path1, path2, _ in comparison_result for path in (path1, path2)})
+    chart_indexes = {path: i for i, path in enumerate(paths)}
+    return {
+        'paths': paths,
+        'chart1': [chart_indexes[path1] for path1, _, _ in comparison_result],
+        'chart2': [chart_indexes[path2] for _, path2, _ in comparison_result],
+        'similarity': [result.similarity for _, _, result in comparison_result],
+        'single_similarity0': [result.single_similarity0 for _, _, result in comparison_result],
+        'single_similarity1': [result.single_similarity1 for _, _, result in comparison_result],
+        'state_similarity': [result.state_similarity for _, _, result in comparison_result],
+        'flags': [(GREEDY if result.is_greedy else 0) | (PARTIAL if result.is_partial else 0)
+                  for _, _, result in comparison_result],
+        # Results saved before the beam engine have neither
+        'beam_width': [getattr(result, 'beam_width', 0) for _, _, result in comparison_result],
+        'seconds': [getattr(result, 'seconds', 0.0) for _, _, result in comparison_result]
+    }
+
+
+def load(result_filename: str) -> Optional[Dict[str, Sequence]]:
+    """Reads the paths and score columns of a result file. Returns None if they are missing or outdated."""
+    if not is_current(result_filename):
+        return None
+    return {column: read_array(get_path(result_filename, column)) for column in ['paths'] + COLUMNS}
+
+
+def filter_rows(columns: Dict[str, Sequence], threshold: float, max_threshold: float, state_threshold: float) \
+        -> List[int]:
+    """
+    Returns the rows that reach at least one of the thresholds, like ScoreColumns.filter. The columns read by
+    read_array are filtered by NumPy without copying them.
+    """
+    import numpy
+    similarity, single_similarity0, single_similarity1, state_similarity = (
+        numpy.frombuffer(values, dtype=numpy.float64) if isinstance(values, array.array)
+        else numpy.asarray(values, dtype=numpy.float64)
+        for values in (columns['similarity'], columns['single_similarity0'], columns['single_similarity1'],
+                       columns['state_similarity']))
+    return numpy.flatnonzero((similarity >= threshold) |
+                             (numpy.maximum(single_similarity0, single_similarity1) >= max_threshold) |
+                             (state_similarity >= state_threshold)).tolist()
+
+
+def read_array(path: str) -> Sequence:
+    """
+    Reads a one-dimensional array saved by numpy.save. Numbers are returned as an array.array, strings as a list.
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(NPY_MAGIC)) != NPY_MAGIC:
+            raise ValueError(f'{path} is not a .npy file')
+        major_version = file.read(2)[0]
+        header_length = int.from_bytes(file.read(2 if major_version == 1 else 4), 'little')
+        header = NPY_HEADER.search(file.read(header_length).decode('latin1'))
+        data = file.read()
+    if header is None:
+        raise ValueError(f'{path} does not contain a one-dimensional array')
+    byte_order, dtype, length = header.group(1), header.group(2), int(header.group(3))
+    is_swapped = byte_order == ('>' if sys.byteorder == 'little' else '<')
+    if dtype.startswith('U'):
+        width = int(dtype[1:])
+        text = data.decode('utf-32-be' if byte_order == '>' else 'utf-32-le')
+        return [text[i:i + width].rstrip('\0') for i in range(0, len(text), width)] if width > 0 \
+            else [''] * length
+    values = array.array(TYPECODES[dtype])
+    values.frombytes(data)
+    if is_swapped:
+        values.byteswap()
+    return values
@@ -0,0 +1,92 @@
+"""
+Columnar similarity scores of a comparison result. compare and merge save them next to the result file as NumPy
+arrays in a ``<result file>.scores`` directory, one row per compared pair in the order of the result file. The
+arrays are memory-mapped when loaded, so exporting a run reads neither the pickled diffs nor the statecharts. The
+list command reads them with nyc.score_files, which does not need NumPy.
+"""
+
+import os
+from typing import List, Tuple, Any, Optional
+
+import numpy
+
+from nyc.score_files import GREEDY, PARTIAL, COLUMNS, DTYPES, create_columns, get_directory, get_path, is_current
+
+
+class ScoreColumns:
+    def __init__(self, paths: numpy.ndarray, chart1: numpy.ndarray, chart2: numpy.ndarray,
+                 similarity: numpy.ndarray, single_similarity0: numpy.ndarray, single_similarity1: numpy.ndarray,
+                 state_similarity: numpy.ndarray, flags: numpy.ndarray, beam_width: numpy.ndarray,
+                 seconds: numpy.ndarray):
+        self.paths = paths
+        self.chart1 = chart1
+        self.chart2 = chart2
+        self.similarity = similarity
+        self.single_similarity0 = single_similarity0
+        self.single_similarity1 = single_similarity1
+        self.state_similarity = state_similarity
+        self.flags = flags
+        self.beam_width = beam_width
+        self.seconds = seconds
+
+    def __len__(self) -> int:
+        return len(self.similarity)
+
+    @property
+    def max_similarity(self) -> numpy.ndarray:
+        return numpy.maximum(self.single_similarity0, self.single_similarity1)
+
+    @property
+    def is_greedy(self) -> numpy.ndarray:
+        return (self.flags & GREEDY) != 0
+
+    @property
+    def is_partial(self) -> numpy.ndarray:
+        return (self.flags & PARTIAL) != 0
+
+    def filter(self, threshold: float, max_threshold: float, state_threshold: float) -> numpy.ndarray:
+        """Returns the rows that reach at least one of the thresholds."""
+        return numpy.flatnonzero((self.similarity >= threshold) | (self.max_similarity >= max_threshold) |
+                                 (self.state_similarity >= state_threshold))
+
+    def get_chart_maxima(self, scores: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Returns the highest score of every statechart and the row it was reached in, -1 for statecharts without
+        compared pairs. Of equal scores, the one of the first row is used.
+        """
+        charts = numpy.concatenate((self.chart1, self.chart2))
+        rows = numpy.concatenate((numpy.arange(len(self)), numpy.arange(len(self))))
+        order = numpy.lexsort((-rows, scores[rows], charts))
+        is_last = numpy.ones(len(order), dtype=bool)
+        is_last[:-1] = charts[order][1:] != charts[order][:-1]
+        best_rows = numpy.full(len(self.paths), -1, dtype=numpy.int64)
+        best_rows[charts[order][is_last]] = rows[order][is_last]
+        maxima = numpy.full(len(self.paths), numpy.nan)
+        has_pairs = best_rows >= 0
+        maxima[has_pairs] = scores[best_rows[has_pairs]]
+        return maxima, best_rows
+
+
+def create_score_columns(comparison_result: List[Tuple[Any, Any, Any]]) -> ScoreColumns:
+    columns = create_columns(comparison_result)
+    return ScoreColumns(paths=numpy.array(columns['paths'], dtype=str),
+                        **{column: numpy.array(columns[column], dtype=DTYPES[column]) for column in COLUMNS})
+
+
+def save(score_columns: ScoreColumns, result_filename: str):
+    os.makedirs(get_directory(result_filename), exist_ok=True)
+    numpy.save(get_path(result_filename, 'paths'), score_columns.paths)
+    for column in COLUMNS:
+        numpy.save(get_path(result_filename, column), getattr(score_columns, column))
+
+
+def load(result_filename: str) -> Optional[ScoreColumns]:
+    """
+    Memory-maps the score columns of a result file. Returns None if they were not saved or are older than the result
+    file.
+    """
+    if not is_current(result_filename):
+        return None
+    paths = numpy.load(get_path(result_filename, 'paths'))
+    return ScoreColumns(paths, **{column: numpy.load(get_path(result_filename, column), mmap_mode='r')
+                                  for column in COLUMNS})
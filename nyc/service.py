@@ -0,0 +1,241 @@
+"""
+Long-running comparison service. The corpus is parsed, preprocessed and converted into comparison graphs once and
+kept in memory, uploaded statecharts are compared against all of it by a pool of worker processes. The workers get
+a copy of the corpus when they start; later changes are numbered and sent along with every comparison, and every
+worker applies those it has not seen yet. After too many changes the pool is replaced by one with the current corpus.
+The service speaks HTTP on a localhost port or a Unix socket:
+
+    GET    /charts          list the statecharts of the corpus
+    PUT    /charts/<name>   add or replace a statechart, the body is the .ysc/.sct file
+    DELETE /charts/<name>   remove a statechart
+    POST   /compare         compare the statechart in the body against the corpus, ?limit=n keeps the n best results
+"""
+
+import io
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse, parse_qs, unquote
+
+from yak_parser.Statechart import Statechart
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import preprocessor
+from nyc.budget import Budget
+from nyc.comparator import Comparator
+from nyc.graph import ComparisonGraph
+
+MAX_CORPUS_CHANGES = 64
+
+# A change is its version, the path and the new comparison graph or None if the statechart was removed
+CorpusChange = Tuple[int, str, Optional[ComparisonGraph]]
+
+worker_corpus: Dict[str, ComparisonGraph] = {}
+worker_version = 0
+
+
+def initialize_worker(comparison_graphs: Dict[str, ComparisonGraph], version: int):
+    global worker_corpus, worker_version
+    worker_corpus = comparison_graphs
+    worker_version = version
+
+
+def apply_changes(changes: List[CorpusChange]):
+    """Applies the changes of the corpus this worker has not seen yet, the changes are in version order."""
+    global worker_version
+    for version, path, comparison_graph in changes:
+        if version > worker_version:
+            if comparison_graph is None:
+                worker_corpus.pop(path, None)
+            else:
+                worker_corpus[path] = comparison_graph
+            worker_version = version
+
+
+def create_comparison_graph(statechart: Union[Statechart, ComparisonGraph]) -> ComparisonGraph:
+    """Preprocesses the statechart and returns its comparison graph, comparison graphs are returned as they are."""
+    if isinstance(statechart, ComparisonGraph):
+        return statechart
+    preprocessor.process(statechart)
+    return ComparisonGraph(statechart)
+
+
+def compare_with_corpus(comparison_graph: ComparisonGraph, paths: List[str], changes: List[CorpusChange],
+                        time_budget: Optional[float], step_budget: Optional[int]) -> List[Dict]:
+    apply_changes(changes)
+    results = []
+    for path in paths:
+        budget = None if time_budget is None and step_budget is None else Budget(time_budget, step_budget)
+        result = Comparator(comparison_graph, worker_corpus[path]).compare(budget)
+        results.append({
+            'path': path,
+            'similarity': result.similarity,
+            'max_similarity': result.max_similarity,
+            'state_similarity': result.state_similarity,
+            'is_greedy': result.is_greedy,
+            'is_partial': result.is_partial,
+            'gap': result.gap
+        })
+    return results
+
+
+class ComparisonService:
+    def __init__(self, workers: int, time_budget: Optional[float] = None, step_budget: Optional[int] = None):
+        self.workers = workers
+        self.time_budget = time_budget
+        self.step_budget = step_budget
+        self.comparison_graphs: Dict[str, ComparisonGraph] = {}
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # The version of the corpus and its changes since the workers of the executor started
+        self.version = 0
+        self.changes: List[CorpusChange] = []
+        self.lock = threading.Lock()
+
+    def add_statechart(self, path: str, statechart: Union[Statechart, ComparisonGraph]):
+        """Preprocesses the statechart and adds it to the corpus."""
+        comparison_graph = create_comparison_graph(statechart)
+        with self.lock:
+            self.comparison_graphs[path] = comparison_graph
+            self.add_change(path, comparison_graph)
+
+    def remove_statechart(self, path: str) -> bool:
+        with self.lock:
+            if self.comparison_graphs.pop(path, None) is None:
+                return False
+            self.add_change(path, None)
+            return True
+
+    def add_change(self, path: str, comparison_graph: Optional[ComparisonGraph]):
+        """Records a change of the corpus for the running workers, called with the lock held."""
+        self.version += 1
+        if self.executor is not None:
+            self.changes.append((self.version, path, comparison_graph))
+            if len(self.changes) > MAX_CORPUS_CHANGES:
+                self.invalidate_executor()
+
+    def get_paths(self) -> List[str]:
+        with self.lock:
+            return sorted(self.comparison_graphs)
+
+    def compare(self, statechart: Union[Statechart, ComparisonGraph], limit: Optional[int] = None) -> List[Dict]:
+        """Compares the statechart against every statechart of the corpus, the most similar ones first."""
+        comparison_graph = create_comparison_graph(statechart)
+        # Submitted with the lock held, so no change of the corpus shuts the executor down in between; the submitted
+        # comparisons finish even if it is shut down later
+        with self.lock:
+            paths = sorted(self.comparison_graphs)
+            executor = self.get_executor()
+            chunk_count = min(len(paths), self.workers * 4)
+            futures = [
+                executor.submit(compare_with_corpus, comparison_graph, paths[i::chunk_count], list(self.changes),
+                                self.time_budget, self.step_budget)
+                for i in range(chunk_count)
+            ]
+        results = [result for future in futures for result in future.result()]
+        results.sort(key=lambda result: result['similarity'] * result['max_similarity'] * result['state_similarity'],
+                     reverse=True)
+        return results if limit is None else results[:limit]
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=initialize_worker,
+                                                initargs=(dict(self.comparison_graphs), self.version))
+            self.changes = []
+        return self.executor
+
+    def invalidate_executor(self):
+        """
+        Replaces the workers on the next comparison, e.g. when the changes they would have to catch up with grow too
+        long. Comparisons already submitted to them still finish.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+            self.changes = []
+
+    def shutdown(self):
+        with self.lock:
+            self.invalidate_executor()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urlparse(self.path).path != '/charts':
+            return self.send_json(404, {'error': 'Not found'})
+        self.send_json(200, {'charts': self.server.service.get_paths()})
+
+    def do_PUT(self):
+        name = self.get_chart_name()
+        if name is None:
+            return self.send_json(404, {'error': 'Not found'})
+        comparison_graph = self.read_comparison_graph()
+        if comparison_graph is not None:
+            self.server.service.add_statechart(name, comparison_graph)
+            self.send_json(200, {'added': name})
+
+    def do_DELETE(self):
+        name = self.get_chart_name()
+        if name is None or not self.server.service.remove_statechart(name):
+            return self.send_json(404, {'error': 'Not found'})
+        self.send_json(200, {'removed': name})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/compare':
+            return self.send_json(404, {'error': 'Not found'})
+        limit = parse_qs(url.query).get('limit', [None])[0]
+        if limit is not None and not limit.isdigit():
+            return self.send_json(400, {'error': 'Invalid limit'})
+        comparison_graph = self.read_comparison_graph()
+        if comparison_graph is not None:
+            results = self.server.service.compare(comparison_graph, None if limit is None else int(limit))
+            self.send_json(200, {'results': results})
+
+    def get_chart_name(self) -> Optional[str]:
+        path = urlparse(self.path).path
+        if not path.startswith('/charts/') or len(path) == len('/charts/'):
+            return None
+        return unquote(path[len('/charts/'):])
+
+    def read_comparison_graph(self) -> Optional[ComparisonGraph]:
+        """
+        Parses and preprocesses the statechart of the body. Statecharts that the parser accepts can still break the
+        preprocessor or the comparison graph, so any error answers the request with 400.
+        """
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            return create_comparison_graph(StatechartParser().parse(path=io.BytesIO(body)))
+        except Exception as err:
+            self.send_json(400, {'error': f'Invalid statechart: {err}'})
+            return None
+
+    def send_json(self, status: int, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        return self.client_address[0] if self.client_address else 'unix'
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(service: ComparisonService, host: str = '127.0.0.1', port: int = 8765,
+                  socket_path: Optional[str] = None):
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, RequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.service = service
+    return server
@@ -0,0 +1,52 @@
+import heapq
+import math
+from typing import List, Tuple, Any
+
+from nyc.comparator import Comparator
+from nyc.graph import ComparisonGraph
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f'Invalid shard "{value}", expected the form i/n')
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f'Invalid shard "{value}", expected 1 <= i <= n')
+    return index, count
+
+
+def assign_shards(costs: List[float], count: int) -> List[int]:
+    """
+    Deterministically assigns the pairs to ``count`` shards of roughly equal estimated cost (longest processing time
+    first) and returns the 0-based shard of every pair.
+    """
+    loads = [(0.0, shard) for shard in range(count)]
+    shards = [0] * len(costs)
+    for pair_index in sorted(range(len(costs)), key=lambda i: (-costs[i], i)):
+        load, shard = heapq.heappop(loads)
+        shards[pair_index] = shard
+        heapq.heappush(loads, (load + costs[pair_index], shard))
+    return shards
+
+
+def get_shard(pairs: List[Tuple[Any, Any]], costs: List[float], index: int, count: int) -> List[Tuple[Any, Any]]:
+    """Returns the pairs of the shard ``index`` (1-based), see assign_shards, in their original order."""
+    return [pair for pair, shard in zip(pairs, assign_shards(costs, count)) if shard == index - 1]
+
+
+def estimate_cost(graph1: ComparisonGraph, graph2: ComparisonGraph, strictness: int = 0) -> float:
+    """
+    Estimates the cost of comparing two graphs with the auto engine from the number of mappings it scores. The
+    comparator decides whether the pair is searched greedily or exactly, within its candidate domains if it has any.
+    """
+    comparator = Comparator(graph1, graph2, strictness=strictness)
+    state_count1, state_count2 = graph1.state_count, graph2.state_count
+    element_count = min(state_count1, state_count2)
+    if comparator.uses_greedy():
+        mapping_count = state_count1 * state_count2 * element_count
+    elif comparator.get_domains() is not None:
+        mapping_count = comparator.domain_mapping_count
+    else:
+        mapping_count = math.perm(state_count1, element_count) * math.comb(state_count2, element_count)
+    return mapping_count * (state_count1 + state_count2 + graph1.edge_count + graph2.edge_count)
@@ -0,0 +1,39 @@
+"""
+Preprocessed snapshots of a statechart archive. compare --against compares new statecharts with an archive of
+earlier ones; the snapshot holds the preprocessed archive statecharts and their summaries, so the archive is neither
+parsed nor preprocessed again.
+"""
+
+import pickle
+from typing import Dict, List, Tuple
+
+from yak_parser.Statechart import Statechart
+
+from nyc import preprocessor
+from nyc.result import StatechartSummary, summarize
+
+
+class Snapshot:
+    def __init__(self, statecharts: List[Tuple[str, Statechart]], summaries: Dict[str, StatechartSummary]):
+        self.statecharts = statecharts
+        self.summaries = summaries
+
+
+def preprocess(statechart: Statechart) -> StatechartSummary:
+    """Preprocesses the statechart in place and returns its summary, which describes it before preprocessing."""
+    summary = summarize(statechart)
+    summary.set_preprocessing_result(preprocessor.process(statechart))
+    return summary
+
+
+def save(snapshot: Snapshot, path: str):
+    with open(path, 'wb') as snapshot_file:
+        pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(path: str) -> Snapshot:
+    with open(path, 'rb') as snapshot_file:
+        snapshot = pickle.load(snapshot_file)
+    if not isinstance(snapshot, Snapshot):
+        raise ValueError(f'{path} is not a statechart snapshot')
+    return snapshot
@@ -0,0 +1,32 @@
+"""
+Subtraction of a template, e.g. the starter statechart of an assignment, from the statecharts of a corpus. Every
+statechart is compared with the template once; the labels of its states and edges that the template matches are
+left out of its comparison graph, so the pairwise comparisons only search and score what was added to the template.
+"""
+
+from typing import Any, Set, Tuple
+
+from yak_parser.Statechart import Statechart
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import loader, preprocessor
+from nyc.comparator import Comparator
+from nyc.graph import ComparisonGraph
+
+
+def load(path: str, streaming: bool = False) -> ComparisonGraph:
+    """Parses and preprocesses the template like the statecharts it is subtracted from."""
+    statechart = loader.load(path) if streaming else StatechartParser().parse(path=path)
+    preprocessor.process(statechart)
+    return ComparisonGraph(statechart)
+
+
+def get_template_matches(template: ComparisonGraph, statechart: Statechart) -> Set[Tuple[Any, str]]:
+    """Returns the labeled nodes of the statechart that the template matches."""
+    diff = Comparator(template, statechart).compare().diff
+    return {(statechart_id, label) for (_, statechart_id), labels in diff.matches.items() for label in labels}
+
+
+def subtract(template: ComparisonGraph, statechart: Statechart) -> ComparisonGraph:
+    """Returns the comparison graph of the statechart without the labels the template matches."""
+    return ComparisonGraph(statechart, get_template_matches(template, statechart))
@@ -0,0 +1,67 @@
+"""
+Tiled pair scheduling. The statecharts are numbered and the pair (i, j) belongs to the tile (i // size, j // size),
+so a tile covers a block of rows and a block of columns of the pair matrix. Workers receive whole tiles, build the
+comparison graph of every statechart of a tile once and reuse it for all pairs of the tile. A worker holds the
+graphs of one tile at a time, at most 2 * size of them.
+"""
+
+import math
+from typing import Dict, List, Tuple, Optional, Sequence
+
+from yak_parser.Statechart import Statechart
+
+from nyc.budget import Budget
+from nyc.comparator import Comparator, ComparisonResult
+from nyc.edge_memo import EdgeGroupMemo
+from nyc.graph import ComparisonGraph
+
+MAX_TILE_SIZE = 32
+TILES_PER_WORKER = 4
+
+
+class Tile:
+    def __init__(self, statecharts: Dict[int, Tuple[str, Statechart]], pairs: List[Tuple[int, int]]):
+        self.statecharts = statecharts
+        self.pairs = pairs
+
+
+def get_tile_size(statechart_count: int, workers: int, max_tile_size: int = MAX_TILE_SIZE) -> int:
+    """Returns the largest tile size up to the maximum that still gives every worker several tiles."""
+    tile_size = max_tile_size
+    while tile_size > 1 and get_tile_count(statechart_count, tile_size) < workers * TILES_PER_WORKER:
+        tile_size //= 2
+    return tile_size
+
+
+def get_tile_count(statechart_count: int, tile_size: int) -> int:
+    """Returns the number of tiles of all pairs of the statecharts."""
+    blocks = math.ceil(statechart_count / tile_size)
+    return blocks * (blocks + 1) // 2
+
+
+def create_tiles(named_statecharts: Sequence[Tuple[str, Statechart]], pairs: List[Tuple[int, int]],
+                 tile_size: int) -> List[Tile]:
+    """Groups pairs of statechart indexes into tiles, the pairs of a tile keep their order."""
+    tile_pairs: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for index1, index2 in pairs:
+        tile_pairs.setdefault((index1 // tile_size, index2 // tile_size), []).append((index1, index2))
+    return [Tile({index: named_statecharts[index] for pair in pairs_ for index in pair}, pairs_)
+            for pairs_ in tile_pairs.values()]
+
+
+def compare_tile(tile: Tile, time_budget: Optional[float] = None, step_budget: Optional[int] = None,
+                 engine: str = 'auto', memo: Optional[EdgeGroupMemo] = None, beam_width: Optional[int] = None,
+                 strictness: int = 0) -> List[Tuple[str, str, ComparisonResult]]:
+    """
+    Compares the pairs of the tile like compare_pair, the comparison graph of each statechart is built once. The edge
+    groups of all pairs are matched with the memo if one is given.
+    """
+    comparison_graphs = {index: statechart if isinstance(statechart, ComparisonGraph) else ComparisonGraph(statechart)
+                         for index, (_, statechart) in tile.statecharts.items()}
+    results = []
+    for index1, index2 in tile.pairs:
+        budget = None if time_budget is None and step_budget is None else Budget(time_budget, step_budget)
+        comparator = Comparator(comparison_graphs[index1], comparison_graphs[index2], memo, strictness)
+        comparison_result = comparator.compare(budget, engine, beam_width=beam_width)
+        results.append((tile.statecharts[index1][0], tile.statecharts[index2][0], comparison_result))
+    return results
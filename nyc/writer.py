@@ -0,0 +1,91 @@
+"""
+Writes statecharts as YAKINDU .ysc files that StatechartParser and the streaming loader read back into the same
+hierarchy, transitions and event definitions. The diagram notation is not written.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import List
+
+from yak_parser.Statechart import Statechart, NodeType, ScHistoryType, ScEventType
+
+NAMESPACES = {'xmi': 'http://www.omg.org/XMI', 'xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+              'sgraph': 'http://www.yakindu.org/sct/sgraph/2.0.0'}
+XMI_ID = f'{{{NAMESPACES["xmi"]}}}id'
+XSI_TYPE = f'{{{NAMESPACES["xsi"]}}}type'
+ENTRY_KINDS = {ScHistoryType.SHALLOW: 'SHALLOW_HISTORY', ScHistoryType.DEEP: 'DEEP_HISTORY'}
+
+for prefix, uri in NAMESPACES.items():
+    ET.register_namespace(prefix, uri)
+
+
+def write(statechart: Statechart, path: str, name: str = 'statechart'):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(to_xml(statechart, name))
+
+
+def to_xml(statechart: Statechart, name: str = 'statechart') -> str:
+    """Returns the .ysc document of the statechart. Raises ValueError for choices, which the parser cannot read."""
+    document = ET.Element(f'{{{NAMESPACES["xmi"]}}}XMI', {f'{{{NAMESPACES["xmi"]}}}version': '2.0'})
+    statechart_element = ET.SubElement(document, f'{{{NAMESPACES["sgraph"]}}}Statechart', {
+        XMI_ID: '_statechart', 'specification': get_definition(statechart), 'name': name})
+    for region_id in statechart.hierarchy.successors('root'):
+        add_region(statechart, statechart_element, region_id)
+    ET.indent(document, '  ')
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(document, encoding='unicode') + '\n'
+
+
+def get_definition(statechart: Statechart) -> str:
+    lines = []
+    for interface, events in statechart.definition.events.items():
+        if interface == 'internal':
+            lines.append('internal:')
+        else:
+            lines.append(f'interface {interface}:' if interface else 'interface:')
+        for event in events.values():
+            direction = {ScEventType.INPUT: 'in ', ScEventType.OUTPUT: 'out '}.get(event.e_type, '')
+            lines.append(f'\t{direction}event {event.name}')
+    return '\n'.join(lines)
+
+
+def add_region(statechart: Statechart, parent: ET.Element, region_id: str):
+    node = statechart.hierarchy.nodes[region_id]
+    attributes = {XMI_ID: region_id}
+    if node.get('label') is not None:
+        attributes['name'] = node['label']
+    region_element = ET.SubElement(parent, 'regions', attributes)
+    children = list(statechart.hierarchy.successors(region_id))
+    initial_ids = [child for child in children if statechart.hierarchy.nodes[child]['ntype'] == NodeType.STATE
+                   and statechart.hierarchy.nodes[child]['obj'].initial]
+    if initial_ids:
+        entry_attributes = {XSI_TYPE: 'sgraph:Entry', XMI_ID: f'{region_id}_entry', 'name': ''}
+        history = node['obj'].history if node.get('obj') is not None else ScHistoryType.NONE
+        if history in ENTRY_KINDS:
+            entry_attributes['kind'] = ENTRY_KINDS[history]
+        entry_element = ET.SubElement(region_element, 'vertices', entry_attributes)
+        ET.SubElement(entry_element, 'outgoingTransitions', {XMI_ID: f'{region_id}_entry_transition',
+                                                             'target': initial_ids[0]})
+    for child in children:
+        add_vertex(statechart, region_element, child)
+
+
+def add_vertex(statechart: Statechart, region_element: ET.Element, vertex_id: str):
+    node = statechart.hierarchy.nodes[vertex_id]
+    if node['ntype'] == NodeType.FINAL:
+        ET.SubElement(region_element, 'vertices', {XSI_TYPE: 'sgraph:FinalState', XMI_ID: vertex_id})
+        return
+    if node['ntype'] != NodeType.STATE:
+        raise ValueError(f'Vertex {vertex_id} of type {node["ntype"].name} cannot be written')
+    state = node['obj']
+    attributes = {XSI_TYPE: 'sgraph:State', XMI_ID: vertex_id, 'name': state.name}
+    specifications: List[str] = [str(specification) for specification in state.specifications]
+    if specifications:
+        attributes['specification'] = '\r\n'.join(specifications)
+    state_element = ET.SubElement(region_element, 'vertices', attributes)
+    for region_id in statechart.hierarchy.successors(vertex_id):
+        add_region(statechart, state_element, region_id)
+    for transition in statechart.transitions.get(vertex_id, []):
+        transition_attributes = {XMI_ID: transition.transition_id, 'target': transition.target_id}
+        specification = str(transition.specification)
+        if specification:
+            transition_attributes['specification'] = specification
+        ET.SubElement(state_element, 'outgoingTransitions', transition_attributes)
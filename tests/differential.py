@@ -0,0 +1,265 @@
+"""
+Differential testing of the comparison engines. Random small statechart pairs are compared by the reference, the
+exhaustive comparison of the original comparator in reference.py, and by the engines; a pair fails an engine if the
+similarities or the diff differ or if the engine raises. Failing pairs are shrunk to a pair that still fails by
+removing elements one at a time and can be written as .ysc fixtures.
+"""
+
+import copy
+import math
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple, Iterator
+
+from yak_parser.Statechart import Statechart, NodeType, ScState, ScRegion, ScFinalState, ScTransition, \
+    ScSpecification
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import preprocessor, writer
+from nyc.comparator import Comparator, ComparisonResult
+from tests import reference
+
+STATE_NAMES = ['A', 'B', 'C', 'D']
+TRIGGERS = ['e1', 'e2', 'e3', 'after 1 s']
+GUARDS = ['x > 0', 'y']
+EFFECTS = ['x += 1', 'raise o1']
+FIELDS = ['similarity', 'max_similarity', 'state_similarity', 'diff']
+ERROR = 'error'
+
+
+def compare_greedy(comparator: Comparator) -> ComparisonResult:
+    best_mapping, score = comparator.get_best_mapping_greedy()
+    return comparator.create_result(best_mapping, score, True, False)
+
+
+def compare_ilp(comparator: Comparator) -> ComparisonResult:
+    best_mapping, score, _ = comparator.get_best_mapping_ilp()
+    return comparator.create_result(best_mapping, score, False, False)
+
+
+ENGINES: Dict[str, Callable[[Comparator], ComparisonResult]] = {
+    'auto': lambda comparator: comparator.compare(),
+    'hierarchical': lambda comparator: comparator.compare(engine='hierarchical'),
+    'greedy': compare_greedy,
+    'ilp': compare_ilp,
+    'beam': lambda comparator: comparator.compare(engine='beam'),
+    'parallel': lambda comparator: comparator.compare(workers=2)
+}
+
+
+def get_mismatches(expected: ComparisonResult, actual: ComparisonResult) -> List[str]:
+    """Returns the fields of the results that differ."""
+    return [field for field in FIELDS if
+            (getattr(expected, field) != getattr(actual, field) if field == 'diff'
+             else not math.isclose(getattr(expected, field), getattr(actual, field), abs_tol=1e-12))]
+
+
+class Run:
+    """The results and times of the reference and the engines on one pair."""
+
+    def __init__(self, reference_time: float, mismatches: Dict[str, List[str]], times: Dict[str, float],
+                 errors: Dict[str, Exception]):
+        self.reference_time = reference_time
+        self.mismatches = mismatches
+        self.times = times
+        self.errors = errors
+
+
+def run_pair(statechart1: Statechart, statechart2: Statechart, engines: List[str]) -> Run:
+    """
+    Preprocesses copies of the statecharts like compare and runs the reference and the engines on them. The times
+    of the engines are those of the searches, without building the comparison graphs, the time of the reference
+    includes building its graphs. An engine that raises, also while building its comparison graphs, fails with the
+    error field and its exception is kept; errors of the preprocessor or the reference are raised.
+    """
+    statechart1, statechart2 = copy.deepcopy(statechart1), copy.deepcopy(statechart2)
+    preprocessor.process(statechart1)
+    preprocessor.process(statechart2)
+    start = time.perf_counter()
+    expected = reference.compare(statechart1, statechart2)
+    reference_time = time.perf_counter() - start
+    mismatches, times, errors = {}, {}, {}
+    for engine in engines:
+        start = time.perf_counter()
+        try:
+            # Every engine gets its own comparator, so none of them profits from the caches of another
+            comparator = Comparator(statechart1, statechart2)
+            start = time.perf_counter()
+            actual = ENGINES[engine](comparator)
+        except Exception as err:
+            times[engine] = time.perf_counter() - start
+            mismatches[engine], errors[engine] = [ERROR], err
+            continue
+        times[engine] = time.perf_counter() - start
+        mismatches[engine] = get_mismatches(expected, actual)
+    return Run(reference_time, mismatches, times, errors)
+
+
+def generate_pair(rng: random.Random, max_states: int = 4) -> Tuple[Statechart, Statechart]:
+    """Returns a random statechart and either a mutated copy of it or another random statechart."""
+    statechart1 = generate_statechart(rng, max_states)
+    if rng.random() < 0.5:
+        return statechart1, generate_statechart(rng, max_states)
+    statechart2 = copy.deepcopy(statechart1)
+    for _ in range(rng.randint(1, 3)):
+        mutate(statechart2, rng)
+    return statechart1, statechart2
+
+
+def generate_statechart(rng: random.Random, max_states: int = 4) -> Statechart:
+    """Returns a random statechart with up to max_states states, some of them composite, and final states."""
+    statechart = Statechart()
+    statechart.hierarchy.add_node('root', ntype=NodeType.ROOT)
+    main_region = add_region(statechart, 'root', 'main region')
+    states = [add_state(statechart, main_region, rng.choice(STATE_NAMES), initial=True)]
+    for _ in range(rng.randint(0, max_states - 1)):
+        if rng.random() < 0.25 and len(states) > 0:
+            parent = rng.choice(states)
+            regions = list(statechart.hierarchy.successors(parent))
+            region = regions[0] if regions else add_region(statechart, parent, 'inner region')
+            states.append(add_state(statechart, region, rng.choice(STATE_NAMES), initial=not regions))
+        else:
+            states.append(add_state(statechart, main_region, rng.choice(STATE_NAMES)))
+    targets = list(states)
+    if rng.random() < 0.3:
+        final_id = get_id(statechart, 'f')
+        statechart.hierarchy.add_node(final_id, label='Final', obj=ScFinalState(final_id), ntype=NodeType.FINAL)
+        statechart.hierarchy.add_edge(main_region, final_id)
+        targets.append(final_id)
+    for _ in range(rng.randint(0, 2 * len(states))):
+        add_transition(statechart, rng.choice(states), rng.choice(targets), rng)
+    return statechart
+
+
+def mutate(statechart: Statechart, rng: random.Random):
+    """Renames a state, adds or removes a transition or changes the specification of one."""
+    states = get_vertices(statechart, NodeType.STATE)
+    transitions = [transition for source_transitions in statechart.transitions.values()
+                   for transition in source_transitions]
+    operation = rng.choice(['rename', 'add', 'remove', 'specification'] if transitions else ['rename', 'add'])
+    if operation == 'rename':
+        statechart.hierarchy.nodes[rng.choice(states)]['obj'].name = rng.choice(STATE_NAMES)
+    elif operation == 'add':
+        add_transition(statechart, rng.choice(states), rng.choice(states), rng)
+    elif operation == 'remove':
+        transition = rng.choice(transitions)
+        statechart.transitions[transition.source_id].remove(transition)
+    else:
+        rng.choice(transitions).specification = create_specification(rng)
+
+
+def add_region(statechart: Statechart, parent: str, name: str) -> str:
+    region_id = get_id(statechart, 'r')
+    # Like StatechartParser, which passes the name and the id in this order
+    statechart.hierarchy.add_node(region_id, label=name, ntype=NodeType.REGION, obj=ScRegion(name, region_id))
+    statechart.hierarchy.add_edge(parent, region_id)
+    return region_id
+
+
+def add_state(statechart: Statechart, region: str, name: str, initial: bool = False) -> str:
+    state_id = get_id(statechart, 's')
+    statechart.hierarchy.add_node(state_id, label=name, obj=ScState(state_id, name, initial), ntype=NodeType.STATE)
+    statechart.hierarchy.add_edge(region, state_id)
+    return state_id
+
+
+def add_transition(statechart: Statechart, source: str, target: str, rng: random.Random):
+    transition_count = sum(len(transitions) for transitions in statechart.transitions.values())
+    statechart.transitions[source].append(
+        ScTransition(f'_t{transition_count}_{rng.randrange(10 ** 6)}', source, target, create_specification(rng)))
+
+
+def create_specification(rng: random.Random) -> ScSpecification:
+    specification = ScSpecification()
+    specification.triggers.update(rng.sample(TRIGGERS, rng.choice([0, 1, 1, 2])))
+    if rng.random() < 0.3:
+        specification.guard = rng.choice(GUARDS)
+    specification.effects.update(rng.sample(EFFECTS, rng.choice([0, 0, 1])))
+    return specification
+
+
+def get_id(statechart: Statechart, prefix: str) -> str:
+    return f'_{prefix}{statechart.hierarchy.number_of_nodes()}'
+
+
+def get_vertices(statechart: Statechart, node_type: NodeType) -> List[str]:
+    return [node for node, data in statechart.hierarchy.nodes(data=True) if data['ntype'] == node_type]
+
+
+def round_trip(statechart: Statechart) -> Statechart:
+    """Writes the statechart as .ysc and parses it again, so it is exactly what a fixture reproduces."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'statechart.ysc')
+        writer.write(statechart, path)
+        return StatechartParser().parse(path=path)
+
+
+def minimize(statechart1: Statechart, statechart2: Statechart,
+             is_failing: Callable[[Statechart, Statechart], bool]) -> Tuple[Statechart, Statechart]:
+    """
+    Removes transitions, vertices, empty regions and parts of specifications one at a time as long as the pair
+    keeps failing, until no single removal does.
+    """
+    pair = [statechart1, statechart2]
+    is_reduced = True
+    while is_reduced:
+        is_reduced = False
+        for index in range(2):
+            for reduction in iterate_reductions(pair[index]):
+                candidate = list(pair)
+                candidate[index] = reduction
+                try:
+                    is_reduced = is_failing(*candidate)
+                except Exception:
+                    # A reduction the comparison cannot handle does not reproduce the mismatch
+                    is_reduced = False
+                if is_reduced:
+                    pair = candidate
+                    break
+            if is_reduced:
+                break
+    return pair[0], pair[1]
+
+
+def iterate_reductions(statechart: Statechart) -> Iterator[Statechart]:
+    """Yields copies of the statechart with one element removed, the largest elements first."""
+    hierarchy = statechart.hierarchy
+    for node, data in list(hierarchy.nodes(data=True)):
+        if data['ntype'] in (NodeType.STATE, NodeType.FINAL) and hierarchy.out_degree(node) == 0:
+            reduction = copy.deepcopy(statechart)
+            reduction.hierarchy.remove_node(node)
+            reduction.transitions.pop(node, None)
+            for source, transitions in reduction.transitions.items():
+                reduction.transitions[source] = [transition for transition in transitions
+                                                 if transition.target_id != node]
+            yield reduction
+        elif data['ntype'] == NodeType.REGION and hierarchy.out_degree(node) == 0 and \
+                next(hierarchy.predecessors(node)) != 'root':
+            reduction = copy.deepcopy(statechart)
+            reduction.hierarchy.remove_node(node)
+            yield reduction
+    for source, transitions in list(statechart.transitions.items()):
+        for index, transition in enumerate(transitions):
+            reduction = copy.deepcopy(statechart)
+            del reduction.transitions[source][index]
+            yield reduction
+            specification = transition.specification
+            for trigger in sorted(specification.triggers):
+                reduction = copy.deepcopy(statechart)
+                reduction.transitions[source][index].specification.triggers.remove(trigger)
+                yield reduction
+            if specification.guard is not None:
+                reduction = copy.deepcopy(statechart)
+                reduction.transitions[source][index].specification.guard = None
+                yield reduction
+            for effect in sorted(specification.effects):
+                reduction = copy.deepcopy(statechart)
+                reduction.transitions[source][index].specification.effects.remove(effect)
+                yield reduction
+    for state in get_vertices(statechart, NodeType.STATE):
+        for index in range(len(hierarchy.nodes[state]['obj'].specifications)):
+            reduction = copy.deepcopy(statechart)
+            del reduction.hierarchy.nodes[state]['obj'].specifications[index]
+            yield reduction
@@ -0,0 +1,209 @@
+"""
+The exhaustive comparison of the original networkx comparator, kept as the oracle of the differential tests. It
+builds its own comparison graphs and scores every combination of state and edge mappings by the labels they share,
+so it does not depend on the comparison graphs, scores or searches of the engines it checks. States and edges are
+enumerated in the order of their ids, which is the order the engines break ties in.
+"""
+
+import itertools
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+import networkx
+from yak_parser.Statechart import Statechart, NodeType, ScHistoryType
+
+from nyc.result import ComparisonResult, Diff
+
+
+def compare(statechart1: Statechart, statechart2: Statechart) -> ComparisonResult:
+    """
+    Returns the result of the first mapping with the most matches and, of those, the most matches of the state
+    names.
+    """
+    graph1 = create_comparison_graph(statechart1)
+    graph2 = create_comparison_graph(statechart2)
+    labeled_nodes1 = get_labeled_nodes(graph1)
+    labeled_nodes2 = get_labeled_nodes(graph2)
+    best_mappings, score = maxima(iterate_statechart_mappings(graph1, graph2),
+                                  key=lambda mapping: len(get_matches(labeled_nodes1, labeled_nodes2, mapping)))
+    tie_break_nodes1 = get_labeled_nodes(create_tie_break_comparison_graph(statechart1))
+    tie_break_nodes2 = get_labeled_nodes(create_tie_break_comparison_graph(statechart2))
+    best_mapping = maxima(best_mappings,
+                          key=lambda mapping: len(get_matches(tie_break_nodes1, tie_break_nodes2, mapping)))[0][0]
+
+    matches = get_matches(labeled_nodes1, labeled_nodes2, best_mapping)
+    states1, states2 = get_states(graph1), get_states(graph2)
+    state_match_count = len([match for match in matches if match[0][0] in states1])
+    state_label_count = len([node for node in labeled_nodes1 if node[0] in states1]) + \
+        len([node for node in labeled_nodes2 if node[0] in states2])
+    diff = Diff(
+        group_labeled_elements({((labeled_node1[0], labeled_node2[0]), labeled_node1[1])
+                                for labeled_node1, labeled_node2 in matches}),
+        additions=group_labeled_elements(labeled_nodes2 - {match[1] for match in matches}),
+        deletions=group_labeled_elements(labeled_nodes1 - {match[0] for match in matches})
+    )
+    return ComparisonResult(
+        diff=diff,
+        similarity_=divide(2 * score, len(labeled_nodes1) + len(labeled_nodes2)),
+        state_similarity=divide(2 * state_match_count, state_label_count),
+        single_similarity0=divide(score, len(labeled_nodes1)),
+        single_similarity1=divide(score, len(labeled_nodes2)),
+        is_greedy=False
+    )
+
+
+def iterate_statechart_mappings(graph1: networkx.DiGraph, graph2: networkx.DiGraph) -> Iterator[Dict[Any, Any]]:
+    """Yields every state mapping combined with every mapping of the edges between the mapped states."""
+    grouped_edges1 = group_edges(graph1, get_edges(graph1))
+    grouped_edges2 = group_edges(graph2, get_edges(graph2))
+    for state_mapping in iterate_mappings(sorted(get_states(graph1)), sorted(get_states(graph2))):
+        grouped_edge_mapping_groups = []
+        for (source, target), edges1 in sorted(grouped_edges1.items()):
+            if source in state_mapping and target in state_mapping:
+                edges2 = grouped_edges2.get((state_mapping[source], state_mapping[target]), [])
+                edge_mappings = list(iterate_mappings(edges1, edges2))
+                if edge_mappings != [{}]:
+                    grouped_edge_mapping_groups.append(edge_mappings)
+        for edge_mapping_groups in itertools.product(*grouped_edge_mapping_groups):
+            mapping = state_mapping.copy()
+            for edge_mapping_group in edge_mapping_groups:
+                mapping.update(edge_mapping_group)
+            yield mapping
+
+
+def iterate_mappings(list1: List[Any], list2: List[Any]) -> Iterator[Dict[Any, Any]]:
+    element_count = min(len(list1), len(list2))
+    list2_combinations = list(itertools.combinations(list2, element_count))
+    return (dict(zip(permutation, combination))
+            for permutation in itertools.permutations(list1, element_count)
+            for combination in list2_combinations)
+
+
+def maxima(iterable: Iterator[Any], key) -> Tuple[List[Any], int]:
+    elements_scored = defaultdict(list)
+    for element in iterable:
+        elements_scored[key(element)].append(element)
+    max_score = max(elements_scored)
+    return elements_scored[max_score], max_score
+
+
+def get_matches(labeled_nodes1: Set[Tuple[Any, str]], labeled_nodes2: Set[Tuple[Any, str]],
+                mapping: Dict[Any, Any]) -> Set[Tuple[Tuple[Any, str], Tuple[Any, str]]]:
+    matches = set()
+    for labeled_node in labeled_nodes1:
+        match = (mapping.get(labeled_node[0]), labeled_node[1])
+        if match in labeled_nodes2:
+            matches.add((labeled_node, match))
+    return matches
+
+
+def divide(matches: int, labels: int) -> float:
+    return matches / labels if labels > 0 else 0.0
+
+
+def create_comparison_graph(statechart: Statechart) -> networkx.DiGraph:
+    graph = networkx.DiGraph()
+    # noinspection PyArgumentList
+    for _, region in statechart.hierarchy.out_edges('root'):
+        # noinspection PyArgumentList
+        for _, state in statechart.hierarchy.out_edges(region):
+            build_hierarchy(statechart.hierarchy, state, statechart.hierarchy.nodes[region]['obj'].history, graph)
+
+    for transitions in statechart.transitions.values():
+        for transition in transitions:
+            labels = {'transition'}
+            for trigger in transition.specification.triggers:
+                trigger_stripped = remove_whitespace(trigger)
+                if trigger_stripped:
+                    labels.add('trigger_' + trigger_stripped)
+            for effect in transition.specification.effects:
+                effect_stripped = remove_whitespace(effect)
+                if effect_stripped:
+                    labels.add('effect_' + effect_stripped)
+            guard = transition.specification.guard
+            if guard:
+                guard_stripped = remove_whitespace(guard)
+                if guard_stripped:
+                    labels.add('guard_' + guard_stripped)
+            graph.add_node(transition.transition_id, labels=labels, source_id=transition.source_id,
+                           target_id=transition.target_id)
+
+            graph.add_edge(transition.source_id, transition.transition_id)
+            graph.add_edge(transition.transition_id, transition.target_id)
+    return graph
+
+
+def remove_whitespace(guard):
+    return "".join(guard.split())
+
+
+def build_hierarchy(hierarchy: networkx.DiGraph, state: Any, history_type: ScHistoryType,
+                    labeled_graph: networkx.DiGraph):
+    labels = {'state'}
+    state_attributes = hierarchy.nodes[state]
+    if state_attributes['ntype'] == NodeType.STATE and hierarchy.nodes[state]['obj'].initial:
+        labels.add('initial')
+    if state_attributes['ntype'] == NodeType.FINAL:
+        labels.add('final')
+    if state_attributes['ntype'] == NodeType.CHOICE:
+        labels.add('choice')
+
+    if history_type == ScHistoryType.SHALLOW:
+        labels.update({'history', 'shallow_history'})
+    elif history_type == ScHistoryType.DEEP:
+        labels.update({'history', 'deep_history'})
+    # noinspection PyArgumentList
+    edges_to_regions = list(hierarchy.out_edges(state))
+    subregion_count = len(edges_to_regions)
+    if subregion_count != 0:
+        labels.add('composite' if subregion_count == 1 else 'orthogonal')
+        for _, region in edges_to_regions:
+            # noinspection PyArgumentList
+            for _, substate in hierarchy.out_edges(region):
+                edge_id = state + substate
+                labeled_graph.add_node(edge_id, labels={'hierarchy'}, source_id=state, target_id=substate)
+                labeled_graph.add_edge(state, edge_id)
+                labeled_graph.add_edge(edge_id, substate)
+                build_hierarchy(hierarchy, substate, hierarchy.nodes[region]['obj'].history, labeled_graph)
+
+    labeled_graph.add_node(state, labels=labels)
+
+
+def create_tie_break_comparison_graph(statechart: Statechart) -> networkx.DiGraph:
+    graph = networkx.DiGraph()
+    for node in [
+        node for node in statechart.hierarchy.nodes if statechart.hierarchy.nodes[node]['ntype'] == NodeType.STATE
+    ]:
+        graph.add_node(node, labels={'state', 'name_' + statechart.hierarchy.nodes[node]['obj'].name})
+    return graph
+
+
+def get_states(graph: networkx.DiGraph) -> Set[Any]:
+    graph_labels = networkx.get_node_attributes(graph, 'labels').items()
+    return {node for node, labels in graph_labels if 'state' in labels}
+
+
+def get_edges(graph: networkx.DiGraph) -> Set[Any]:
+    graph_labels = networkx.get_node_attributes(graph, 'labels').items()
+    return {node for node, labels in graph_labels if 'transition' in labels or 'hierarchy' in labels}
+
+
+def group_edges(graph: networkx.DiGraph, edges: Set[Any]) -> Dict[Tuple[Any, Any], List[Any]]:
+    dictionary = defaultdict(list)
+    for edge in sorted(edges):
+        dictionary[graph.nodes[edge]['source_id'], graph.nodes[edge]['target_id']].append(edge)
+    return dictionary
+
+
+def get_labeled_nodes(graph: networkx.DiGraph) -> Set[Tuple[Any, str]]:
+    return {(node, label) for node, labels in networkx.get_node_attributes(graph, 'labels').items()
+            for label in labels}
+
+
+def group_labeled_elements(labeled_elements: Set[Tuple[Any, str]]) -> Dict[Any, Set[str]]:
+    dictionary = {}
+    for element, label in labeled_elements:
+        if element not in dictionary:
+            dictionary[element] = set()
+        dictionary[element].add(label)
+    return dictionary
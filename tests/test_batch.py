@@ -0,0 +1,60 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import random
+import unittest
+
+import numpy
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc.batch import iterate_mapping_blocks, iterate_domain_blocks, get_order_keys, BlockScorer
+from nyc.comparator import Comparator
+from nyc.mappings import iterate_mappings
+
+
+def get_state_mappings(blocks):
+    return [{state1: state2 for state1, state2 in enumerate(row) if state2 >= 0}
+            for block in blocks for row in block.tolist()]
+
+
+class TestBatch(unittest.TestCase):
+    def test_order(self):
+        for state_count1, state_count2 in [(0, 0), (0, 3), (3, 0), (3, 3), (4, 2), (2, 5), (5, 5)]:
+            for block_size in [1, 10, 1000]:
+                with self.subTest(state_count1=state_count1, state_count2=state_count2, block_size=block_size):
+                    self.assertEqual(list(iterate_mappings(range(state_count1), range(state_count2))),
+                                     get_state_mappings(iterate_mapping_blocks(state_count1, state_count2,
+                                                                               block_size)))
+
+    def test_domain_order(self):
+        rng = random.Random(0)
+        for state_count1, state_count2 in [(0, 3), (3, 0), (3, 3), (4, 2), (2, 5), (5, 5)]:
+            for block_size in [1, 10, 1000]:
+                with self.subTest(state_count1=state_count1, state_count2=state_count2, block_size=block_size):
+                    allowed = numpy.array([[rng.random() < 0.7 for _ in range(state_count2)]
+                                           for _ in range(state_count1)], dtype=bool).reshape(state_count1,
+                                                                                              state_count2)
+                    expected = [state_mapping for state_mapping in
+                                iterate_mappings(range(state_count1), range(state_count2))
+                                if all(allowed[state1, state2] for state1, state2 in state_mapping.items())]
+                    rows = numpy.concatenate(list(iterate_domain_blocks(allowed, block_size)) or
+                                             [numpy.zeros((0, state_count1), dtype=numpy.int64)])
+                    order_keys = get_order_keys(rows, state_count2)
+                    rows = rows[numpy.lexsort(order_keys.T[::-1])] if order_keys.shape[1] > 0 else rows
+                    self.assertEqual(expected, get_state_mappings([rows]))
+
+    def test_scores(self):
+        comparator = Comparator(StatechartParser().parse(path='testdata/test_comparison/test21.ysc'),
+                                StatechartParser().parse(path='testdata/test_comparison/test22.ysc'))
+        scorer = BlockScorer(comparator.overlaps.states, comparator.grouped_edges1, comparator.grouped_edges2,
+                             lambda edges1, edges2: comparator.get_best_edge_mapping(edges1, edges2)[1])
+        for block in iterate_mapping_blocks(comparator.comparison_graph1.state_count,
+                                            comparator.comparison_graph2.state_count, 100):
+            self.assertEqual([comparator.get_state_mapping_score(state_mapping)
+                              for state_mapping in get_state_mappings([block])], scorer.score(block).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
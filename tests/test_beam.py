@@ -0,0 +1,69 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import random
+import unittest
+
+from nyc import beam, preprocessor
+from nyc.budget import Budget
+from nyc.comparator import Comparator
+from nyc.graph import ComparisonGraph
+from tests import differential
+
+
+def get_comparator(rng, max_states):
+    comparison_graphs = []
+    for _ in range(2):
+        statechart = differential.round_trip(differential.generate_statechart(rng, max_states))
+        preprocessor.process(statechart)
+        comparison_graphs.append(ComparisonGraph(statechart))
+    return Comparator(*comparison_graphs)
+
+
+class TestBeam(unittest.TestCase):
+    def test_width_one(self):
+        comparator = get_comparator(random.Random(0), 30)
+        self.assertEqual(comparator.get_best_mapping_greedy(), comparator.get_best_mapping_beam(1))
+
+    def test_never_worse(self):
+        rng = random.Random(1)
+        better_count = 0
+        for i in range(10):
+            with self.subTest(i=i):
+                comparator = get_comparator(rng, 20)
+                _, greedy_score = comparator.get_best_mapping_greedy()
+                mapping, score = comparator.get_best_mapping_beam(8)
+                self.assertGreaterEqual(score, greedy_score)
+                self.assertEqual(score, len(comparator.get_matches(mapping)))
+                better_count += score > greedy_score
+        self.assertGreater(better_count, 0)
+
+    def test_auto_width(self):
+        self.assertEqual(beam.MAX_WIDTH, beam.get_auto_width(1, 1))
+        self.assertEqual(1, beam.get_auto_width(1000, 1000))
+        self.assertGreaterEqual(beam.get_auto_width(20, 40), beam.get_auto_width(40, 40))
+
+    def test_engine(self):
+        comparator = get_comparator(random.Random(0), 30)
+        self.assertTrue(comparator.uses_greedy())
+        greedy_result = comparator.compare()
+        self.assertEqual(0, greedy_result.beam_width)
+        comparison_result = comparator.compare(engine='beam', beam_width=4)
+        self.assertEqual(4, comparison_result.beam_width)
+        self.assertTrue(comparison_result.is_greedy)
+        self.assertFalse(comparison_result.is_partial)
+        self.assertGreater(comparison_result.seconds, 0)
+        self.assertGreaterEqual(comparison_result.similarity, greedy_result.similarity)
+
+        comparison_result = comparator.compare(Budget(steps=1), engine='beam')
+        self.assertTrue(comparison_result.is_partial)
+        self.assertGreater(comparison_result.similarity, 0)
+        self.assertEqual(beam.get_auto_width(comparator.comparison_graph1.state_count,
+                                             comparator.comparison_graph2.state_count),
+                         comparison_result.beam_width)
+
+
+if __name__ == '__main__':
+    unittest.main()
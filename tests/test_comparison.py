@@ -5,6 +5,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import unittest
 
+from nyc.budget import Budget
 from nyc.comparator import Diff, Comparator
 from yak_parser.StatechartParser import StatechartParser
 
@@ -117,6 +118,70 @@ class TestComparator(unittest.TestCase):
         self.assertEqual(1, comparison_result.single_similarity1)
         self.assertEqual(1, comparison_result.similarity)
 
+    def test_greedy(self):
+        statechart1 = StatechartParser().parse(path='testdata/test_comparison/test41.ysc')
+        statechart2 = StatechartParser().parse(path='testdata/test_comparison/test42.ysc')
+
+        comparator = Comparator(statechart1, statechart2)
+        mapping, match_count = comparator.get_best_mapping_greedy()
+        self.assertEqual(
+            {
+                '_A0h8LkDQEeyOTKblN67hww': '_5FbX5kDOEeyOTKblN67hww',
+                '_A0ijNkDQEeyOTKblN67hww': '_5FbX8EDOEeyOTKblN67hww',
+                '_PPvogEDQEeyOTKblN67hww': '_aO4sEEDPEeyOTKblN67hww',
+                '_PeU3EEDQEeyOTKblN67hww': '_h3teoEDPEeyOTKblN67hww',
+                '_A0h8MUDQEeyOTKblN67hww': '_5FbX6UDOEeyOTKblN67hww',
+                '_A0ijOUDQEeyOTKblN67hww': '_5Fb-8UDOEeyOTKblN67hww',
+                '_SZfnsEDQEeyOTKblN67hww': '_kBNhwEDPEeyOTKblN67hww',
+                '_A0ijNkDQEeyOTKblN67hww_PPvogEDQEeyOTKblN67hww': '_5FbX8EDOEeyOTKblN67hww_aO4sEEDPEeyOTKblN67hww',
+                '_A0ijNkDQEeyOTKblN67hww_PeU3EEDQEeyOTKblN67hww': '_5FbX8EDOEeyOTKblN67hww_h3teoEDPEeyOTKblN67hww'
+            },
+            comparator.get_id_mapping(mapping)
+        )
+        self.assertEqual(17, match_count)
+        self.assertEqual(match_count, len(comparator.get_matches(mapping)))
+
+    def test_exact_edge_groups(self):
+        for i in range(1, 4):
+            with self.subTest(i=i):
+                comparator = Comparator(
+                    StatechartParser().parse(path=f'testdata/test_comparison/test_get_statechart_mappings/'
+                                                  f'test_get_statechart_mappings{i}1.ysc'),
+                    StatechartParser().parse(path=f'testdata/test_comparison/test_get_statechart_mappings/'
+                                                  f'test_get_statechart_mappings{i}2.ysc'))
+                mapping, score = comparator.get_best_mapping_exact()
+                self.assertEqual(max(comparator.get_score(mapping) for mapping in
+                                     comparator.iterate_statechart_mappings()), score)
+                self.assertEqual(score, comparator.get_score(mapping))
+
+    def test_budget(self):
+        statechart1 = StatechartParser().parse(path='testdata/test_comparison/test11.ysc')
+        statechart2 = StatechartParser().parse(
+            path='testdata/test_preprocessing/test_remove_unnecessary_nesting_orthogonal_state.ysc')
+
+        comparison_result = Comparator(statechart1, statechart2).compare(Budget(steps=1))
+        self.assertTrue(comparison_result.is_partial)
+        self.assertTrue(comparison_result.is_greedy)
+        self.assertAlmostEqual(2 / 3, comparison_result.similarity)
+
+        comparison_result = Comparator(statechart1, statechart2).compare(Budget(steps=10 ** 6))
+        self.assertFalse(comparison_result.is_partial)
+        self.assertFalse(comparison_result.is_greedy)
+        self.assertAlmostEqual(2 / 3, comparison_result.similarity)
+
+    def test_greedy_budget(self):
+        comparator = Comparator(StatechartParser().parse(path='testdata/test_comparison/test21.ysc'),
+                                StatechartParser().parse(path='testdata/test_comparison/test22.ysc'))
+        (state_mapping, edge_mapping), score = comparator.get_best_mapping_greedy()
+        # A budget that runs out while the candidates are scored still completes the first round
+        budget = Budget(steps=1)
+        (partial_state_mapping, partial_edge_mapping), partial_score = comparator.get_best_mapping_greedy(budget)
+        self.assertTrue(budget.is_exhausted())
+        self.assertEqual(1, len(partial_state_mapping))
+        self.assertLessEqual(partial_state_mapping.items(), state_mapping.items())
+        self.assertLessEqual(partial_edge_mapping.items(), edge_mapping.items())
+        self.assertGreater(partial_score, 0)
+        self.assertLessEqual(partial_score, score)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import random
+import unittest
+from unittest import mock
+
+from yak_parser.Statechart import NodeType
+
+from tests import differential
+
+
+class TestDifferential(unittest.TestCase):
+    def test_auto_matches_reference(self):
+        for index in range(30):
+            with self.subTest(index=index):
+                statechart1, statechart2 = (differential.round_trip(statechart) for statechart in
+                                            differential.generate_pair(random.Random(f'0:{index}')))
+                run = differential.run_pair(statechart1, statechart2, ['auto'])
+                self.assertEqual([], run.mismatches['auto'])
+
+    def test_reference_does_not_use_comparator(self):
+        statechart1, statechart2 = (differential.round_trip(statechart) for statechart in
+                                    differential.generate_pair(random.Random('0:1')))
+        with mock.patch.object(differential, 'Comparator', side_effect=AssertionError):
+            run = differential.run_pair(statechart1, statechart2, ['auto'])
+        self.assertEqual([differential.ERROR], run.mismatches['auto'])
+        self.assertIsInstance(run.errors['auto'], AssertionError)
+
+    def test_engine_errors(self):
+        def fail(_):
+            raise ValueError('engine error')
+
+        statechart1, statechart2 = (differential.round_trip(statechart) for statechart in
+                                    differential.generate_pair(random.Random('0:2')))
+        with mock.patch.dict(differential.ENGINES, {'failing': fail}):
+            run = differential.run_pair(statechart1, statechart2, ['failing', 'auto'])
+        self.assertEqual([differential.ERROR], run.mismatches['failing'])
+        self.assertEqual('engine error', str(run.errors['failing']))
+        self.assertEqual([], run.mismatches['auto'])
+        self.assertNotIn('auto', run.errors)
+
+    def test_generate_pair(self):
+        pair1 = differential.generate_pair(random.Random(1))
+        pair2 = differential.generate_pair(random.Random(1))
+        for statechart1, statechart2 in zip(pair1, pair2):
+            self.assertEqual(list(statechart1.hierarchy.nodes), list(statechart2.hierarchy.nodes))
+            self.assertEqual({source: [str(transition) for transition in transitions]
+                              for source, transitions in statechart1.transitions.items()},
+                             {source: [str(transition) for transition in transitions]
+                              for source, transitions in statechart2.transitions.items()})
+
+    def test_minimize(self):
+        def has_e1(statechart, _):
+            return any('e1' in transition.specification.triggers
+                       for transitions in statechart.transitions.values() for transition in transitions)
+
+        for index in range(20):
+            statechart1, statechart2 = differential.generate_pair(random.Random(index))
+            if has_e1(statechart1, statechart2):
+                break
+        statechart1, statechart2 = differential.minimize(statechart1, statechart2, has_e1)
+        transitions = [transition for transitions in statechart1.transitions.values() for transition in transitions]
+        self.assertEqual(['e1'], [str(transition.specification) for transition in transitions])
+        self.assertEqual([], [transition for transitions in statechart2.transitions.values()
+                              for transition in transitions])
+        self.assertEqual([], [node for node, data in statechart2.hierarchy.nodes(data=True)
+                              if data['ntype'] == NodeType.STATE])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import copy
+import itertools
+import math
+import random
+import unittest
+
+import numpy
+
+from nyc import domains, preprocessor
+from nyc.batch import BlockScorer, get_best_state_mapping
+from nyc.comparator import Comparator
+from nyc.graph import ComparisonGraph
+from tests import differential
+
+
+def get_comparator(rng, min_states, max_states, mutations, strictness=0):
+    """Returns the comparator of a random statechart and a mutated copy, both with a state count in the range."""
+    while True:
+        statechart1 = differential.generate_statechart(rng, 2 * max_states)
+        statechart2 = copy.deepcopy(statechart1)
+        for _ in range(mutations):
+            differential.mutate(statechart2, rng)
+        comparison_graphs = []
+        for statechart in [statechart1, statechart2]:
+            statechart = differential.round_trip(statechart)
+            preprocessor.process(statechart)
+            comparison_graphs.append(ComparisonGraph(statechart))
+        if all(min_states <= graph.state_count <= max_states for graph in comparison_graphs) and \
+                max(graph.get_max_degree() for graph in comparison_graphs) <= 10:
+            return Comparator(*comparison_graphs, strictness=strictness)
+
+
+class TestDomains(unittest.TestCase):
+    def test_assignment_potentials(self):
+        rng = random.Random(0)
+        for size in range(1, 6):
+            with self.subTest(size=size):
+                costs = [[rng.randint(-9, 0) for _ in range(size)] for _ in range(size)]
+                row_potentials, column_potentials = domains.get_assignment_potentials(costs)
+                self.assertEqual(min(sum(costs[row][column] for row, column in enumerate(permutation))
+                                     for permutation in itertools.permutations(range(size))),
+                                 sum(row_potentials) + sum(column_potentials))
+                for row, column in itertools.product(range(size), repeat=2):
+                    self.assertLessEqual(row_potentials[row] + column_potentials[column], costs[row][column])
+
+    def test_count_mappings(self):
+        self.assertEqual(math.perm(5, 3), domains.count_mappings(numpy.ones((3, 5), dtype=bool)))
+        self.assertEqual(math.perm(5, 3), domains.count_mappings(numpy.ones((5, 3), dtype=bool)))
+        self.assertEqual(1, domains.count_mappings(numpy.eye(4, dtype=bool)))
+        self.assertEqual(0, domains.count_mappings(numpy.zeros((2, 2), dtype=bool)))
+
+    def test_exact(self):
+        rng = random.Random(0)
+        for i in range(5):
+            with self.subTest(i=i):
+                comparator = get_comparator(rng, 8, 9, rng.randint(5, 20))
+                allowed = comparator.get_domains()
+                self.assertIsNotNone(allowed)
+                mapping, score = comparator.get_best_mapping_exact()
+                scorer = BlockScorer(comparator.overlaps.states, comparator.grouped_edges1, comparator.grouped_edges2,
+                                     lambda edges1, edges2: comparator.get_best_edge_mapping(edges1, edges2)[1])
+                expected_state_mapping, expected_score = get_best_state_mapping(
+                    scorer, numpy.array(comparator.get_tie_break(), dtype=int),
+                    comparator.comparison_graph2.state_count)
+                self.assertEqual(expected_score, score)
+                self.assertEqual(expected_state_mapping, mapping[0])
+
+    def test_larger_statecharts(self):
+        comparator = get_comparator(random.Random(1), 12, 16, 3)
+        self.assertFalse(comparator.uses_greedy())
+        self.assertLessEqual(comparator.domain_mapping_count, 10 ** 6)
+        comparison_result = comparator.compare()
+        self.assertFalse(comparison_result.is_greedy)
+        self.assertGreaterEqual(comparison_result.similarity, comparator.create_result(
+            *comparator.get_best_mapping_greedy(), True, False).similarity)
+
+    def test_strictness(self):
+        rng = random.Random(2)
+        comparator = get_comparator(rng, 12, 16, 20)
+        strict_comparator = Comparator(comparator.comparison_graph1, comparator.comparison_graph2, strictness=2)
+        allowed = comparator.get_domains()
+        strict_allowed = strict_comparator.get_domains()
+        self.assertTrue((allowed | strict_allowed == allowed).all())
+        self.assertLessEqual(strict_comparator.domain_mapping_count, comparator.domain_mapping_count)
+        (greedy_state_mapping, _), _ = comparator.get_best_mapping_greedy()
+        for state1, state2 in greedy_state_mapping.items():
+            self.assertTrue(strict_allowed[state1, state2])
+
+    def test_strict_results_are_approximate(self):
+        comparator = get_comparator(random.Random(1), 12, 16, 3)
+        strict_comparator = Comparator(comparator.comparison_graph1, comparator.comparison_graph2, strictness=1)
+        self.assertFalse(strict_comparator.uses_greedy())
+        self.assertFalse(comparator.compare().is_greedy)
+        self.assertTrue(strict_comparator.compare().is_greedy)
+        # Small enough for the process pool, large enough for candidate domains
+        comparator = get_comparator(random.Random(1), 9, 10, 3, strictness=1)
+        self.assertIsNotNone(comparator.get_domains())
+        self.assertTrue(comparator.compare(workers=2).is_greedy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import itertools
+import pickle
+import random
+import shutil
+import subprocess
+import tempfile
+import unittest
+from functools import partial
+
+from yak_parser.Statechart import Statechart, NodeType, ScTransition, ScSpecification
+
+from nyc import edge_memo, pipeline, preprocessor, tiling
+from nyc.comparator import Comparator
+from nyc.edge_memo import EdgeGroupMemo
+from nyc.execution import SerialExecutor
+from nyc.graph import ComparisonGraph
+from tests import differential
+
+BUTTONS = [f'Panel.btn{i}_pressed' for i in range(5)]
+
+
+def create_panel_statechart(seed):
+    """Returns a statechart whose states are connected by groups of button transitions."""
+    rng = random.Random(seed)
+    statechart = Statechart()
+    statechart.hierarchy.add_node('root', ntype=NodeType.ROOT)
+    region = differential.add_region(statechart, 'root', 'main region')
+    states = [differential.add_state(statechart, region, name, initial=i == 0)
+              for i, name in enumerate(['Idle', 'Menu', 'Run', 'Done'])]
+    for source, target in [(0, 1), (1, 2), (2, 1), (2, 3)]:
+        for button in BUTTONS:
+            if rng.random() < 0.2:
+                continue
+            specification = ScSpecification()
+            specification.triggers.add(button)
+            if rng.random() < 0.5:
+                specification.effects.add(f'z = {rng.randrange(2)}')
+            transition_id = f'_t{sum(len(transitions) for transitions in statechart.transitions.values())}'
+            statechart.transitions[states[source]].append(
+                ScTransition(transition_id, states[source], states[target], specification))
+    statechart = differential.round_trip(statechart)
+    preprocessor.process(statechart)
+    return ComparisonGraph(statechart)
+
+
+class TestEdgeGroupMemo(unittest.TestCase):
+    def setUp(self):
+        self.graphs = [create_panel_statechart(seed % 3) for seed in range(5)]
+
+    def test_same_results(self):
+        for engine in ['auto', 'hierarchical']:
+            memo = EdgeGroupMemo()
+            for graph1, graph2 in itertools.combinations(self.graphs, 2):
+                with self.subTest(engine=engine):
+                    expected = Comparator(graph1, graph2).compare(engine=engine)
+                    actual = Comparator(graph1, graph2, memo).compare(engine=engine)
+                    self.assertEqual(expected.diff, actual.diff)
+                    self.assertEqual(expected.similarity, actual.similarity)
+            self.assertGreater(memo.hits, 0)
+            self.assertGreater(memo.misses, 0)
+
+    def test_greedy(self):
+        memo = EdgeGroupMemo()
+        for graph1, graph2 in itertools.combinations(self.graphs, 2):
+            expected, expected_score = Comparator(graph1, graph2).get_best_mapping_greedy()
+            actual, score = Comparator(graph1, graph2, memo).get_best_mapping_greedy()
+            self.assertEqual(expected, actual)
+            self.assertEqual(expected_score, score)
+        self.assertGreater(memo.hits, 0)
+
+    def test_bound(self):
+        memo = EdgeGroupMemo(max_entries=2)
+        memo.put(('f', ('a',), ('a',)), (((0, 0),), 1))
+        memo.put(('f', ('b',), ('b',)), (((0, 0),), 1))
+        self.assertIsNotNone(memo.get(('f', ('a',), ('a',))))
+        memo.put(('f', ('c',), ('c',)), (((0, 0),), 1))
+        self.assertEqual(2, len(memo))
+        self.assertIsNone(memo.get(('f', ('b',), ('b',))))
+        self.assertEqual((1, 1), (memo.hits, memo.misses))
+        self.assertEqual(0.5, memo.hit_rate)
+
+    def test_update_and_merge(self):
+        worker_memo = EdgeGroupMemo()
+        Comparator(self.graphs[0], self.graphs[1], worker_memo).compare()
+        update = worker_memo.take_update()
+        self.assertEqual(len(worker_memo), len(update))
+        self.assertEqual(0, worker_memo.lookups)
+        self.assertEqual(0, len(worker_memo.take_update()))
+
+        memo = EdgeGroupMemo()
+        memo.merge(update)
+        self.assertEqual(len(update), len(memo))
+        self.assertEqual(update.misses, memo.misses)
+
+    def test_save_and_load(self):
+        memo = EdgeGroupMemo()
+        for graph1, graph2 in itertools.combinations(self.graphs, 2):
+            Comparator(graph1, graph2, memo).compare()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'edge.memo')
+            edge_memo.save(memo, path)
+            loaded_memo = edge_memo.load(path)
+            self.assertEqual(list(memo.entries.items()), list(loaded_memo.entries.items()))
+            self.assertEqual(3, len(edge_memo.load(path, max_entries=3)))
+            Comparator(self.graphs[0], self.graphs[1], loaded_memo).compare()
+            self.assertEqual(0, loaded_memo.misses)
+
+            with open(path, 'wb') as memo_file:
+                pickle.dump({}, memo_file)
+            with self.assertRaises(ValueError):
+                edge_memo.load(path)
+
+    def test_pipeline(self):
+        memo = EdgeGroupMemo()
+        comparison_pipeline = pipeline.Pipeline(['0', '1', '0', '1'], [], 2, SerialExecutor(), 1,
+                                                lambda seed: (create_panel_statechart(int(seed)), None),
+                                                partial(edge_memo.compare_tile, compare_function=tiling.compare_tile),
+                                                memo)
+        comparison_result = comparison_pipeline.run(disable=True)
+        self.assertEqual(6, len(comparison_result))
+        self.assertGreater(memo.hits, 0)
+        self.assertEqual(len(edge_memo.get_worker_memo()), len(memo))
+
+    def test_statistics_only_verbose(self):
+        with tempfile.TemporaryDirectory() as directory:
+            statechart_directory = os.path.join(directory, 'statecharts')
+            os.mkdir(statechart_directory)
+            for name in ['test11.ysc', 'test12.ysc']:
+                shutil.copy(os.path.join('testdata/test_comparison', name), statechart_directory)
+            environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.getcwd()))
+            outputs = [subprocess.run([sys.executable, '-m', 'nyc', 'compare', statechart_directory] + arguments,
+                                      cwd=directory, env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                      text=True, check=True).stdout
+                       for arguments in [[], ['--verbose']]]
+        self.assertNotIn('Edge group memo', outputs[0])
+        self.assertIn('Edge group memo', outputs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
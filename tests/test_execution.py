@@ -0,0 +1,52 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import tempfile
+import unittest
+
+from nyc import execution
+
+
+def write_files(directory, files):
+    for name, content in files.items():
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+
+
+class TestExecution(unittest.TestCase):
+    def test_cpu_quota(self):
+        for files, expected in [({'cpu.max': 'max 100000\n'}, None),
+                                ({'cpu.max': '150000 100000\n'}, 1.5),
+                                ({'cpu/cpu.cfs_quota_us': '-1', 'cpu/cpu.cfs_period_us': '100000'}, None),
+                                ({'cpu/cpu.cfs_quota_us': '200000', 'cpu/cpu.cfs_period_us': '100000'}, 2),
+                                ({}, None)]:
+            with self.subTest(files=files), tempfile.TemporaryDirectory() as directory:
+                write_files(directory, files)
+                self.assertEqual(expected, execution.get_cpu_quota(directory))
+
+    def test_cpu_limit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_files(directory, {'cpu.max': '50000 100000'})
+            self.assertEqual(1, execution.get_cpu_limit(directory))
+
+    def test_available_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_files(directory, {'memory.max': str(3 * 2 ** 30), 'memory.current': str(2 ** 30),
+                                    'meminfo': 'MemTotal: 8388608 kB\nMemAvailable: 4194304 kB\n'})
+            meminfo_path = os.path.join(directory, 'meminfo')
+            self.assertEqual(2 * 2 ** 30, execution.get_available_memory(directory, meminfo_path))
+            write_files(directory, {'memory.max': 'max'})
+            self.assertEqual(4 * 2 ** 30, execution.get_available_memory(directory, meminfo_path))
+
+    def test_map_items(self):
+        for backend in execution.BACKENDS:
+            with self.subTest(backend=backend):
+                self.assertEqual([1, 4, 9], execution.map_items(abs, [1, 4, 9], backend, 2, disable=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import copy
+import random
+import unittest
+
+import networkx
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import preprocessor
+from nyc.comparator import Comparator
+from nyc.graph import ComparisonGraph, LabelOverlaps, create_comparison_graph
+from tests import differential
+
+
+class TestComparisonGraph(unittest.TestCase):
+    def test_arrays(self):
+        statechart = StatechartParser().parse(path='testdata/test_comparison/test41.ysc')
+        graph = create_comparison_graph(statechart)
+        comparison_graph = ComparisonGraph(statechart)
+
+        labels = networkx.get_node_attributes(graph, 'labels')
+        for state, state_id in enumerate(comparison_graph.state_ids):
+            self.assertEqual(labels[state_id], comparison_graph.get_state_labels(state))
+        for edge, edge_id in enumerate(comparison_graph.edge_ids):
+            self.assertEqual(labels[edge_id], comparison_graph.get_edge_labels(edge))
+            self.assertEqual(graph.nodes[edge_id]['source_id'],
+                             comparison_graph.state_ids[comparison_graph.source[edge]])
+            self.assertEqual(graph.nodes[edge_id]['target_id'],
+                             comparison_graph.state_ids[comparison_graph.target[edge]])
+            outgoing = comparison_graph.outgoing_edges[
+                comparison_graph.outgoing_offsets[comparison_graph.source[edge]]:
+                comparison_graph.outgoing_offsets[comparison_graph.source[edge] + 1]]
+            self.assertIn(edge, outgoing)
+
+        grouped_edges = comparison_graph.get_grouped_edges()
+        self.assertEqual(comparison_graph.edge_count, sum(len(edges) for edges in grouped_edges.values()))
+        for (source, target), edges in grouped_edges.items():
+            for edge in edges:
+                self.assertEqual((source, target), (comparison_graph.source[edge], comparison_graph.target[edge]))
+
+    def test_label_overlaps(self):
+        comparison_graph1 = ComparisonGraph(StatechartParser().parse(path='testdata/test_comparison/test41.ysc'))
+        comparison_graph2 = ComparisonGraph(StatechartParser().parse(path='testdata/test_comparison/test42.ysc'))
+        overlaps = LabelOverlaps(comparison_graph1, comparison_graph2)
+        for state1 in range(comparison_graph1.state_count):
+            for state2 in range(comparison_graph2.state_count):
+                self.assertEqual(len(comparison_graph1.get_state_labels(state1) &
+                                     comparison_graph2.get_state_labels(state2)),
+                                 overlaps.states[state1, state2])
+        for edge1 in range(comparison_graph1.edge_count):
+            for edge2 in range(comparison_graph2.edge_count):
+                self.assertEqual(len(comparison_graph1.get_edge_labels(edge1) &
+                                     comparison_graph2.get_edge_labels(edge2)),
+                                 overlaps.edges[edge1, edge2])
+
+    def test_transitions_to_unlabeled_states(self):
+        # Preprocessing removes an unreachable composite state of this statechart but keeps a nested state that a
+        # transition reaches directly
+        rng = random.Random(7)
+        statechart, _ = [differential.generate_pair(rng, 14) for _ in range(28)][27]
+        preprocessor.process(statechart)
+        comparison_graph = ComparisonGraph(statechart)
+        self.assertNotIn('_s7', comparison_graph.state_ids)
+        self.assertTrue(comparison_graph.unmatchable_labeled_nodes)
+        self.assertLessEqual(comparison_graph.unmatchable_labeled_nodes, comparison_graph.get_labeled_nodes())
+        # The transitions count but are never matched, like in the networkx comparison
+        self.assertAlmostEqual(0.85, Comparator(comparison_graph, copy.deepcopy(comparison_graph)).compare().similarity)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import random
+import unittest
+
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import preprocessor
+from nyc.comparator import Comparator
+from nyc.hierarchical import RegionTree
+from tests import differential
+
+
+class TestHierarchicalMatcher(unittest.TestCase):
+    def test_flat(self):
+        for path1, path2 in [('test11', 'test12'), ('test21', 'test22'), ('test31', 'test32')]:
+            with self.subTest(path1=path1, path2=path2):
+                comparator = Comparator(StatechartParser().parse(path=f'testdata/test_comparison/{path1}.ysc'),
+                                        StatechartParser().parse(path=f'testdata/test_comparison/{path2}.ysc'))
+                expected = comparator.compare()
+                actual = comparator.compare(engine='hierarchical')
+                self.assertEqual(expected.diff, actual.diff)
+                self.assertEqual(expected.similarity, actual.similarity)
+                self.assertFalse(actual.is_greedy)
+
+    def test_nested(self):
+        statechart1 = StatechartParser().parse(path='testdata/test_comparison/test41.ysc')
+        statechart2 = StatechartParser().parse(path='testdata/test_comparison/test42.ysc')
+        comparison_result = Comparator(statechart1, statechart2).compare(engine='hierarchical')
+        self.assertEqual(1, comparison_result.similarity)
+        self.assertFalse(comparison_result.is_greedy)
+
+    def test_regions(self):
+        path = 'testdata/test_preprocessing/test_remove_unreachable_states.ysc'
+        comparator = Comparator(StatechartParser().parse(path=path), StatechartParser().parse(path=path))
+        self.assertEqual(1, comparator.compare(engine='hierarchical').similarity)
+
+        tree = RegionTree(comparator.comparison_graph1)
+        state_regions = {state: region for region, states in enumerate(tree.region_states) for state in states}
+        (state_mapping, _), _, _ = comparator.get_best_mapping_hierarchical()
+        self.assertEqual(comparator.comparison_graph1.state_count, len(state_mapping))
+        for state1, state2 in state_mapping.items():
+            self.assertEqual(state_regions[state1], state_regions[state2])
+
+    def test_lost_matches_are_approximate(self):
+        for seed in ['1:38', '1:95', '1:257', '1:295']:
+            with self.subTest(seed=seed):
+                statechart1, statechart2 = (differential.round_trip(statechart) for statechart in
+                                            differential.generate_pair(random.Random(seed)))
+                preprocessor.process(statechart1)
+                preprocessor.process(statechart2)
+                expected = Comparator(statechart1, statechart2).compare()
+                actual = Comparator(statechart1, statechart2).compare(engine='hierarchical')
+                self.assertLess(actual.similarity, expected.similarity)
+                self.assertTrue(actual.is_greedy)
+
+    def test_parallel(self):
+        for path1, path2 in [('test41', 'test42'), ('test42', 'test41'), ('test11', 'test41')]:
+            with self.subTest(path1=path1, path2=path2):
+                statechart1 = StatechartParser().parse(path=f'testdata/test_comparison/{path1}.ysc')
+                statechart2 = StatechartParser().parse(path=f'testdata/test_comparison/{path2}.ysc')
+                expected = Comparator(statechart1, statechart2).compare(engine='hierarchical')
+                actual = Comparator(statechart1, statechart2).compare(engine='hierarchical', workers=2)
+                self.assertEqual(expected.diff, actual.diff)
+                self.assertEqual(expected.similarity, actual.similarity)
+                self.assertEqual(expected.is_greedy, actual.is_greedy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import random
+import unittest
+
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import preprocessor
+from nyc.budget import Budget
+from nyc.comparator import Comparator
+from nyc.graph import ComparisonGraph
+from tests import differential
+
+
+def get_comparison_graph(statechart):
+    statechart = differential.round_trip(statechart)
+    preprocessor.process(statechart)
+    return ComparisonGraph(statechart)
+
+
+class TestIlp(unittest.TestCase):
+    def test_exact(self):
+        paths = [(f'testdata/test_comparison/{path}1.ysc', f'testdata/test_comparison/{path}2.ysc')
+                 for path in ['test1', 'test2', 'test3']]
+        paths += [(f'testdata/test_comparison/test_get_statechart_mappings/test_get_statechart_mappings{i}1.ysc',
+                   f'testdata/test_comparison/test_get_statechart_mappings/test_get_statechart_mappings{i}2.ysc')
+                  for i in range(1, 4)]
+        for path1, path2 in paths:
+            with self.subTest(path1=path1, path2=path2):
+                comparator = Comparator(StatechartParser().parse(path=path1), StatechartParser().parse(path=path2))
+                _, expected_score = comparator.get_best_mapping_exact()
+                mapping, score, upper_bound = comparator.get_best_mapping_ilp()
+                self.assertEqual(expected_score, score)
+                self.assertEqual(score, upper_bound)
+                self.assertEqual(score, comparator.get_score(mapping))
+
+    def test_random(self):
+        rng = random.Random(0)
+        for i in range(20):
+            with self.subTest(i=i):
+                statechart1, statechart2 = differential.generate_pair(rng, 5)
+                comparator = Comparator(get_comparison_graph(statechart1), get_comparison_graph(statechart2))
+                _, expected_score = comparator.get_best_mapping_exact()
+                mapping, score, _ = comparator.get_best_mapping_ilp()
+                self.assertEqual(expected_score, score)
+                self.assertEqual(score, len(comparator.get_matches(mapping)))
+
+    def test_engine(self):
+        rng = random.Random(0)
+        comparator = Comparator(get_comparison_graph(differential.generate_statechart(rng, 30)),
+                                get_comparison_graph(differential.generate_statechart(rng, 30)))
+        self.assertTrue(comparator.uses_greedy())
+        greedy_result = comparator.compare()
+        comparison_result = comparator.compare(engine='ilp')
+        self.assertGreater(comparison_result.similarity, greedy_result.similarity)
+        self.assertFalse(comparison_result.is_greedy)
+        self.assertFalse(comparison_result.is_partial)
+        self.assertEqual(0, comparison_result.gap)
+
+        comparison_result = comparator.compare(Budget(seconds=0), engine='ilp')
+        self.assertTrue(comparison_result.is_partial)
+        self.assertGreater(comparison_result.gap, 0)
+        self.assertLessEqual(comparison_result.gap, 1)
+        self.assertGreaterEqual(comparison_result.similarity, greedy_result.similarity)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import glob
+import io
+import unittest
+
+import networkx
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import loader, preprocessor
+from nyc.comparator import Comparator
+
+
+def get_node_attributes(statechart):
+    attributes = []
+    for node, node_attributes in statechart.hierarchy.nodes(data=True):
+        obj = node_attributes.get('obj')
+        obj_attributes = None if obj is None else {
+            key: [str(specification) for specification in value] if key == 'specifications' else value
+            for key, value in vars(obj).items()
+        }
+        attributes.append((node, {key: value for key, value in node_attributes.items() if key != 'obj'},
+                           obj_attributes))
+    return attributes
+
+
+def get_transitions(statechart):
+    return [(state, [str(transition) for transition in transitions])
+            for state, transitions in statechart.transitions.items()]
+
+
+class TestLoader(unittest.TestCase):
+    def test_load(self):
+        paths = glob.glob('testdata/**/*.ysc', recursive=True) + glob.glob('testdata/**/*.sct', recursive=True)
+        for path in paths:
+            with self.subTest(path=path):
+                expected = StatechartParser().parse(path=path)
+                actual = loader.load(path)
+                self.assertEqual(get_node_attributes(expected), get_node_attributes(actual))
+                self.assertEqual(list(expected.hierarchy.edges), list(actual.hierarchy.edges))
+                self.assertEqual(get_transitions(expected), get_transitions(actual))
+
+                preprocessor.process(expected)
+                preprocessor.process(actual)
+                self.assertEqual(get_node_attributes(expected), get_node_attributes(actual))
+                self.assertEqual(get_transitions(expected), get_transitions(actual))
+
+    def test_parse_specification(self):
+        for text in ['', '  ', 'e1', 'e1, after 1 s', '[x > 0]', 'e1 [x > 0] / x += 1; raise o1', '/ x += 1',
+                     'entry / x = 0', 'e2[y]/raise o1']:
+            with self.subTest(text=text):
+                self.assertEqual(str(StatechartParser().parse_specification(text)),
+                                 str(loader.parse_specification(text)))
+
+    def test_load_file_object(self):
+        with open('testdata/test_comparison/test41.ysc', 'rb') as statechart_file:
+            statechart = loader.load(io.BytesIO(statechart_file.read()))
+        self.assertTrue(networkx.is_isomorphic(
+            StatechartParser().parse(path='testdata/test_comparison/test41.ysc').hierarchy, statechart.hierarchy))
+
+    def test_compare(self):
+        for path1, path2 in [('test11', 'test12'), ('test21', 'test22'), ('test31', 'test32'), ('test41', 'test42')]:
+            with self.subTest(path1=path1, path2=path2):
+                expected = Comparator(StatechartParser().parse(path=f'testdata/test_comparison/{path1}.ysc'),
+                                      StatechartParser().parse(path=f'testdata/test_comparison/{path2}.ysc')).compare()
+                actual = Comparator(loader.load(f'testdata/test_comparison/{path1}.ysc'),
+                                    loader.load(f'testdata/test_comparison/{path2}.ysc')).compare()
+                self.assertEqual(expected.diff, actual.diff)
+                self.assertEqual(expected.similarity, actual.similarity)
+                self.assertEqual(expected.state_similarity, actual.state_similarity)
+
+
+if __name__ == '__main__':
+    unittest.main()
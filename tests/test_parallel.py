@@ -0,0 +1,66 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import itertools
+import random
+import unittest
+from unittest import mock
+
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import parallel
+from nyc.comparator import Comparator
+from nyc.parallel import PairPool
+from tests import differential
+
+PATHS = ['test11', 'test12', 'test21', 'test22', 'test31', 'test32', 'test41', 'test42']
+
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.statecharts = {path: StatechartParser().parse(path=f'testdata/test_comparison/{path}.ysc')
+                            for path in PATHS}
+
+    def test_exact(self):
+        for path1, path2 in itertools.combinations(PATHS, 2):
+            with self.subTest(path1=path1, path2=path2):
+                expected = Comparator(self.statecharts[path1], self.statecharts[path2]).compare()
+                actual = Comparator(self.statecharts[path1], self.statecharts[path2]).compare(workers=2)
+                self.assertEqual(expected.diff, actual.diff)
+                self.assertEqual(expected.similarity, actual.similarity)
+
+    def test_exact_domains(self):
+        with mock.patch('nyc.comparator.BLOCK_SIZE', 0):
+            for path1, path2 in itertools.permutations(PATHS[:6], 2):
+                with self.subTest(path1=path1, path2=path2):
+                    comparator = Comparator(self.statecharts[path1], self.statecharts[path2], strictness=2)
+                    expected = comparator.compare()
+                    self.assertIsNotNone(comparator.domains)
+                    actual = Comparator(self.statecharts[path1], self.statecharts[path2],
+                                        strictness=2).compare(workers=2)
+                    self.assertEqual(expected.diff, actual.diff)
+                    self.assertEqual(expected.similarity, actual.similarity)
+
+    def test_exact_pruning(self):
+        # Without domains, the workers also skip blocks below the shared best score
+        rng = random.Random(3)
+        with mock.patch.object(Comparator, 'get_domains', return_value=None):
+            for index in range(8):
+                statechart1, statechart2 = differential.generate_pair(rng, 7)
+                with self.subTest(index=index):
+                    expected = Comparator(statechart1, statechart2).compare()
+                    actual = Comparator(statechart1, statechart2).compare(workers=2)
+                    self.assertEqual(expected.diff, actual.diff)
+                    self.assertEqual(expected.similarity, actual.similarity)
+
+    def test_greedy(self):
+        comparator = Comparator(self.statecharts['test41'], self.statecharts['test42'])
+        expected = comparator.get_best_mapping_greedy()
+        with mock.patch.object(parallel, 'MIN_PARALLEL_CANDIDATES', 0), PairPool(comparator, 2) as pool:
+            self.assertEqual(expected, comparator.get_best_mapping_greedy(pool=pool))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import contextlib
+import io
+import itertools
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from nyc import pipeline, tiling
+from nyc.compare_pair import compare_pair
+from nyc.execution import SerialExecutor
+
+PATHS = [f'testdata/test_comparison/{path}.ysc' for path in
+         ['test11', 'test12', 'test21', 'test22', 'test31', 'test32', 'test41']]
+
+
+def load_statechart(path):
+    if 'missing' in path:
+        raise ValueError('No statechart')
+    return pipeline.load_statechart(path)
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.named_statecharts = [(path, pipeline.load_statechart(path)[0]) for path in PATHS]
+
+    def run_pipeline(self, paths, archive_statecharts, tile_size, executor):
+        comparison_pipeline = pipeline.Pipeline(paths, archive_statecharts, tile_size, executor, 2, load_statechart,
+                                                tiling.compare_tile)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            comparison_result = comparison_pipeline.run(disable=True)
+        return comparison_pipeline, comparison_result, output.getvalue()
+
+    def assert_results(self, expected_pairs, comparison_result):
+        self.assertEqual([(path1, path2) for (path1, _), (path2, _) in expected_pairs],
+                         [(path1, path2) for path1, path2, _ in comparison_result])
+        for pair, (_, _, actual) in zip(expected_pairs, comparison_result):
+            self.assertEqual(compare_pair(pair)[2].diff, actual.diff)
+
+    def test_run(self):
+        for tile_size, executor in itertools.product([1, 2, 32], [SerialExecutor, partial(ThreadPoolExecutor, 2)]):
+            with self.subTest(tile_size=tile_size, executor=executor), executor() as pool:
+                comparison_pipeline, comparison_result, _ = self.run_pipeline(PATHS, [], tile_size, pool)
+                self.assertEqual(PATHS, [path for path, _ in comparison_pipeline.get_named_statecharts()])
+                self.assertEqual(set(PATHS), set(comparison_pipeline.summaries))
+                self.assert_results(list(itertools.combinations(self.named_statecharts, 2)), comparison_result)
+
+    def test_archive_and_skipped(self):
+        paths = PATHS[:3] + ['missing.ysc'] + PATHS[3:5]
+        comparison_pipeline, comparison_result, output = self.run_pipeline(paths, self.named_statecharts[5:], 2,
+                                                                           SerialExecutor())
+        self.assertEqual('Skipped missing.ysc: No statechart\n', output)
+        new_statecharts = self.named_statecharts[:5]
+        self.assert_results(list(itertools.combinations(new_statecharts, 2)) +
+                            list(itertools.product(new_statecharts, self.named_statecharts[5:])), comparison_result)
+
+
+if __name__ == '__main__':
+    unittest.main()
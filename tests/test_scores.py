@@ -0,0 +1,89 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import pickle
+import tempfile
+import unittest
+
+import numpy
+
+from nyc import scores, score_files
+from nyc.comparator import ComparisonResult, Diff
+
+
+def create_result(similarity, single_similarity0, single_similarity1, state_similarity, is_greedy=False,
+                  is_partial=False):
+    return ComparisonResult(Diff({}, {}, {}), similarity, single_similarity0, single_similarity1, state_similarity,
+                            is_greedy, is_partial)
+
+
+class TestScores(unittest.TestCase):
+    def setUp(self):
+        self.comparison_result = [
+            ('c', 'a', create_result(0.9, 0.8, 0.95, 1.0)),
+            ('a', 'b', create_result(0.5, 0.5, 0.6, 0.7, is_greedy=True)),
+            ('b', 'c', create_result(0.2, 0.3, 0.1, 0.95, is_partial=True))
+        ]
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result_filename = os.path.join(directory, 'comparison.result')
+            with open(result_filename, 'wb') as result_file:
+                pickle.dump(({}, self.comparison_result), result_file)
+            self.assertIsNone(scores.load(result_filename))
+
+            scores.save(scores.create_score_columns(self.comparison_result), result_filename)
+            score_columns = scores.load(result_filename)
+            self.assertIsInstance(score_columns.similarity, numpy.memmap)
+            self.assertEqual(['a', 'b', 'c'], score_columns.paths.tolist())
+            self.assertEqual([2, 0, 1], score_columns.chart1.tolist())
+            self.assertEqual([0.95, 0.6, 0.3], score_columns.max_similarity.tolist())
+            self.assertEqual([False, True, False], score_columns.is_greedy.tolist())
+            self.assertEqual([False, False, True], score_columns.is_partial.tolist())
+            del score_columns
+
+    def test_score_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result_filename = os.path.join(directory, 'comparison.result')
+            with open(result_filename, 'wb') as result_file:
+                pickle.dump(({}, self.comparison_result), result_file)
+            self.assertIsNone(score_files.load(result_filename))
+
+            scores.save(scores.create_score_columns(self.comparison_result), result_filename)
+            columns = score_files.load(result_filename)
+            self.assertEqual(score_files.create_columns(self.comparison_result),
+                             {column: list(values) for column, values in columns.items()})
+            self.assertEqual([0, 2], score_files.filter_rows(columns, 0.8, 0.8, 0.9))
+            self.assertEqual([0, 1, 2], score_files.filter_rows(columns, 0, 1, 1))
+            self.assertEqual([0, 2], score_files.filter_rows(score_files.create_columns(self.comparison_result),
+                                                             0.8, 0.8, 0.9))
+
+    def test_wide_beam(self):
+        self.comparison_result[0][2].beam_width = 100000
+        with tempfile.TemporaryDirectory() as directory:
+            result_filename = os.path.join(directory, 'comparison.result')
+            with open(result_filename, 'wb') as result_file:
+                pickle.dump(({}, self.comparison_result), result_file)
+            scores.save(scores.create_score_columns(self.comparison_result), result_filename)
+            self.assertEqual([100000, 0, 0], list(score_files.load(result_filename)['beam_width']))
+
+    def test_filter(self):
+        score_columns = scores.create_score_columns(self.comparison_result)
+        self.assertEqual([0], score_columns.filter(0.8, 0.8, 0.99).tolist())
+        self.assertEqual([0, 2], score_columns.filter(0.8, 0.8, 0.9).tolist())
+        self.assertEqual([0, 1, 2], score_columns.filter(0, 1, 1).tolist())
+
+    def test_chart_maxima(self):
+        score_columns = scores.create_score_columns(self.comparison_result)
+        maxima, best_rows = score_columns.get_chart_maxima(score_columns.similarity)
+        self.assertEqual([0.9, 0.5, 0.9], maxima.tolist())
+        self.assertEqual([0, 1, 0], best_rows.tolist())
+        maxima, best_rows = score_columns.get_chart_maxima(score_columns.state_similarity)
+        self.assertEqual([1.0, 0.95, 1.0], maxima.tolist())
+        self.assertEqual([0, 2, 0], best_rows.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import json
+import threading
+import unittest
+from http.client import HTTPConnection
+
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import service
+from nyc.service import ComparisonService, create_server
+
+
+class TestService(unittest.TestCase):
+    def setUp(self):
+        self.service = ComparisonService(workers=1)
+        for name in ['test11', 'test21', 'test41']:
+            self.service.add_statechart(name, StatechartParser().parse(path=f'testdata/test_comparison/{name}.ysc'))
+
+    def tearDown(self):
+        self.service.shutdown()
+
+    def test_compare(self):
+        results = self.service.compare(StatechartParser().parse(path='testdata/test_comparison/test42.ysc'))
+        self.assertEqual('test41', results[0]['path'])
+        self.assertEqual(1, results[0]['similarity'])
+        self.assertCountEqual(['test11', 'test21', 'test41'], [result['path'] for result in results])
+
+    def test_update_corpus(self):
+        self.service.compare(StatechartParser().parse(path='testdata/test_comparison/test12.ysc'))
+        self.assertTrue(self.service.remove_statechart('test11'))
+        self.assertFalse(self.service.remove_statechart('test11'))
+        self.service.add_statechart('test31', StatechartParser().parse(path='testdata/test_comparison/test31.ysc'))
+
+        results = self.service.compare(StatechartParser().parse(path='testdata/test_comparison/test32.ysc'), limit=2)
+        self.assertEqual(2, len(results))
+        self.assertEqual('test31', results[0]['path'])
+        self.assertEqual(1, results[0]['similarity'])
+
+    def test_corpus_changes(self):
+        self.service.compare(StatechartParser().parse(path='testdata/test_comparison/test12.ysc'))
+        executor = self.service.executor
+        self.service.add_statechart('test31', StatechartParser().parse(path='testdata/test_comparison/test31.ysc'))
+        self.service.remove_statechart('test41')
+        results = self.service.compare(StatechartParser().parse(path='testdata/test_comparison/test32.ysc'))
+        # The running workers caught up with the changes
+        self.assertIs(executor, self.service.executor)
+        self.assertCountEqual(['test11', 'test21', 'test31'], [result['path'] for result in results])
+        self.assertEqual(1, results[0]['similarity'])
+
+        for i in range(service.MAX_CORPUS_CHANGES + 1):
+            self.service.add_statechart(f'test31-{i}',
+                                        StatechartParser().parse(path='testdata/test_comparison/test31.ysc'))
+        self.assertIsNone(self.service.executor)
+        results = self.service.compare(StatechartParser().parse(path='testdata/test_comparison/test32.ysc'))
+        self.assertEqual(service.MAX_CORPUS_CHANGES + 4, len(results))
+
+    def test_concurrent_updates(self):
+        statechart_path = 'testdata/test_comparison/test31.ysc'
+        errors = []
+
+        def update_corpus():
+            try:
+                for i in range(2 * service.MAX_CORPUS_CHANGES):
+                    self.service.add_statechart(f'test31-{i % 3}', StatechartParser().parse(path=statechart_path))
+                    self.service.remove_statechart(f'test31-{(i + 1) % 3}')
+            except Exception as err:
+                errors.append(err)
+
+        thread = threading.Thread(target=update_corpus)
+        thread.start()
+        try:
+            while thread.is_alive():
+                results = self.service.compare(StatechartParser().parse(path='testdata/test_comparison/test32.ysc'))
+                self.assertLessEqual({'test11', 'test21', 'test41'}, {result['path'] for result in results})
+        finally:
+            thread.join()
+        self.assertEqual([], errors)
+
+    def test_http(self):
+        server = create_server(self.service, port=0)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            connection = HTTPConnection(*server.server_address)
+            with open('testdata/test_comparison/test42.ysc', 'rb') as statechart_file:
+                connection.request('POST', '/compare?limit=1', body=statechart_file.read())
+            response = connection.getresponse()
+            self.assertEqual(200, response.status)
+            self.assertEqual(['test41'], [result['path'] for result in json.loads(response.read())['results']])
+
+            connection.request('DELETE', '/charts/test41')
+            response = connection.getresponse()
+            response.read()
+            self.assertEqual(200, response.status)
+            connection.request('GET', '/charts')
+            self.assertEqual({'charts': ['test11', 'test21']}, json.loads(connection.getresponse().read()))
+
+            connection.request('PUT', '/charts/invalid', body=b'<xmi:XMI')
+            response = connection.getresponse()
+            response.read()
+            self.assertEqual(400, response.status)
+
+            # Parses, but the region shares its id with a state, which the preprocessor rejects
+            with open('testdata/test_comparison/test11.ysc') as statechart_file:
+                body = statechart_file.read().replace('<regions xmi:id="_3AQ7cpOAEeWuO-fDDpYHyA"',
+                                                      '<regions xmi:id="_3ASwp5OAEeWuO-fDDpYHyA"')
+            for method, path in [('PUT', '/charts/invalid'), ('POST', '/compare')]:
+                connection.request(method, path, body=body.encode())
+                response = connection.getresponse()
+                self.assertEqual(400, response.status)
+                self.assertIn('Invalid statechart', json.loads(response.read())['error'])
+            connection.request('GET', '/charts')
+            self.assertEqual({'charts': ['test11', 'test21']}, json.loads(connection.getresponse().read()))
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import copy
+import itertools
+import random
+import unittest
+
+from nyc import preprocessor, sharding
+from nyc.comparator import Comparator
+from nyc.graph import ComparisonGraph
+from tests import differential
+from yak_parser.StatechartParser import StatechartParser
+
+
+class TestSharding(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual((2, 4), sharding.parse_shard('2/4'))
+        self.assertRaises(ValueError, sharding.parse_shard, '0/4')
+        self.assertRaises(ValueError, sharding.parse_shard, '5/4')
+        self.assertRaises(ValueError, sharding.parse_shard, '4')
+
+    def test_get_shard(self):
+        pairs = list(itertools.combinations(range(10), 2))
+        costs = [(pair[0] + 1) * (pair[1] + 1) for pair in pairs]
+        shards = [sharding.get_shard(pairs, costs, index, 4) for index in range(1, 5)]
+
+        self.assertCountEqual(pairs, [pair for shard in shards for pair in shard])
+        for shard in shards:
+            self.assertEqual(sorted(shard), shard)
+        loads = [sum((pair[0] + 1) * (pair[1] + 1) for pair in shard) for shard in shards]
+        self.assertLessEqual(max(loads) - min(loads), max(costs))
+        self.assertEqual(shards[1], sharding.get_shard(pairs, costs, 2, 4))
+        assignment = sharding.assign_shards(costs, 4)
+        self.assertEqual(shards, [[pair for pair, shard in zip(pairs, assignment) if shard == index]
+                                  for index in range(4)])
+
+    def test_estimate_cost(self):
+        graph1, graph2, graph3 = (ComparisonGraph(StatechartParser().parse(path=f'testdata/test_comparison/{name}'))
+                                  for name in ['test11.ysc', 'test12.ysc', 'test41.ysc'])
+
+        self.assertEqual(sharding.estimate_cost(graph1, graph2), sharding.estimate_cost(graph2, graph1))
+        self.assertLess(sharding.estimate_cost(graph1, graph2), sharding.estimate_cost(graph3, graph3))
+
+    def test_estimate_cost_in_domains(self):
+        # Searched exactly within its candidate domains, so it costs as many mappings as the domains allow
+        rng = random.Random(1)
+        while True:
+            statechart1 = differential.generate_statechart(rng, 32)
+            statechart2 = copy.deepcopy(statechart1)
+            for _ in range(3):
+                differential.mutate(statechart2, rng)
+            graphs = []
+            for statechart in [statechart1, statechart2]:
+                statechart = differential.round_trip(statechart)
+                preprocessor.process(statechart)
+                graphs.append(ComparisonGraph(statechart))
+            if all(12 <= graph.state_count <= 16 and graph.get_max_degree() <= 10 for graph in graphs):
+                break
+        graph1, graph2 = graphs
+        comparator = Comparator(graph1, graph2)
+        self.assertFalse(comparator.uses_greedy())
+        self.assertIsNotNone(comparator.get_domains())
+        element_count = graph1.state_count + graph2.state_count + graph1.edge_count + graph2.edge_count
+        self.assertEqual(comparator.domain_mapping_count * element_count, sharding.estimate_cost(graph1, graph2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import tempfile
+import unittest
+
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import preprocessor, snapshot
+from nyc.comparator import Comparator
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_save_and_load(self):
+        path1 = 'testdata/test_comparison/test11.ysc'
+        path2 = 'testdata/test_comparison/test12.ysc'
+        statechart = StatechartParser().parse(path=path1)
+        summary = snapshot.preprocess(statechart)
+        self.assertEqual('Off', summary.get_name('_3ASwp5OAEeWuO-fDDpYHyA'))
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_path = os.path.join(directory, 'archive.snapshot')
+            snapshot.save(snapshot.Snapshot([(path1, statechart)], {path1: summary}), snapshot_path)
+            loaded_snapshot = snapshot.load(snapshot_path)
+        [(loaded_path, loaded_statechart)] = loaded_snapshot.statecharts
+        self.assertEqual(path1, loaded_path)
+        self.assertEqual(summary.names, loaded_snapshot.summaries[path1].names)
+
+        new_statechart = StatechartParser().parse(path=path2)
+        preprocessor.process(new_statechart)
+        expected_statechart = StatechartParser().parse(path=path1)
+        preprocessor.process(expected_statechart)
+        expected = Comparator(new_statechart, expected_statechart).compare()
+        actual = Comparator(new_statechart, loaded_statechart).compare()
+        self.assertEqual(expected.diff, actual.diff)
+        self.assertEqual(expected.similarity, actual.similarity)
+
+
+if __name__ == '__main__':
+    unittest.main()
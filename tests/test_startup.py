@@ -0,0 +1,66 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import pickle
+import subprocess
+import tempfile
+import unittest
+
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import preprocessor, scores
+from nyc.comparator import Comparator
+from nyc.result import summarize
+
+HEAVY_PACKAGES = ['numpy', 'networkx', 'yak_parser', 'tqdm']
+RUN_AND_LIST_PACKAGES = '''
+import runpy
+import sys
+sys.argv = ['nyc'] + sys.argv[1:]
+try:
+    runpy.run_module('nyc', run_name='__main__', alter_sys=True)
+finally:
+    sys.stderr.write(' '.join(sorted({module.split('.')[0] for module in sys.modules})))
+'''
+
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.result_filename = os.path.join(self.directory.name, 'comparison.result')
+        path1 = 'testdata/test_comparison/test11.ysc'
+        path2 = 'testdata/test_comparison/test12.ysc'
+        statechart1 = StatechartParser().parse(path=path1)
+        statechart2 = StatechartParser().parse(path=path2)
+        summaries = {path1: summarize(statechart1), path2: summarize(statechart2)}
+        summaries[path1].set_preprocessing_result(preprocessor.process(statechart1))
+        summaries[path2].set_preprocessing_result(preprocessor.process(statechart2))
+        comparison_result = [(path1, path2, Comparator(statechart1, statechart2).compare())]
+        with open(self.result_filename, 'wb') as result_file:
+            pickle.dump((summaries, comparison_result), result_file)
+        scores.save(scores.create_score_columns(comparison_result), self.result_filename)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_imported_packages(self, *arguments):
+        environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.getcwd()))
+        process = subprocess.run([sys.executable, '-c', RUN_AND_LIST_PACKAGES] + list(arguments), env=environment,
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+        self.assertIn('test11.ysc', process.stdout)
+        return set(process.stderr.split())
+
+    def test_list(self):
+        # NumPy filters the rows once they are read
+        packages = self.get_imported_packages('list', self.result_filename, '-threshold', '0')
+        self.assertEqual(set(), packages.intersection(HEAVY_PACKAGES).difference(['numpy']))
+
+    def test_matches(self):
+        packages = self.get_imported_packages('matches', self.result_filename, '1')
+        self.assertEqual(set(), packages.intersection(HEAVY_PACKAGES + ['tabulate']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import copy
+import random
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from yak_parser.Statechart import NodeType
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import preprocessor, template
+from nyc.comparator import Comparator
+from nyc.graph import ComparisonGraph
+from tests import differential
+
+TEMPLATE_PATH = 'testdata/test_comparison/test41.ysc'
+
+
+def add_own_part(statechart, seed, names=('Own1', 'Own2')):
+    """Adds states and transitions to them, like a submission adds to a starter statechart."""
+    rng = random.Random(seed)
+    region = next(statechart.hierarchy.successors('root'))
+    states = differential.get_vertices(statechart, NodeType.STATE)
+    new_states = [differential.add_state(statechart, region, name) for name in names]
+    for target in new_states:
+        differential.add_transition(statechart, rng.choice(states), target, rng)
+    return new_states
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self):
+        self.template_graph = template.load(TEMPLATE_PATH)
+        self.statechart = StatechartParser().parse(path=TEMPLATE_PATH)
+        preprocessor.process(self.statechart)
+
+    def test_subtract_template(self):
+        graph = template.subtract(self.template_graph, self.statechart)
+        self.assertEqual(0, graph.state_count)
+        self.assertEqual(0, graph.labeled_node_count)
+        result = Comparator(graph, graph).compare()
+        self.assertEqual(0.0, result.similarity)
+
+    def test_compare_empty_remainder(self):
+        empty_graph = template.subtract(self.template_graph, self.statechart)
+        other = StatechartParser().parse(path='testdata/test_comparison/test11.ysc')
+        preprocessor.process(other)
+        other_graph = template.subtract(self.template_graph, other)
+        self.assertGreater(other_graph.state_count, 0)
+        for graph1, graph2 in [(empty_graph, other_graph), (other_graph, empty_graph)]:
+            for engine in ['auto', 'hierarchical', 'ilp', 'beam']:
+                with self.subTest(engine=engine, state_count1=graph1.state_count):
+                    result = Comparator(graph1, graph2).compare(engine=engine)
+                    self.assertEqual(0.0, result.similarity)
+                    self.assertEqual({}, result.diff.matches)
+        self.assertEqual(0.0, Comparator(empty_graph, other_graph).compare(workers=2).similarity)
+
+    def test_compare_command_with_empty_remainder(self):
+        with tempfile.TemporaryDirectory() as directory:
+            statechart_directory = os.path.join(directory, 'statecharts')
+            os.mkdir(statechart_directory)
+            # The copy of the template comes first in the pairs, so the empty graph is the first of its pair
+            shutil.copy(TEMPLATE_PATH, os.path.join(statechart_directory, 'copy.ysc'))
+            shutil.copy('testdata/test_comparison/test11.ysc', statechart_directory)
+            template_path = os.path.join(directory, 'template.ysc')
+            shutil.copy(TEMPLATE_PATH, template_path)
+            environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.getcwd()))
+            subprocess.run([sys.executable, '-m', 'nyc', 'compare', statechart_directory, '--template', template_path],
+                           cwd=directory, env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+            process = subprocess.run([sys.executable, '-m', 'nyc', 'list', 'comparison.result', '-threshold', '0'],
+                                     cwd=directory, env=environment, stdout=subprocess.PIPE, text=True, check=True)
+            self.assertIn('copy.ysc', process.stdout)
+            self.assertIn('test11.ysc', process.stdout)
+
+    def test_subtract_keeps_additions(self):
+        new_states = add_own_part(self.statechart, 0)
+        graph = template.subtract(self.template_graph, self.statechart)
+        full_graph = ComparisonGraph(self.statechart)
+        self.assertTrue(set(new_states) <= set(graph.state_ids))
+        self.assertLess(graph.state_count, full_graph.state_count)
+        self.assertEqual(1.0, Comparator(graph, graph).compare().similarity)
+
+    def test_similarity_of_additions(self):
+        statechart1 = copy.deepcopy(self.statechart)
+        statechart2 = copy.deepcopy(self.statechart)
+        add_own_part(statechart1, 1)
+        add_own_part(statechart2, 2, names=('Other1', 'Other2', 'Other3'))
+        full_similarity = Comparator(statechart1, statechart2).compare().similarity
+        similarity = Comparator(template.subtract(self.template_graph, statechart1),
+                                template.subtract(self.template_graph, statechart2)).compare().similarity
+        self.assertLess(similarity, full_similarity)
+
+
+if __name__ == '__main__':
+    unittest.main()
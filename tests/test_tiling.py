@@ -0,0 +1,46 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import itertools
+import unittest
+
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import tiling
+from nyc.comparator import Comparator
+
+PATHS = ['test11', 'test12', 'test21', 'test22', 'test31', 'test32', 'test41', 'test42']
+
+
+class TestTiling(unittest.TestCase):
+    def test_get_tile_size(self):
+        self.assertEqual(32, tiling.get_tile_size(1000, 4))
+        self.assertEqual(8, tiling.get_tile_size(20, 1))
+        self.assertEqual(1, tiling.get_tile_size(2, 8))
+
+    def test_create_tiles(self):
+        named_statecharts = [(str(i), None) for i in range(5)]
+        pairs = list(itertools.combinations(range(5), 2))
+        tiles = tiling.create_tiles(named_statecharts, pairs, 2)
+        self.assertEqual([[(0, 1)], [(0, 2), (0, 3), (1, 2), (1, 3)], [(0, 4), (1, 4)], [(2, 3)], [(2, 4), (3, 4)]],
+                         [tile.pairs for tile in tiles])
+        self.assertEqual([0, 1, 4], sorted(tiles[2].statecharts))
+        self.assertCountEqual(pairs, [pair for tile in tiles for pair in tile.pairs])
+
+    def test_compare_tile(self):
+        named_statecharts = [(path, StatechartParser().parse(path=f'testdata/test_comparison/{path}.ysc'))
+                             for path in PATHS]
+        pairs = list(itertools.combinations(range(len(PATHS)), 2))
+        for tile in tiling.create_tiles(named_statecharts, pairs, 3):
+            for (index1, index2), (path1, path2, actual) in zip(tile.pairs, tiling.compare_tile(tile)):
+                with self.subTest(path1=path1, path2=path2):
+                    self.assertEqual((PATHS[index1], PATHS[index2]), (path1, path2))
+                    expected = Comparator(named_statecharts[index1][1], named_statecharts[index2][1]).compare()
+                    self.assertEqual(expected.diff, actual.diff)
+                    self.assertEqual(expected.similarity, actual.similarity)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+# Allow direct execution
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa: E402
+
+import glob
+import tempfile
+import unittest
+
+from yak_parser.StatechartParser import StatechartParser
+
+from nyc import writer, loader
+from nyc.comparator import Comparator
+
+
+def get_structure(statechart):
+    nodes = [(node, data['ntype'], data.get('label'), getattr(data.get('obj'), 'initial', None),
+              getattr(data.get('obj'), 'history', None),
+              [str(specification) for specification in getattr(data.get('obj'), 'specifications', [])])
+             for node, data in statechart.hierarchy.nodes(data=True)]
+    transitions = {source: [str(transition) for transition in transitions]
+                   for source, transitions in statechart.transitions.items() if transitions}
+    return nodes, list(statechart.hierarchy.edges), transitions
+
+
+class TestWriter(unittest.TestCase):
+    def test_round_trip(self):
+        paths = sorted(glob.glob('testdata/**/*.ysc', recursive=True) + glob.glob('testdata/**/*.sct', recursive=True))
+        with tempfile.TemporaryDirectory() as directory:
+            for path in paths:
+                with self.subTest(path=path):
+                    statechart = StatechartParser().parse(path=path)
+                    written_path = os.path.join(directory, os.path.basename(path))
+                    writer.write(statechart, written_path)
+                    written_statechart = StatechartParser().parse(path=written_path)
+                    self.assertEqual(get_structure(statechart), get_structure(written_statechart))
+                    self.assertEqual(get_structure(statechart), get_structure(loader.load(written_path)))
+                    self.assertEqual({interface: {name: str(event) for name, event in events.items()}
+                                      for interface, events in statechart.definition.events.items()},
+                                     {interface: {name: str(event) for name, event in events.items()}
+                                      for interface, events in written_statechart.definition.events.items()})
+                    self.assertEqual(1.0, Comparator(statechart, written_statechart).compare().similarity)
+
+
+if __name__ == '__main__':
+    unittest.main()